@@ -0,0 +1,111 @@
+from typing import Iterator, Literal, Optional
+
+import numpy as np
+from loguru import logger
+
+from src.audio import SAMPLE_RATE
+from src.model_registry import get_model
+
+# Whisper aligns at most one 30 second window of audio at a time
+WINDOW_SECONDS = 30
+
+
+def _windows(segments: list[dict]) -> Iterator[list[dict]]:
+    """Runs of consecutive segments that fit in one window from the first one's start."""
+    window = []
+    for segment in segments:
+        if window and segment["end"] - window[0]["start"] > WINDOW_SECONDS:
+            yield window
+            window = []
+        window.append(segment)
+    if window:
+        yield window
+
+
+def align_words(
+    audio: np.ndarray,
+    segments: list[dict],
+    model_str: Literal["base", "turbo"] = "turbo",
+    language: Optional[str] = None,
+) -> list[dict]:
+    """Add word timings to transcribed segments, without decoding the audio again.
+
+    The segments' text is forced through the decoder against the audio's
+    encoding and the cross-attention is aligned to the audio with dynamic
+    time warping, as `model.transcribe(word_timestamps=True)` does inline.
+    Here it is a separate stage, so it only runs for outputs that need
+    word times, and it also works on a transcript saved earlier (any
+    `[HH:MM:SS -> HH:MM:SS]`, SRT or WebVTT file read by `load_transcript`).
+
+    Args:
+        audio (np.ndarray): The 16 kHz mono float32 audio the segments were transcribed from.
+        segments (list[dict]): Segments with "start", "end" and "text", on the audio's timeline.
+        model_str (Literal["base", "turbo"], optional): The model to align with. Defaults to "turbo".
+        language (str, optional): The transcript's language, for the tokenizer.
+
+    Returns:
+        list[dict]: New segments with "words" added; segment "start" and "end" are
+            tightened to the words, as Whisper does.
+    """
+    import torch
+    from whisper.audio import (
+        HOP_LENGTH,
+        N_FRAMES,
+        N_SAMPLES,
+        log_mel_spectrogram,
+        pad_or_trim,
+    )
+    from whisper.timing import add_word_timestamps
+    from whisper.tokenizer import get_tokenizer
+
+    model = get_model(model_str)
+    dtype = next(model.parameters()).dtype
+    tokenizer = get_tokenizer(
+        model.is_multilingual,
+        num_languages=model.num_languages,
+        language=language,
+        task="transcribe",
+    )
+
+    aligned = []
+    last_speech_timestamp = 0.0
+    for window in _windows(segments):
+        seek = round(window[0]["start"] * SAMPLE_RATE / HOP_LENGTH)
+        window_audio = audio[seek * HOP_LENGTH : seek * HOP_LENGTH + N_SAMPLES]
+        if window[-1]["end"] - window[0]["start"] > WINDOW_SECONDS:
+            logger.warning(
+                f"Segment at {window[0]['start']:.1f}s is longer than {WINDOW_SECONDS}s, "
+                "leaving it without word timings"
+            )
+            aligned.extend(window)
+            continue
+        if not len(window_audio):
+            aligned.extend(window)
+            continue
+
+        timed = [
+            {
+                "start": segment["start"],
+                "end": segment["end"],
+                "seek": seek,
+                # Saved transcripts have their text stripped; words start with a space
+                "tokens": tokenizer.encode(" " + segment["text"].lstrip()),
+            }
+            for segment in window
+        ]
+        mel = log_mel_spectrogram(window_audio, model.dims.n_mels)
+        with torch.no_grad():
+            add_word_timestamps(
+                segments=timed,
+                model=model,
+                tokenizer=tokenizer,
+                mel=pad_or_trim(mel, N_FRAMES).to(model.device, dtype),
+                num_frames=min(len(window_audio) // HOP_LENGTH, N_FRAMES),
+                last_speech_timestamp=last_speech_timestamp,
+            )
+        last_speech_timestamp = timed[-1]["end"]
+        aligned.extend(
+            {**segment, "start": t["start"], "end": t["end"], "words": t["words"]}
+            for segment, t in zip(window, timed)
+        )
+    return aligned
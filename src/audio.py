@@ -0,0 +1,206 @@
+import subprocess
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import BinaryIO, Iterator, Optional, Union
+
+import numpy as np
+
+# Whisper's native input format: 16 kHz mono float32 in [-1, 1]
+SAMPLE_RATE = 16000
+
+
+def ffmpeg_decode_cmd(
+    source: Union[str, Path],
+    sr: int = SAMPLE_RATE,
+    http_headers: Optional[dict[str, str]] = None,
+) -> list[str]:
+    """Build the ffmpeg command that decodes `source` to 16-bit mono PCM on stdout.
+
+    `source` can also be an http(s) URL, fetched with `http_headers`; ffmpeg
+    then decodes as the bytes arrive and reconnects if the connection drops.
+    """
+    input_args = []
+    if http_headers is not None:
+        headers = "".join(f"{key}: {value}\r\n" for key, value in http_headers.items())
+        # fmt: off
+        input_args = [
+            "-headers", headers,
+            "-reconnect", "1",
+            "-reconnect_streamed", "1",
+            "-reconnect_delay_max", "30",
+        ]
+        # fmt: on
+    # fmt: off
+    return [
+        "ffmpeg",
+        "-nostdin",
+        "-loglevel", "error",
+        "-threads", "0",
+        *input_args,
+        "-i", str(source),
+        "-f", "s16le",
+        "-ac", "1",
+        "-acodec", "pcm_s16le",
+        "-ar", str(sr),
+        "-",
+    ]
+    # fmt: on
+
+
+def export_mp3(audio_path: Union[str, Path], output_file: Union[str, Path]) -> Path:
+    """Encode an audio file to a 192 kbps MP3 for people to listen to."""
+    # fmt: off
+    cmd = [
+        "ffmpeg",
+        "-nostdin",
+        "-loglevel", "error",
+        "-y",
+        "-i", str(audio_path),
+        "-vn",
+        "-codec:a", "libmp3lame",
+        "-b:a", "192k",
+        str(output_file),
+    ]
+    # fmt: on
+    try:
+        subprocess.run(cmd, capture_output=True, check=True)
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"Failed to export MP3: {e.stderr.decode()}") from e
+    return Path(output_file)
+
+
+def pcm16_to_float32(
+    pcm: Union[bytes, bytearray, memoryview, np.ndarray],
+    out: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """Convert 16-bit PCM to float32 in [-1, 1], optionally writing into `out`."""
+    samples = np.frombuffer(pcm, dtype=np.int16)
+    if out is None:
+        out = np.empty(len(samples), dtype=np.float32)
+    np.multiply(samples, np.float32(1 / 32768.0), out=out, casting="unsafe")
+    return out
+
+
+def decode_pcm16(audio_path: Union[str, Path], sr: int = SAMPLE_RATE) -> bytes:
+    """Decode an audio file to raw 16-bit mono PCM with ffmpeg."""
+    try:
+        return subprocess.run(
+            ffmpeg_decode_cmd(audio_path, sr), capture_output=True, check=True
+        ).stdout
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"Failed to load audio: {e.stderr.decode()}") from e
+
+
+def load_audio(audio_path: Union[str, Path], sr: int = SAMPLE_RATE) -> np.ndarray:
+    """Decode an audio file once to 16 kHz mono float32."""
+    return pcm16_to_float32(decode_pcm16(audio_path, sr))
+
+
+def stream_pcm(stream: BinaryIO, window_samples: int) -> Iterator[np.ndarray]:
+    """Read 16-bit PCM from a binary stream in fixed-size windows.
+
+    Yields float32 arrays of `window_samples` samples (the last one may be
+    shorter). Only one window of raw bytes is buffered at a time.
+    """
+    buffer = bytearray(window_samples * 2)
+    view = memoryview(buffer)
+    while True:
+        filled = 0
+        while filled < len(buffer):
+            n_read = stream.readinto(view[filled:])
+            if not n_read:
+                break
+            filled += n_read
+
+        filled -= filled % 2  # drop a dangling half sample
+        if filled:
+            yield pcm16_to_float32(view[:filled])
+        if filled < len(buffer):
+            return
+
+
+def stream_pipe(cmd: list[str], window_samples: int) -> Iterator[np.ndarray]:
+    """Run `cmd` and stream the 16-bit PCM it writes to stdout in fixed-size windows."""
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        yield from stream_pcm(process.stdout, window_samples)
+    except BaseException:
+        # Consumer stopped early (or failed): don't leave the decoder running
+        process.kill()
+        process.communicate()
+        raise
+
+    _, stderr = process.communicate()
+    if process.returncode != 0:
+        raise RuntimeError(f"Failed to decode audio: {stderr.decode()}")
+
+
+def stream_audio(
+    source: Union[str, Path],
+    chunk_duration: float = 300,
+    sr: int = SAMPLE_RATE,
+    http_headers: Optional[dict[str, str]] = None,
+) -> Iterator[np.ndarray]:
+    """Decode `source` through an ffmpeg pipe, yielding float32 chunks of `chunk_duration` seconds.
+
+    Peak memory depends on the chunk size, not on the length of the input.
+    `source` may be a URL (see `ffmpeg_decode_cmd`), in which case each chunk
+    is yielded as soon as its part of the download has been decoded.
+    """
+    cmd = ffmpeg_decode_cmd(source, sr, http_headers)
+    yield from stream_pipe(cmd, int(chunk_duration * sr))
+
+
+class SharedAudio:
+    """Float32 PCM held in shared memory so worker processes can slice it without copies.
+
+    The creating process owns the block and unlinks it on `close()`; workers
+    attach by name with `SharedAudio.attach`.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, num_samples: int, owner: bool):
+        self._shm = shm
+        self.num_samples = num_samples
+        self._owner = owner
+        self.array = np.ndarray((num_samples,), dtype=np.float32, buffer=shm.buf)
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    @classmethod
+    def create(cls, num_samples: int) -> "SharedAudio":
+        nbytes = max(1, num_samples * np.dtype(np.float32).itemsize)
+        shm = shared_memory.SharedMemory(create=True, size=nbytes)
+        return cls(shm, num_samples, owner=True)
+
+    @classmethod
+    def from_pcm16(cls, pcm: Union[bytes, np.ndarray]) -> "SharedAudio":
+        """Convert 16-bit PCM straight into a new shared block."""
+        shared = cls.create(len(pcm) // 2)
+        pcm16_to_float32(pcm, out=shared.array)
+        return shared
+
+    @classmethod
+    def from_file(
+        cls, audio_path: Union[str, Path], sr: int = SAMPLE_RATE
+    ) -> "SharedAudio":
+        return cls.from_pcm16(decode_pcm16(audio_path, sr))
+
+    @classmethod
+    def attach(cls, name: str, num_samples: int) -> "SharedAudio":
+        shm = shared_memory.SharedMemory(name=name)
+        return cls(shm, num_samples, owner=False)
+
+    def close(self) -> None:
+        # Drop our view before closing, shared memory refuses to close while exported
+        self.array = None
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+
+    def __enter__(self) -> "SharedAudio":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
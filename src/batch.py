@@ -0,0 +1,266 @@
+import asyncio
+import concurrent.futures
+import os
+import queue
+import sys
+import tempfile
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Literal, Optional
+
+from loguru import logger
+
+from src.cache import TranscriptStore
+from src.captions import RateLimiter, fetch_captions_async
+from src.chunk_audio import iter_chunk_results, make_worker_pool, stream_chunks
+from src.download import (
+    AudioFormat,
+    download_audio,
+    get_playlist_urls,
+    get_video_id,
+    get_video_info,
+    get_video_title,
+)
+from src.format_transcript import FORMAT_SUFFIXES, WORD_FORMATS, save_transcript
+from src.language import language_from_info
+from src.segments import SegmentStore
+
+# Sentinel telling a stage's worker threads there is no more work
+_DONE = object()
+
+
+@dataclass
+class BatchItem:
+    """A video moving through the batch pipeline, and what became of it."""
+
+    url: str
+    video_id: Optional[str] = None
+    info: Optional[dict] = None
+    audio_path: Optional[Path] = None
+    source: Optional[str] = None  # "store", "captions" or "whisper"
+    output: Optional[Path] = None
+    error: Optional[str] = None
+    _tmp: Optional[tempfile.TemporaryDirectory] = field(default=None, repr=False)
+
+
+def read_urls(source: str) -> list[str]:
+    """Resolve a batch source to video URLs.
+
+    `source` is "-" for URLs on stdin, a path to a file with one URL per line
+    (blank lines and "#" comments are skipped), or a playlist/channel URL.
+    """
+    if source == "-":
+        lines = sys.stdin.read().splitlines()
+    elif Path(source).is_file():
+        lines = Path(source).read_text().splitlines()
+    else:
+        return get_playlist_urls(source)
+
+    return [
+        line.strip()
+        for line in lines
+        if line.strip() and not line.strip().startswith("#")
+    ]
+
+
+def _write_transcript(
+    item: BatchItem, transcript: dict, output_dir: Path, output_format: str
+) -> None:
+    title = get_video_title(item.url, info=item.info)
+    item.output = save_transcript(
+        transcript["segments"],
+        Path(output_dir) / f"{title}{FORMAT_SUFFIXES[output_format]}",
+        output_format,
+    )
+    logger.success(f"[{item.video_id}] Transcript saved to: {item.output}")
+
+
+def run_batch(
+    urls: Iterable[str],
+    output_dir: Path,
+    with_timestamps: bool = True,
+    output_format: Optional[str] = None,
+    model_str: Literal["base", "turbo"] = "turbo",
+    audio_format: AudioFormat = "native",
+    chunk_duration: int = 300,
+    fetch_workers: int = 8,
+    download_workers: int = 4,
+    transcribe_workers: Optional[int] = None,
+    store: Optional[TranscriptStore] = None,
+    captions_per_second: Optional[float] = None,
+) -> list[BatchItem]:
+    """Transcribe many videos with a staged pipeline.
+
+    Three stages run concurrently, connected by bounded queues:
+
+    1. An asyncio loop looks up stored transcripts, video info and captions,
+       `fetch_workers` videos at a time, with caption requests rate limited
+       to `captions_per_second` and transient errors retried.
+    2. `download_workers` threads download audio for videos without captions.
+    3. A pool of `transcribe_workers` processes (default: one per core) with
+       warm models transcribes the downloaded audio chunk by chunk. At most
+       `2 * transcribe_workers` decoded chunks are held at once, however many
+       videos are being transcribed.
+
+    Downloads of the next videos therefore overlap with inference on the
+    current ones. A video that fails at any stage is recorded with its error
+    and the rest of the batch carries on.
+
+    Transcripts are written in `output_format` (see `OUTPUT_FORMATS`), which
+    defaults to "timestamps", or "text" when `with_timestamps` is False.
+
+    Returns:
+        One `BatchItem` per URL, in input order.
+    """
+    transcribe_workers = transcribe_workers or os.cpu_count() or 1
+    if output_format is None:
+        output_format = "timestamps" if with_timestamps else "text"
+    items = [BatchItem(url=url, video_id=get_video_id(url)) for url in urls]
+    whisper_options = {"chunk_duration": chunk_duration}
+    word_timestamps = output_format in WORD_FORMATS
+    if word_timestamps:
+        whisper_options["words"] = True
+
+    # Bounded queues give backpressure: fetchers wait for download slots,
+    # downloads wait for the transcription stage to catch up
+    download_queue: queue.Queue = queue.Queue(maxsize=2 * download_workers)
+    transcribe_queue: queue.Queue = queue.Queue(maxsize=transcribe_workers)
+    # Chunks queued for or running in the pool, across all transcription threads
+    in_flight = threading.BoundedSemaphore(2 * transcribe_workers)
+
+    async def fetch(
+        item: BatchItem, limiter: RateLimiter, info_limiter: asyncio.Semaphore
+    ) -> None:
+        try:
+            transcript = None
+            if store is not None and item.video_id is not None:
+                transcript = store.get(item.video_id, "captions") or store.get(
+                    item.video_id, "whisper", model_str, whisper_options
+                )
+                item.source = "store" if transcript is not None else None
+
+            async with info_limiter:
+                item.info = await asyncio.to_thread(get_video_info, item.url)
+            item.video_id = item.info.get("id") or item.video_id
+
+            if transcript is None and item.video_id is not None:
+                result = await fetch_captions_async(item.video_id, limiter)
+                if result.status == "ok":
+                    transcript = result.transcript
+                    item.source = "captions"
+                    if store is not None:
+                        store.put(transcript, item.video_id, "captions")
+                else:
+                    logger.info(
+                        f"[{item.video_id}] No captions ({result.error}), falling back to audio"
+                    )
+
+            if transcript is None:
+                await asyncio.to_thread(download_queue.put, item)
+            else:
+                _write_transcript(item, transcript, output_dir, output_format)
+        except Exception as e:
+            logger.error(f"[{item.url}] Fetch failed: {e}")
+            item.error = f"fetch: {e}"
+
+    async def fetch_all() -> None:
+        limiter = RateLimiter(fetch_workers, captions_per_second)
+        info_limiter = asyncio.Semaphore(fetch_workers)
+        await asyncio.gather(*(fetch(item, limiter, info_limiter) for item in items))
+
+    def download_loop() -> None:
+        while (item := download_queue.get()) is not _DONE:
+            try:
+                item._tmp = tempfile.TemporaryDirectory()
+                item.audio_path = download_audio(
+                    item.url,
+                    output_path=item._tmp.name,
+                    audio_format=audio_format,
+                    info=item.info,
+                )
+                transcribe_queue.put(item)
+            except Exception as e:
+                logger.error(f"[{item.url}] Download failed: {e}")
+                item.error = f"download: {e}"
+                # None when the temp dir itself could not be created
+                if item._tmp is not None:
+                    item._tmp.cleanup()
+
+    def transcribe_loop(executor: Optional[concurrent.futures.Executor]) -> None:
+        while (item := transcribe_queue.get()) is not _DONE:
+            try:
+                results = []
+                # Only the metadata is checked: detecting here would load a model per item
+                language = language_from_info(item.info) if item.info else None
+                chunks = stream_chunks(item.audio_path, chunk_duration)
+                for chunk, chunk_segments in iter_chunk_results(
+                    chunks,
+                    transcribe_workers,
+                    model_str,
+                    executor=executor,
+                    word_timestamps=word_timestamps,
+                    language=language,
+                    in_flight=in_flight,
+                ):
+                    if chunk_segments is None:
+                        raise RuntimeError(f"chunk {chunk.index} failed")
+                    results.append(chunk_segments)
+                segments = SegmentStore.concat(results).sort()
+
+                transcript = {
+                    "segments": segments.to_segments(),
+                    "text": segments.full_text(),
+                    "language": language,
+                }
+                item.source = "whisper"
+                if store is not None:
+                    store.put(
+                        transcript, item.video_id, "whisper", model_str, whisper_options
+                    )
+                _write_transcript(item, transcript, output_dir, output_format)
+            except Exception as e:
+                logger.error(f"[{item.url}] Transcription failed: {e}")
+                item.error = f"transcribe: {e}"
+            finally:
+                item._tmp.cleanup()
+
+    # A single in-process model must not be shared between threads, so only
+    # run several transcription threads when they feed a process pool
+    executor = (
+        make_worker_pool(transcribe_workers, model_str)
+        if transcribe_workers > 1
+        else None
+    )
+    n_transcribe_threads = transcribe_workers if executor is not None else 1
+
+    downloaders = [
+        threading.Thread(target=download_loop, name=f"download-{i}")
+        for i in range(download_workers)
+    ]
+    transcribers = [
+        threading.Thread(
+            target=transcribe_loop, args=(executor,), name=f"transcribe-{i}"
+        )
+        for i in range(n_transcribe_threads)
+    ]
+    for thread in downloaders + transcribers:
+        thread.start()
+
+    try:
+        asyncio.run(fetch_all())
+    finally:
+        for _ in downloaders:
+            download_queue.put(_DONE)
+        for thread in downloaders:
+            thread.join()
+        for _ in transcribers:
+            transcribe_queue.put(_DONE)
+        for thread in transcribers:
+            thread.join()
+        if executor is not None:
+            executor.shutdown()
+
+    n_failed = sum(item.error is not None for item in items)
+    logger.info(f"Batch finished: {len(items) - n_failed} succeeded, {n_failed} failed")
+    return items
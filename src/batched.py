@@ -0,0 +1,256 @@
+from typing import Any, Hashable, Iterable, Iterator, Literal, NamedTuple, Optional
+
+import numpy as np
+from loguru import logger
+
+from src.audio import SAMPLE_RATE
+from src.model_registry import get_model
+
+# Whisper's encoder always sees 30 seconds of audio
+WINDOW_SECONDS = 30
+WINDOW_SAMPLES = WINDOW_SECONDS * SAMPLE_RATE
+# Seconds per timestamp token
+TIME_PRECISION = 0.02
+
+# Same fallback rules and thresholds as whisper.transcribe
+TEMPERATURES = (0.0, 0.2, 0.4, 0.6, 0.8, 1.0)
+COMPRESSION_RATIO_THRESHOLD = 2.4
+LOGPROB_THRESHOLD = -1.0
+NO_SPEECH_THRESHOLD = 0.6
+
+
+class Window(NamedTuple):
+    """Up to 30 seconds of audio waiting for batched inference.
+
+    `key` identifies where the window came from (a chunk, a video), so one
+    batch can mix windows from several sources. `offset` is the window's
+    start in seconds on that source's timeline.
+    """
+
+    key: Hashable
+    offset: float
+    audio: np.ndarray
+
+
+def iter_windows(
+    audio: np.ndarray, key: Hashable = None, offset: float = 0.0
+) -> Iterator[Window]:
+    """Cut 16 kHz audio into consecutive 30 second windows (views, not copies)."""
+    for start in range(0, len(audio), WINDOW_SAMPLES):
+        yield Window(
+            key, offset + start / SAMPLE_RATE, audio[start : start + WINDOW_SAMPLES]
+        )
+
+
+def batch_windows(windows: Iterable[Window], batch_size: int) -> Iterator[list[Window]]:
+    """Group windows, from any number of sources, into batches of `batch_size`."""
+    batch = []
+    for window in windows:
+        batch.append(window)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def log_mel_batch(audio: np.ndarray, n_mels: int = 80, device: Any = None):
+    """Log-mel spectrograms of a (batch, samples) array in one STFT.
+
+    Matches `whisper.log_mel_spectrogram` row by row, including its
+    per-spectrogram dynamic range clamp.
+    """
+    import torch
+    from whisper.audio import HOP_LENGTH, N_FFT, mel_filters
+
+    audio = torch.from_numpy(np.ascontiguousarray(audio)).to(device)
+    window = torch.hann_window(N_FFT).to(audio.device)
+    stft = torch.stft(audio, N_FFT, HOP_LENGTH, window=window, return_complex=True)
+    magnitudes = stft[..., :-1].abs() ** 2
+
+    mel_spec = mel_filters(audio.device, n_mels) @ magnitudes
+
+    log_spec = torch.clamp(mel_spec, min=1e-10).log10()
+    log_spec = torch.maximum(log_spec, log_spec.amax(dim=(-2, -1), keepdim=True) - 8.0)
+    return (log_spec + 4.0) / 4.0
+
+
+def segments_from_tokens(
+    tokens: list[int], tokenizer, offset: float, duration: float
+) -> list[dict]:
+    """Split a decoded window into segments at its timestamp tokens.
+
+    Whisper emits `<|t0|> text <|t1|><|t1|> text <|t2|>`; a trailing run of
+    text without a closing timestamp ends at the end of the window.
+    """
+    segments = []
+    start, text_tokens = None, []
+
+    def close(end: float) -> None:
+        segments.append(
+            {
+                "start": offset + min(start or 0.0, duration),
+                "end": offset + min(end, duration),
+                "text": tokenizer.decode(text_tokens),
+                "tokens": list(text_tokens),
+            }
+        )
+
+    for token in tokens:
+        if token >= tokenizer.timestamp_begin:
+            time = (token - tokenizer.timestamp_begin) * TIME_PRECISION
+            if start is not None and text_tokens:
+                close(time)
+                start, text_tokens = None, []
+            else:
+                start = time
+        elif token < tokenizer.eot:
+            text_tokens.append(token)
+    if text_tokens:
+        close(duration)
+    return segments
+
+
+def _needs_fallback(result) -> bool:
+    if (
+        result.no_speech_prob > NO_SPEECH_THRESHOLD
+        and result.avg_logprob < LOGPROB_THRESHOLD
+    ):
+        return False  # silence
+    return (
+        result.compression_ratio > COMPRESSION_RATIO_THRESHOLD
+        or result.avg_logprob < LOGPROB_THRESHOLD
+    )
+
+
+class BatchedTranscriber:
+    """Transcribe 30 second windows in batches through Whisper's encoder and decoder.
+
+    Each batch is turned into log-mel spectrograms with one STFT, encoded in
+    one forward pass and decoded together; sequences that emit end-of-text
+    stop while the rest of the batch carries on. Windows whose decode looks
+    unreliable are re-decoded, again in batches, at increasing temperatures
+    as `whisper.transcribe` does.
+
+    Unlike `model.transcribe`, windows are independent: a window is not
+    conditioned on the previous window's text, and each covers a fixed 30
+    seconds instead of seeking to the last complete segment.
+    """
+
+    def __init__(
+        self,
+        model,
+        batch_size: int = 8,
+        language: Optional[str] = None,
+        task: Literal["transcribe", "translate"] = "transcribe",
+        temperatures: tuple[float, ...] = TEMPERATURES,
+    ):
+        from whisper.tokenizer import get_tokenizer
+
+        self.model = model
+        self.batch_size = batch_size
+        self.language = language
+        self.task = task
+        self.temperatures = temperatures
+        self.tokenizer = get_tokenizer(
+            model.is_multilingual,
+            num_languages=model.num_languages,
+            language=language,
+            task=task,
+        )
+
+    def _decode(self, mel, temperature: float) -> list:
+        import whisper
+
+        options = whisper.DecodingOptions(
+            task=self.task,
+            language=self.language,
+            temperature=temperature,
+            fp16=self.model.device.type == "cuda",
+        )
+        return whisper.decode(self.model, mel, options)
+
+    def transcribe_batch(self, windows: list[Window]) -> list[list[dict]]:
+        """Segments for each window in the batch, on each window's own timeline."""
+        audio = np.zeros((len(windows), WINDOW_SAMPLES), dtype=np.float32)
+        for row, window in zip(audio, windows):
+            row[: len(window.audio)] = window.audio
+        mel = log_mel_batch(audio, self.model.dims.n_mels, self.model.device)
+        if self.model.device.type == "cuda":
+            mel = mel.half()
+
+        results = self._decode(mel, self.temperatures[0])
+        for temperature in self.temperatures[1:]:
+            retry = [i for i, result in enumerate(results) if _needs_fallback(result)]
+            if not retry:
+                break
+            logger.debug(
+                f"Re-decoding {len(retry)} windows at temperature {temperature}"
+            )
+            for i, result in zip(retry, self._decode(mel[retry], temperature)):
+                results[i] = result
+
+        all_segments = []
+        for window, result in zip(windows, results):
+            if (
+                result.no_speech_prob > NO_SPEECH_THRESHOLD
+                and result.avg_logprob < LOGPROB_THRESHOLD
+            ):
+                all_segments.append([])
+                continue
+            segments = segments_from_tokens(
+                result.tokens,
+                self.tokenizer,
+                window.offset,
+                len(window.audio) / SAMPLE_RATE,
+            )
+            for segment in segments:
+                segment.update(
+                    temperature=result.temperature,
+                    avg_logprob=result.avg_logprob,
+                    compression_ratio=result.compression_ratio,
+                    no_speech_prob=result.no_speech_prob,
+                )
+            all_segments.append(segments)
+        return all_segments
+
+    def transcribe(
+        self, windows: Iterable[Window]
+    ) -> Iterator[tuple[Window, list[dict]]]:
+        """Yield `(window, segments)` for every window, batch by batch."""
+        for batch in batch_windows(windows, self.batch_size):
+            yield from zip(batch, self.transcribe_batch(batch))
+
+
+def transcribe_batched(
+    audio: np.ndarray,
+    model_str: Literal["base", "turbo"] = "turbo",
+    batch_size: int = 8,
+    language: Optional[str] = None,
+) -> list[dict]:
+    """Transcribe 16 kHz mono float32 audio with batched inference over its 30 second windows."""
+    return transcribe_batched_many([audio], model_str, batch_size, language)[0]
+
+
+def transcribe_batched_many(
+    audios: list[np.ndarray],
+    model_str: Literal["base", "turbo"] = "turbo",
+    batch_size: int = 8,
+    language: Optional[str] = None,
+) -> list[list[dict]]:
+    """Transcribe several pieces of audio, filling each batch with windows from any of them.
+
+    Pieces shorter than `batch_size` windows, such as one minute chunks,
+    still run at the full batch size. Each piece's segments are timed from
+    its own start.
+    """
+    transcriber = BatchedTranscriber(get_model(model_str), batch_size, language)
+    windows = (
+        window
+        for key, audio in enumerate(audios)
+        for window in iter_windows(audio, key)
+    )
+    segments = [[] for _ in audios]
+    for window, window_segments in transcriber.transcribe(windows):
+        segments[window.key].extend(window_segments)
+    return segments
@@ -0,0 +1,193 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+from loguru import logger
+
+
+def _json_default(obj: Any) -> Any:
+    # numpy scalars and arrays (e.g. Whisper's float32 word probabilities)
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    return str(obj)
+
+
+def hash_file(path: Path, chunk_size: int = 1 << 20) -> str:
+    """SHA-256 of a file's contents, for keying transcripts of audio without a video id."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while block := f.read(chunk_size):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def get_cache_dir() -> Path:
+    """Root directory for ytt's caches ($YTT_CACHE_DIR, else ~/.cache/ytt)."""
+    if "YTT_CACHE_DIR" in os.environ:
+        return Path(os.environ["YTT_CACHE_DIR"])
+    xdg_cache = os.environ.get("XDG_CACHE_HOME")
+    return (Path(xdg_cache) if xdg_cache else Path.home() / ".cache") / "ytt"
+
+
+class DiskCache:
+    """JSON values on disk, one file per key, with TTL and LRU size eviction.
+
+    Reads bump the file's mtime, so when the directory grows beyond
+    `max_bytes` the least recently used entries are removed first.
+
+    Args:
+        directory: Where to keep the cache files. Created on first write.
+        ttl: Seconds an entry stays valid after it is written. None means forever.
+        max_bytes: Maximum total size of the cache files. None means unbounded.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        ttl: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+    ):
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+
+    def _path(self, key: str) -> Path:
+        digest = hashlib.sha256(key.encode()).hexdigest()[:32]
+        return self.directory / f"{digest}.json"
+
+    def get(self, key: str) -> Optional[Any]:
+        path = self._path(key)
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Dropping unreadable cache entry {path}: {e}")
+            path.unlink(missing_ok=True)
+            return None
+
+        if self.ttl is not None and time.time() - entry["created"] > self.ttl:
+            path.unlink(missing_ok=True)
+            return None
+
+        os.utime(path)
+        return entry["value"]
+
+    def set(self, key: str, value: Any) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        entry = {"key": key, "created": time.time(), "value": value}
+
+        # Write to a temp file and rename, so readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(entry, f, default=_json_default)
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+        self._evict()
+
+    def delete(self, key: str) -> None:
+        self._path(key).unlink(missing_ok=True)
+
+    def clear(self) -> None:
+        for path in self.directory.glob("*.json"):
+            path.unlink(missing_ok=True)
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def size(self) -> int:
+        return sum(path.stat().st_size for path in self.directory.glob("*.json"))
+
+    def _evict(self) -> None:
+        if self.max_bytes is None:
+            return
+        entries = []
+        for path in self.directory.glob("*.json"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+
+# yt-dlp's stream URLs expire after about six hours, so cached info must not outlive them
+INFO_CACHE_TTL = 5 * 60 * 60
+INFO_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+
+def get_info_cache() -> DiskCache:
+    """Cache of yt-dlp info dicts keyed by video id."""
+    return DiskCache(
+        get_cache_dir() / "info", ttl=INFO_CACHE_TTL, max_bytes=INFO_CACHE_MAX_BYTES
+    )
+
+
+TRANSCRIPT_STORE_MAX_BYTES = 512 * 1024 * 1024
+
+
+class TranscriptStore:
+    """Transcript results keyed by what produced them.
+
+    A key is the video id (or audio hash), where the transcript came from
+    ("captions" or "whisper"), and for Whisper the model and the options
+    passed to it. Values are the full result dicts with "segments", "text"
+    and "language".
+    """
+
+    def __init__(self, cache: DiskCache):
+        self.cache = cache
+
+    @staticmethod
+    def make_key(
+        source_id: str,
+        source: str,
+        model_str: Optional[str] = None,
+        options: Optional[dict] = None,
+    ) -> str:
+        return json.dumps(
+            [source_id, source, model_str, options or {}],
+            sort_keys=True,
+            default=_json_default,
+        )
+
+    def get(
+        self,
+        source_id: str,
+        source: str,
+        model_str: Optional[str] = None,
+        options: Optional[dict] = None,
+    ) -> Optional[dict]:
+        return self.cache.get(self.make_key(source_id, source, model_str, options))
+
+    def put(
+        self,
+        transcript: dict,
+        source_id: str,
+        source: str,
+        model_str: Optional[str] = None,
+        options: Optional[dict] = None,
+    ) -> None:
+        self.cache.set(self.make_key(source_id, source, model_str, options), transcript)
+
+
+def get_transcript_store() -> TranscriptStore:
+    """Transcript store under the ytt cache directory."""
+    return TranscriptStore(
+        DiskCache(get_cache_dir() / "transcripts", max_bytes=TRANSCRIPT_STORE_MAX_BYTES)
+    )
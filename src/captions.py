@@ -0,0 +1,223 @@
+import asyncio
+import functools
+import random
+from typing import Iterable, Literal, NamedTuple, Optional
+
+from loguru import logger
+
+from src.download import get_video_id
+from src.language import normalize_language
+from src.sections import Section, clip_transcript
+
+# Caption tracks to use, in order of preference
+CAPTION_LANGUAGES = ("en",)
+
+
+# youtube_transcript_api pulls in requests, so it is only imported once
+# captions are actually fetched
+@functools.cache
+def permanent_errors() -> tuple[type[Exception], ...]:
+    """Errors that will not go away on retry: the video has no usable captions.
+
+    Anything else (TooManyRequests, YouTubeRequestFailed, malformed XML from
+    the timedtext endpoint, network errors) is treated as transient and retried.
+    """
+    from youtube_transcript_api import (
+        CookiePathInvalid,
+        CookiesInvalid,
+        InvalidVideoId,
+        NoTranscriptAvailable,
+        NoTranscriptFound,
+        NotTranslatable,
+        TranslationLanguageNotAvailable,
+        VideoUnavailable,
+    )
+    from youtube_transcript_api._transcripts import TranscriptsDisabled
+
+    return (
+        TranscriptsDisabled,
+        NoTranscriptFound,
+        NoTranscriptAvailable,
+        VideoUnavailable,
+        InvalidVideoId,
+        NotTranslatable,
+        TranslationLanguageNotAvailable,
+        CookiePathInvalid,
+        CookiesInvalid,
+    )
+
+
+class CaptionResult(NamedTuple):
+    """Outcome of fetching captions for one video.
+
+    status is "ok" (transcript is set), "unavailable" (a permanent error: the
+    video has no usable captions) or "error" (transient errors persisted
+    through every retry).
+    """
+
+    video_id: str
+    status: Literal["ok", "unavailable", "error"]
+    transcript: Optional[dict] = None
+    error: Optional[str] = None
+    attempts: int = 0
+
+
+class RateLimiter:
+    """Cap concurrent caption requests and space out their starts.
+
+    Args:
+        max_concurrency: Maximum requests in flight.
+        requests_per_second: Maximum request starts per second. None means no limit.
+    """
+
+    def __init__(
+        self, max_concurrency: int = 8, requests_per_second: Optional[float] = None
+    ):
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._lock = asyncio.Lock()
+        self._interval = 1 / requests_per_second if requests_per_second else 0.0
+        self._next_start = 0.0
+
+    async def __aenter__(self) -> "RateLimiter":
+        await self._semaphore.acquire()
+        if self._interval:
+            async with self._lock:
+                loop = asyncio.get_running_loop()
+                wait = self._next_start - loop.time()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                self._next_start = max(loop.time(), self._next_start) + self._interval
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self._semaphore.release()
+
+
+def backoff_delay(attempt: int, base_delay: float, max_delay: float) -> float:
+    """Full-jitter exponential backoff: uniform in [0, min(max_delay, base * 2**attempt)]."""
+    return random.uniform(0, min(max_delay, base_delay * 2**attempt))
+
+
+def to_whisper_format(captions: list[dict], language: Optional[str] = "en") -> dict:
+    """Convert YouTube caption entries to the result format Whisper returns."""
+    formatted_segments = []
+    full_text = []
+
+    for segment in captions:
+        formatted_segments.append(
+            {
+                "start": segment["start"],
+                "end": segment["start"] + segment["duration"],
+                "text": segment["text"],
+            }
+        )
+        full_text.append(segment["text"])
+
+    return {
+        "segments": formatted_segments,
+        "text": " ".join(full_text),
+        "language": language,
+    }
+
+
+def fetch_caption_track(
+    video_id: str, languages: Iterable[str] = CAPTION_LANGUAGES
+) -> tuple[list[dict], str]:
+    """Fetch a video's caption entries and the language code of the track they came from."""
+    from youtube_transcript_api import YouTubeTranscriptApi
+
+    track = YouTubeTranscriptApi.list_transcripts(video_id).find_transcript(
+        list(languages)
+    )
+    return track.fetch(), track.language_code
+
+
+async def fetch_captions_async(
+    video_id: str,
+    limiter: Optional[RateLimiter] = None,
+    retries: int = 3,
+    base_delay: float = 0.5,
+    max_delay: float = 8.0,
+) -> CaptionResult:
+    """Fetch captions for a video, retrying transient errors with jittered backoff.
+
+    Permanent errors return "unavailable" immediately, without retrying, so
+    the caller can start the audio fallback straight away. The transcript is
+    labelled with the language of the caption track it came from.
+    """
+    limiter = limiter or RateLimiter()
+    last_error = None
+    for attempt in range(retries + 1):
+        if attempt:
+            delay = backoff_delay(attempt - 1, base_delay, max_delay)
+            logger.debug(
+                f"[{video_id}] Retrying captions in {delay:.2f}s: {last_error}"
+            )
+            await asyncio.sleep(delay)
+
+        try:
+            async with limiter:
+                captions, language = await asyncio.to_thread(
+                    fetch_caption_track, video_id
+                )
+        except permanent_errors() as e:
+            return CaptionResult(
+                video_id, "unavailable", error=type(e).__name__, attempts=attempt + 1
+            )
+        except Exception as e:
+            last_error = f"{type(e).__name__}: {e}"
+            continue
+
+        return CaptionResult(
+            video_id,
+            "ok",
+            transcript=to_whisper_format(captions, normalize_language(language)),
+            attempts=attempt + 1,
+        )
+
+    return CaptionResult(video_id, "error", error=last_error, attempts=retries + 1)
+
+
+async def fetch_many_captions(
+    video_ids: Iterable[str],
+    max_concurrency: int = 8,
+    requests_per_second: Optional[float] = None,
+    retries: int = 3,
+) -> dict[str, CaptionResult]:
+    """Fetch captions for many videos concurrently under one rate limit."""
+    limiter = RateLimiter(max_concurrency, requests_per_second)
+    video_ids = list(dict.fromkeys(video_ids))
+    results = await asyncio.gather(
+        *(fetch_captions_async(video_id, limiter, retries) for video_id in video_ids)
+    )
+    return dict(zip(video_ids, results))
+
+
+def fetch_captions(video_id: str, retries: int = 3) -> CaptionResult:
+    """Blocking wrapper around `fetch_captions_async` for a single video."""
+    return asyncio.run(fetch_captions_async(video_id, retries=retries))
+
+
+def extract_transcript(
+    url: str, sections: Optional[Iterable[Section]] = None
+) -> Optional[dict]:
+    """Fetch a video's captions, keeping only the segments in `sections` if given."""
+    # Extract video_id from various YouTube URL formats
+    video_id = get_video_id(url)
+    if video_id is None:
+        logger.error(f"Could not extract video ID from URL: {url}")
+        return None
+
+    result = fetch_captions(video_id)
+    if result.status == "unavailable":
+        logger.info(
+            f"No captions for this video ({result.error}). Reverting to download audio and whisper convert."
+        )
+    elif result.status == "error":
+        logger.warning(
+            f"Failed to get transcript for video {video_id} after {result.attempts} attempts: "
+            f"{result.error}. Reverting to download audio and whisper convert."
+        )
+    if result.transcript is not None and sections is not None:
+        return clip_transcript(result.transcript, sections)
+    return result.transcript
@@ -0,0 +1,140 @@
+from typing import Callable, NamedTuple
+
+import numpy as np
+from loguru import logger
+
+from src.audio import SAMPLE_RATE
+from src.batched import COMPRESSION_RATIO_THRESHOLD, NO_SPEECH_THRESHOLD
+from src.sections import shift_segments
+
+# The cheap model that transcribes everything first
+FAST_MODEL = "base"
+# Seconds of audio either side of an escalated run, so its edge words are heard whole
+SPAN_PADDING = 0.5
+
+# `(audio, model_str) -> segments`, with timestamps relative to the start of `audio`
+Transcribe = Callable[[np.ndarray, str], list[dict]]
+
+
+class CascadeThresholds(NamedTuple):
+    """Segments the fast model decoded outside these limits are re-transcribed.
+
+    The limits are checked against the per-segment statistics Whisper
+    reports. A segment without a statistic passes that check.
+    """
+
+    min_avg_logprob: float = -0.5
+    max_compression_ratio: float = COMPRESSION_RATIO_THRESHOLD
+    max_no_speech_prob: float = NO_SPEECH_THRESHOLD
+
+
+class Escalation(NamedTuple):
+    """A run of low-confidence segments and the audio span that replaces them.
+
+    `first` and `last` index the segments (`last` exclusive); `start` and
+    `end` are in seconds.
+    """
+
+    first: int
+    last: int
+    start: float
+    end: float
+
+
+def is_low_confidence(
+    segment: dict, thresholds: CascadeThresholds = CascadeThresholds()
+) -> bool:
+    return (
+        segment.get("avg_logprob", 0.0) < thresholds.min_avg_logprob
+        or segment.get("compression_ratio", 0.0) > thresholds.max_compression_ratio
+        or segment.get("no_speech_prob", 0.0) > thresholds.max_no_speech_prob
+    )
+
+
+def escalation_spans(
+    segments: list[dict],
+    duration: float,
+    thresholds: CascadeThresholds = CascadeThresholds(),
+    padding: float = SPAN_PADDING,
+) -> list[Escalation]:
+    """The runs of neighbouring low-confidence segments, each with the audio to redo.
+
+    A span covers its run plus up to `padding` seconds either side, but
+    never reaches into a segment that is kept, so the re-transcribed speech
+    does not repeat what is already in the transcript.
+    """
+    flagged = [is_low_confidence(segment, thresholds) for segment in segments]
+    spans = []
+    first = 0
+    while first < len(segments):
+        if not flagged[first]:
+            first += 1
+            continue
+        last = first
+        while last < len(segments) and flagged[last]:
+            last += 1
+        before = segments[first - 1]["end"] if first else 0.0
+        after = segments[last]["start"] if last < len(segments) else duration
+        start = max(segments[first]["start"] - padding, before, 0.0)
+        end = min(segments[last - 1]["end"] + padding, after, duration)
+        if end > start:
+            spans.append(Escalation(first, last, start, end))
+        first = last
+    return spans
+
+
+def _place(segments: list[dict], span: Escalation) -> list[dict]:
+    """Move re-transcribed segments onto the full timeline, inside their span."""
+    placed = []
+    for segment in shift_segments(segments, span.start):
+        start = min(max(segment["start"], span.start), span.end)
+        placed.append(
+            {
+                **segment,
+                "start": start,
+                "end": max(start, min(segment["end"], span.end)),
+            }
+        )
+    return placed
+
+
+def cascade_transcribe(
+    audio: np.ndarray,
+    transcribe: Transcribe,
+    fast_model: str = FAST_MODEL,
+    accurate_model: str = "turbo",
+    thresholds: CascadeThresholds = CascadeThresholds(),
+    sr: int = SAMPLE_RATE,
+) -> tuple[list[dict], float]:
+    """Transcribe with `fast_model`, then redo only its low-confidence parts with `accurate_model`.
+
+    Each run of segments that fails `thresholds` is cut out of the fast
+    transcript and replaced with the accurate model's transcription of the
+    same stretch of audio (see `escalation_spans`). On clean speech most
+    segments pass, so the large model only sees a small share of the audio.
+
+    Returns:
+        tuple[list[dict], float]: The spliced segments, in order, and how many
+            seconds of audio were escalated to `accurate_model`.
+    """
+    duration = len(audio) / sr
+    segments = transcribe(audio, fast_model)
+    spans = escalation_spans(segments, duration, thresholds)
+
+    spliced = []
+    kept_from = 0
+    for span in spans:
+        spliced.extend(segments[kept_from : span.first])
+        redone = transcribe(
+            audio[int(span.start * sr) : int(span.end * sr)], accurate_model
+        )
+        spliced.extend(_place(redone, span))
+        kept_from = span.last
+    spliced.extend(segments[kept_from:])
+
+    escalated = sum(span.end - span.start for span in spans)
+    logger.info(
+        f"Escalated {escalated:.1f}s of {duration:.1f}s"
+        f" ({escalated / duration if duration else 0:.0%}) to {accurate_model}"
+    )
+    return spliced, escalated
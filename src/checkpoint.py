@@ -0,0 +1,195 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Optional
+
+from loguru import logger
+
+from src.cache import TranscriptStore, get_cache_dir
+from src.segments import SegmentStore
+
+if TYPE_CHECKING:
+    from src.chunk_audio import Chunk
+
+MANIFEST_VERSION = 1
+
+
+def _write_atomic(path: Path, write: Callable[[Path], Any]) -> None:
+    """Call `write` on a temp path, then rename it over `path`.
+
+    A crash therefore never leaves a partially written file behind.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    os.close(fd)
+    try:
+        write(Path(tmp_path))
+        os.replace(tmp_path, path)
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+
+
+def get_job_dir(source_id: str, model_str: str, options: Optional[dict] = None) -> Path:
+    """Job directory for a chunked transcription, under the ytt cache directory.
+
+    The same video, model and options always map to the same directory, so
+    a rerun finds the work an interrupted run left behind.
+    """
+    key = TranscriptStore.make_key(source_id, "whisper", model_str, options)
+    return get_cache_dir() / "jobs" / hashlib.sha256(key.encode()).hexdigest()[:32]
+
+
+def find_downloaded_audio(job_dir: Path) -> Optional[list[tuple[float, Path]]]:
+    """The audio a previous run finished downloading into `job_dir`, if any.
+
+    Returns:
+        Optional[list[tuple[float, Path]]]: Each file with where it starts in the video, in seconds.
+    """
+    try:
+        files = json.loads((job_dir / "audio.json").read_text())["files"]
+    except (FileNotFoundError, json.JSONDecodeError, KeyError):
+        return None
+    downloads = [(offset, job_dir / "audio" / name) for offset, name in files]
+    return downloads if all(path.exists() for _, path in downloads) else None
+
+
+def record_downloaded_audio(job_dir: Path, downloads: list[tuple[float, Path]]) -> None:
+    """Note that the (offset, file) `downloads` are complete, for `find_downloaded_audio`."""
+    job_dir.mkdir(parents=True, exist_ok=True)
+    files = [(offset, path.name) for offset, path in downloads]
+    _write_atomic(
+        job_dir / "audio.json",
+        lambda tmp: tmp.write_text(json.dumps({"files": files})),
+    )
+
+
+def find_job_language(job_dir: Path) -> Optional[str]:
+    """The language a previous run resolved for the audio in `job_dir`, if any."""
+    try:
+        return json.loads((job_dir / "language.json").read_text())["language"]
+    except (FileNotFoundError, json.JSONDecodeError, KeyError):
+        return None
+
+
+def record_job_language(job_dir: Path, language: str) -> None:
+    """Keep the resolved language, so a resumed run transcribes its chunks in the same one."""
+    job_dir.mkdir(parents=True, exist_ok=True)
+    _write_atomic(
+        job_dir / "language.json",
+        lambda tmp: tmp.write_text(json.dumps({"language": language})),
+    )
+
+
+class ChunkCheckpoint:
+    """Durable progress of a chunked transcription, kept in a job directory.
+
+    `manifest.json` records what is being transcribed (the audio's hash, the
+    model, the options and the chunk length) and the status of every chunk
+    seen so far. Each finished chunk's segments are saved straight away as
+    `chunk_<index>.npz`, so a run that dies part way through can be resumed
+    and only transcribe the chunks that are missing.
+    """
+
+    def __init__(self, directory: Path, manifest: dict):
+        self.directory = Path(directory)
+        self.manifest = manifest
+
+    @classmethod
+    def open(
+        cls,
+        directory: Path,
+        source_hash: str,
+        model_str: str,
+        chunk_samples: int,
+        options: Optional[dict] = None,
+        resume: bool = True,
+    ) -> "ChunkCheckpoint":
+        """Resume the checkpoint in `directory`, or start a new one.
+
+        An existing checkpoint is only reused when `resume` is set and it was
+        written for the same audio, model, options and chunk length. Otherwise
+        its chunk results are discarded.
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        identity = {
+            "version": MANIFEST_VERSION,
+            "source_hash": source_hash,
+            "model_str": model_str,
+            "options": options or {},
+            "chunk_samples": chunk_samples,
+        }
+
+        try:
+            manifest = json.loads((directory / "manifest.json").read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            manifest = None
+
+        if (
+            resume
+            and manifest is not None
+            and {key: manifest.get(key) for key in identity} == identity
+        ):
+            checkpoint = cls(directory, manifest)
+            logger.info(
+                f"Resuming from {directory}: {len(checkpoint.done)} chunks already done"
+            )
+            return checkpoint
+
+        if manifest is not None:
+            logger.info(f"Discarding previous checkpoint in {directory}")
+        for path in directory.glob("chunk_*.npz"):
+            path.unlink()
+        checkpoint = cls(directory, {**identity, "created": time.time(), "chunks": {}})
+        checkpoint._write_manifest()
+        return checkpoint
+
+    @property
+    def done(self) -> set[int]:
+        return {
+            int(index)
+            for index, entry in self.manifest["chunks"].items()
+            if entry["status"] == "done"
+        }
+
+    def is_done(self, index: int) -> bool:
+        entry = self.manifest["chunks"].get(str(index))
+        return entry is not None and entry["status"] == "done"
+
+    def boundaries(self, index: int) -> tuple[int, int]:
+        """(start, end) samples of a chunk recorded in the manifest."""
+        entry = self.manifest["chunks"][str(index)]
+        return entry["start"], entry["end"]
+
+    def _chunk_path(self, index: int) -> Path:
+        return self.directory / f"chunk_{index:05d}.npz"
+
+    def _write_manifest(self) -> None:
+        self.manifest["updated"] = time.time()
+        _write_atomic(
+            self.directory / "manifest.json",
+            lambda tmp: tmp.write_text(json.dumps(self.manifest, indent=1)),
+        )
+
+    def _record(self, chunk: "Chunk", **entry: Any) -> None:
+        self.manifest["chunks"][str(chunk.index)] = {
+            "start": chunk.start,
+            "end": chunk.end,
+            **entry,
+        }
+        self._write_manifest()
+
+    def save_chunk(self, chunk: "Chunk", segments: SegmentStore) -> None:
+        """Persist a finished chunk's segments, then mark it done in the manifest."""
+        _write_atomic(self._chunk_path(chunk.index), segments.save)
+        self._record(chunk, status="done")
+
+    def mark_failed(self, chunk: "Chunk", error: str) -> None:
+        self._record(chunk, status="failed", error=error)
+
+    def load_chunks(self) -> dict[int, SegmentStore]:
+        """Segments of every finished chunk, by chunk index."""
+        return {i: SegmentStore.load(self._chunk_path(i)) for i in sorted(self.done)}
@@ -1,78 +1,765 @@
 import concurrent.futures
+import contextlib
+import multiprocessing
 import os
+import queue
+import threading
 from pathlib import Path
-from typing import Literal
+from typing import (
+    Any,
+    Callable,
+    Iterable,
+    Iterator,
+    Literal,
+    NamedTuple,
+    Optional,
+    TypeVar,
+    Union,
+)
 
-import whisper
+import numpy as np
 from loguru import logger
-from pydub import AudioSegment
 
+from src.align import align_words
+from src.audio import SAMPLE_RATE, SharedAudio, load_audio, stream_audio
+from src.batched import WINDOW_SAMPLES, transcribe_batched, transcribe_batched_many
+from src.cache import hash_file
+from src.cascade import FAST_MODEL, CascadeThresholds, cascade_transcribe
+from src.checkpoint import ChunkCheckpoint
+from src.model_registry import get_model
+from src.overlap import merge_overlap
+from src.segments import SegmentStore
+from src.vad import speech_spans
 
-def chunk_audio(audio_path: Path, chunk_duration: int = 300) -> list[Path]:
-    """Split audio file into chunks of specified duration (in seconds)."""
-    audio = AudioSegment.from_mp3(str(audio_path))
-    chunks = []
+T = TypeVar("T")
+
+
+class TranscriptionCancelled(Exception):
+    """Raised when a chunked transcription is stopped through its cancel event."""
+
+
+class ChunksFailed(Exception):
+    """Raised after the other chunks are done when some could not be transcribed."""
+
+
+class Chunk(NamedTuple):
+    """A slice of decoded audio, as sample indices into the full waveform."""
 
-    for i in range(0, len(audio), chunk_duration * 1000):
-        chunk = audio[i : i + chunk_duration * 1000]
-        chunk_path = audio_path.parent / f"chunk_{i//1000}.mp3"
-        chunk.export(chunk_path, format="mp3")
-        chunks.append(chunk_path)
+    index: int
+    start: int
+    end: int
 
+    @property
+    def offset(self) -> float:
+        """Start of the chunk in seconds from the beginning of the audio."""
+        return self.start / SAMPLE_RATE
+
+
+def chunk_boundaries(
+    num_samples: int,
+    chunk_duration: float = 300,
+    sr: int = SAMPLE_RATE,
+    overlap: float = 0.0,
+) -> list[Chunk]:
+    """Split `num_samples` of audio into chunks starting every `chunk_duration` seconds.
+
+    Each chunk but the last runs `overlap` seconds into the next one, so
+    words at a boundary are heard whole by at least one of the two chunks.
+    """
+    step = int(chunk_duration * sr)
+    length = step + int(overlap * sr)
+    chunks = []
+    for start in range(0, num_samples, step):
+        chunks.append(Chunk(len(chunks), start, min(start + length, num_samples)))
+        if start + length >= num_samples:
+            break
     return chunks
 
 
+def speech_chunk_boundaries(
+    audio: np.ndarray, chunk_duration: float = 300, sr: int = SAMPLE_RATE
+) -> list[Chunk]:
+    """Chunks of up to `chunk_duration` seconds that cover only the speech in `audio`.
+
+    Cuts fall in pauses and long silences are left out (see `speech_spans`).
+    Chunks keep their sample positions, so timestamps stay on the original timeline.
+    """
+    return [
+        Chunk(index, start, end)
+        for index, (start, end) in enumerate(speech_spans(audio, chunk_duration, sr=sr))
+    ]
+
+
+def chunk_audio(audio: np.ndarray, chunk_duration: float = 300) -> list[np.ndarray]:
+    """Split decoded audio into chunks of specified duration (in seconds).
+
+    The chunks are views into `audio`, no samples are copied.
+    """
+    return [
+        audio[chunk.start : chunk.end]
+        for chunk in chunk_boundaries(len(audio), chunk_duration)
+    ]
+
+
+def threads_per_worker(max_workers: int, cpu_count: Optional[int] = None) -> int:
+    """Split the available CPU cores evenly between worker processes."""
+    cpu_count = cpu_count or os.cpu_count() or 1
+    return max(1, cpu_count // max(1, max_workers))
+
+
 def transcribe_chunk(
-    chunk_path: Path, model_str: Literal["base", "turbo"] = "turbo"
-) -> dict:
-    """Transcribe a single audio chunk."""
-    model = whisper.load_model(model_str)
+    audio: np.ndarray,
+    model_str: Literal["base", "turbo"] = "turbo",
+    word_timestamps: bool = False,
+    language: Optional[str] = None,
+) -> list[dict]:
+    """Transcribe a single chunk of 16 kHz mono float32 audio.
+
+    Word timings cost an extra alignment pass over every segment, so they
+    are only computed with `word_timestamps` (see also `src.align`).
+    Without a `language`, Whisper detects it from the chunk's first window.
+    """
+    model = get_model(model_str)
     try:
         result = model.transcribe(
-            str(chunk_path),
-            word_timestamps=True,
+            audio,
+            word_timestamps=word_timestamps,
+            language=language,
         )
-        # Clean up chunk file
-        os.remove(chunk_path)
         return result["segments"]
     except Exception as e:
         logger.error(f"Chunk transcription failed: {e}")
         raise
 
 
-def transcribe_chunks(
-    audio_path: Path, chunk_duration: int = 300, max_workers: int = 4
-):
-    logger.info("Splitting audio_path into chunks...")
-    chunks = chunk_audio(audio_path=audio_path, chunk_duration=chunk_duration)
-    logger.info(f"Split into {len(chunks)} chunks")
-
-    # Process chunks in parallel
-    logger.info("Starting parallel transcription...")
-    all_segments = []
-    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-        future_to_chunk = {
-            executor.submit(transcribe_chunk, chunk): i
-            for i, chunk in enumerate(chunks)
-        }
-
-        for future in concurrent.futures.as_completed(future_to_chunk):
-            chunk_idx = future_to_chunk[future]
+def stream_chunks(
+    audio_path: Union[Path, str],
+    chunk_duration: float = 300,
+    overlap: float = 0.0,
+    http_headers: Optional[dict[str, str]] = None,
+) -> Iterator[tuple[Chunk, np.ndarray]]:
+    """Decode an audio file (or URL) through an ffmpeg pipe, yielding one chunk at a time.
+
+    With `overlap`, each chunk also starts with the last `overlap` seconds
+    of the one before it.
+    """
+    overlap_samples = int(overlap * SAMPLE_RATE)
+    start = 0
+    tail = np.zeros(0, dtype=np.float32)
+    pieces = stream_audio(audio_path, chunk_duration, http_headers=http_headers)
+    for index, audio in enumerate(pieces):
+        if len(tail):
+            audio = np.concatenate([tail, audio])
+        yield Chunk(index, start - len(tail), start - len(tail) + len(audio)), audio
+        start += len(audio) - len(tail)
+        if overlap_samples:
+            tail = audio[-overlap_samples:]
+
+
+# Shared audio blocks attached by this worker process, keyed by name
+_attached: dict[str, SharedAudio] = {}
+
+
+def prefetch(items: Iterable[T], depth: int = 1) -> Iterator[T]:
+    """Iterate `items` on a background thread, keeping up to `depth` of them ready.
+
+    While the caller works on one chunk, the next is decoded, so a stream
+    keeps being read instead of waiting on inference. At most `depth + 2`
+    items are alive at once: the ready ones, the one being produced and the
+    caller's. Stopping early closes `items` once its current item is done.
+    """
+    ready: queue.Queue = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+    end = object()
+
+    def put(entry: tuple) -> bool:
+        while not stop.is_set():
+            try:
+                ready.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce() -> None:
+        iterator = iter(items)
+        try:
+            for item in iterator:
+                if not put((item, None)):
+                    return
+            put((end, None))
+        except BaseException as e:
+            put((end, e))
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+
+    producer = threading.Thread(target=produce, name="prefetch", daemon=True)
+    producer.start()
+    try:
+        while True:
+            item, error = ready.get()
+            if error is not None:
+                raise error
+            if item is end:
+                return
+            yield item
+    finally:
+        stop.set()
+        producer.join()
+
+
+class SharedSlice(NamedTuple):
+    """Reference to a slice of a `SharedAudio` block, cheap to send to a worker."""
+
+    shm_name: str
+    num_samples: int
+    start: int
+    end: int
+
+    def resolve(self) -> np.ndarray:
+        """Attach to the shared block (once per process) and return a view of the slice."""
+        if self.shm_name not in _attached:
+            _attached[self.shm_name] = SharedAudio.attach(
+                self.shm_name, self.num_samples
+            )
+        return _attached[self.shm_name].array[self.start : self.end]
+
+
+ChunkAudio = Union[np.ndarray, SharedSlice]
+
+
+def _init_worker(model_str: str, num_threads: int) -> None:
+    """Pin torch to its share of the cores and load the model once per worker."""
+    os.environ["OMP_NUM_THREADS"] = str(num_threads)
+    os.environ["MKL_NUM_THREADS"] = str(num_threads)
+
+    import torch
+
+    torch.set_num_threads(num_threads)
+    torch.set_num_interop_threads(1)
+    get_model(model_str)
+
+
+def _transcribe_task(
+    audio: ChunkAudio,
+    model_str: str,
+    batch_size: Optional[int] = None,
+    cascade: Optional[CascadeThresholds] = None,
+    word_timestamps: bool = False,
+    language: Optional[str] = None,
+) -> SegmentStore:
+    """Worker entry point: transcribe an array or a slice of the parent's shared audio.
+
+    With `batch_size`, the chunk's 30 second windows go through the model in
+    batches (see `src.batched`) rather than through `model.transcribe`. With
+    `cascade`, the chunk is transcribed by the fast model first and only its
+    low-confidence segments by `model_str` (see `src.cascade`).
+    `word_timestamps` adds word timings; batched segments get them from a
+    separate alignment pass (see `src.align`). `language` skips Whisper's
+    language detection. The segments are packed into a `SegmentStore`,
+    which is much cheaper to send back to the parent than Whisper's dicts.
+    """
+    if isinstance(audio, SharedSlice):
+        audio = audio.resolve()
+
+    def transcribe(audio: np.ndarray, model_str: str) -> list[dict]:
+        if batch_size:
+            segments = transcribe_batched(audio, model_str, batch_size, language)
+            if word_timestamps:
+                segments = align_words(audio, segments, model_str, language)
+            return segments
+        return transcribe_chunk(audio, model_str, word_timestamps, language)
+
+    if cascade is not None:
+        segments, _ = cascade_transcribe(
+            audio, transcribe, FAST_MODEL, model_str, cascade
+        )
+    else:
+        segments = transcribe(audio, model_str)
+    return SegmentStore.from_segments(segments)
+
+
+def _transcribe_group_task(
+    audios: list[ChunkAudio],
+    model_str: str,
+    batch_size: Optional[int] = None,
+    cascade: Optional[CascadeThresholds] = None,
+    word_timestamps: bool = False,
+    language: Optional[str] = None,
+) -> list[SegmentStore]:
+    """Worker entry point for a group of chunks from `batch_groups`: one `SegmentStore` per chunk.
+
+    With `batch_size`, the windows of every chunk in the group share
+    batches. With `cascade`, or without `batch_size`, each chunk goes
+    through `_transcribe_task` on its own.
+    """
+    if not batch_size or cascade is not None:
+        return [
+            _transcribe_task(
+                audio, model_str, batch_size, cascade, word_timestamps, language
+            )
+            for audio in audios
+        ]
+
+    audios = [
+        audio.resolve() if isinstance(audio, SharedSlice) else audio for audio in audios
+    ]
+    stores = []
+    for audio, segments in zip(
+        audios, transcribe_batched_many(audios, model_str, batch_size, language)
+    ):
+        if word_timestamps:
+            segments = align_words(audio, segments, model_str, language)
+        stores.append(SegmentStore.from_segments(segments))
+    return stores
+
+
+def batch_groups(
+    chunks: Iterable[tuple[Chunk, ChunkAudio]], batch_size: int
+) -> Iterator[list[tuple[Chunk, ChunkAudio]]]:
+    """Group consecutive chunks until they hold at least `batch_size` 30 second windows.
+
+    Transcribed together, a group's windows fill whole batches even when
+    each chunk is shorter than one batch.
+    """
+    group, windows = [], 0
+    for chunk, audio in chunks:
+        group.append((chunk, audio))
+        windows += -(-(chunk.end - chunk.start) // WINDOW_SAMPLES)
+        if windows >= batch_size:
+            yield group
+            group, windows = [], 0
+    if group:
+        yield group
+
+
+def _group_result(
+    chunks: list[Chunk], run: Callable[[], list[SegmentStore]]
+) -> list[tuple[Chunk, Optional[SegmentStore]]]:
+    """Run a group's transcription and shift each chunk's timestamps onto the full timeline."""
+    try:
+        stores = run()
+    except Exception as e:
+        indices = ", ".join(str(chunk.index) for chunk in chunks)
+        logger.error(f"Chunk {indices} failed: {e}")
+        return [(chunk, None) for chunk in chunks]
+
+    return [
+        (chunk, segments.shift(chunk.offset)) for chunk, segments in zip(chunks, stores)
+    ]
+
+
+def make_worker_pool(
+    max_workers: int, model_str: Literal["base", "turbo"] = "turbo"
+) -> concurrent.futures.ProcessPoolExecutor:
+    """Start `max_workers` transcription processes, each with its own warm model."""
+    num_threads = threads_per_worker(max_workers)
+    logger.info(
+        f"Starting {max_workers} transcription workers x {num_threads} threads..."
+    )
+    return concurrent.futures.ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(model_str, num_threads),
+    )
+
+
+def iter_chunk_results(
+    chunks: Iterable[tuple[Chunk, ChunkAudio]],
+    max_workers: int = 4,
+    model_str: Literal["base", "turbo"] = "turbo",
+    executor: Optional[concurrent.futures.Executor] = None,
+    cancel: Optional[threading.Event] = None,
+    batch_size: Optional[int] = None,
+    cascade: Optional[CascadeThresholds] = None,
+    word_timestamps: bool = False,
+    language: Optional[str] = None,
+    in_flight: Optional[threading.Semaphore] = None,
+) -> Iterator[tuple[Chunk, Optional[SegmentStore]]]:
+    """Transcribe chunks, yielding `(chunk, segments)` as each one completes.
+
+    Segments come as a `SegmentStore` with timestamps relative to the full audio. Failed chunks are
+    logged and yielded with `None`. At most `2 * max_workers` tasks are in
+    flight at once, so memory stays bounded when `chunks` is a stream. A task
+    is one chunk or, with `batch_size`, a group of chunks that fills a batch
+    (see `batch_groups`). Calls that share an `executor` from several
+    threads can share an `in_flight` semaphore too: a slot is taken before
+    the next chunk is read and given back when its task finishes, so the
+    threads together never hold more chunks than it has slots.
+
+    Pass an `executor` from `make_worker_pool` to share warm workers between
+    calls; otherwise a pool is started for this call and shut down after it.
+    Setting `cancel` stops the run before the next chunk with `TranscriptionCancelled`.
+    `batch_size` turns on batched inference across chunks, and `cascade`
+    a fast first pass that escalates low-confidence segments to `model_str`.
+    `word_timestamps` aligns each segment's words as it is transcribed, and
+    `language` is passed to every chunk so none has to detect it.
+    """
+    task_args = (model_str, batch_size, cascade, word_timestamps, language)
+
+    def check_cancelled() -> None:
+        if cancel is not None and cancel.is_set():
+            raise TranscriptionCancelled("Transcription cancelled")
+
+    def groups(
+        chunks: Iterable[tuple[Chunk, ChunkAudio]]
+    ) -> Iterator[list[tuple[Chunk, ChunkAudio]]]:
+        if batch_size and cascade is None:
+            return batch_groups(chunks, batch_size)
+        return ([item] for item in chunks)
+
+    if max_workers <= 1 and executor is None:
+        logger.info("Starting sequential transcription...")
+        # Decode (or download) the next chunk while this one is transcribed
+        for group in groups(prefetch(chunks)):
+            check_cancelled()
+            group_chunks, audios = zip(*group)
+            yield from _group_result(
+                list(group_chunks),
+                lambda: _transcribe_group_task(list(audios), *task_args),
+            )
+        return
+
+    owns_executor = executor is None
+    if owns_executor:
+        executor = make_worker_pool(max_workers, model_str)
+    pending: dict[concurrent.futures.Future, list[Chunk]] = {}
+
+    def completed() -> Iterator[tuple[Chunk, Optional[SegmentStore]]]:
+        done, _ = concurrent.futures.wait(
+            pending, return_when=concurrent.futures.FIRST_COMPLETED
+        )
+        for future in done:
+            yield from _group_result(pending.pop(future), future.result)
+
+    try:
+        units = groups(chunks)
+        while True:
+            while len(pending) >= 2 * max_workers:
+                yield from completed()
+                check_cancelled()
+            check_cancelled()
+            if in_flight is not None:
+                in_flight.acquire()
             try:
-                segments = future.result()
-                # Adjust timestamps based on chunk position
-                for segment in segments:
-                    segment["start"] += (
-                        chunk_idx * chunk_duration
-                    )  # Add offset based on chunk position
-                    segment["end"] += chunk_idx * chunk_duration
-                all_segments.extend(segments)
-            except Exception as e:
-                logger.error(f"Chunk {chunk_idx} failed: {e}")
-
-    # Sort segments by start time
-    all_segments.sort(key=lambda x: x["start"])
-    return all_segments
+                group = next(units, None)
+                if group is not None:
+                    group_chunks, audios = zip(*group)
+                    future = executor.submit(
+                        _transcribe_group_task, list(audios), *task_args
+                    )
+            except BaseException:
+                if in_flight is not None:
+                    in_flight.release()
+                raise
+            if group is None:
+                if in_flight is not None:
+                    in_flight.release()
+                break
+            if in_flight is not None:
+                future.add_done_callback(lambda _: in_flight.release())
+            pending[future] = list(group_chunks)
+        while pending:
+            yield from completed()
+            check_cancelled()
+    finally:
+        if owns_executor:
+            executor.shutdown(wait=True, cancel_futures=True)
+        else:
+            for future in pending:
+                future.cancel()
+
+
+class ReorderBuffer:
+    """Hold results that complete out of order until every earlier one is in.
+
+    `add` returns the results that became releasable, in index order, so
+    output can start as soon as chunk 0 is done rather than when the slowest
+    chunk is.
+    """
+
+    def __init__(self, next_index: int = 0):
+        self.next_index = next_index
+        self.pending = {}
+
+    def add(self, index: int, result: Any) -> list:
+        self.pending[index] = result
+        ready = []
+        while self.next_index in self.pending:
+            ready.append(self.pending.pop(self.next_index))
+            self.next_index += 1
+        return ready
+
+
+def merge_chunk_overlaps(
+    chunks: Iterable[tuple[Chunk, Optional[SegmentStore]]]
+) -> Iterator[SegmentStore]:
+    """Join chunk results, in chunk order, keeping one copy of any overlapping speech.
+
+    Each chunk's segments are held back until the next chunk arrives. Where
+    the two chunks overlap, the segments around the overlap are aligned and
+    de-duplicated with `merge_overlap`; everything else passes through
+    untouched. A failed chunk (`None`) has nothing to merge with.
+    """
+    pending = None
+    for chunk, segments in chunks:
+        if pending is not None and segments is not None:
+            previous, held = pending
+            if chunk.start < previous.end:
+                overlap_start = chunk.start / SAMPLE_RATE
+                overlap_end = previous.end / SAMPLE_RATE
+                # Only segments that reach into the overlap take part
+                reaches = held.end > overlap_start
+                head = int(np.argmax(reaches)) if reaches.any() else len(held)
+                tail = int(np.count_nonzero(segments.start < overlap_end))
+                left, right = merge_overlap(
+                    held[head:].to_segments(),
+                    segments[:tail].to_segments(),
+                    overlap_start,
+                    overlap_end,
+                )
+                held = SegmentStore.concat(
+                    [held[:head], SegmentStore.from_segments(left)]
+                )
+                segments = SegmentStore.concat(
+                    [SegmentStore.from_segments(right), segments[tail:]]
+                )
+            yield held
+            pending = None
+        elif pending is not None:
+            yield pending[1]
+            pending = None
+        if segments is not None:
+            pending = (chunk, segments)
+    if pending is not None:
+        yield pending[1]
+
+
+def iter_transcribed_chunks(
+    audio_path: Union[Path, str],
+    chunk_duration: int = 300,
+    max_workers: int = 4,
+    model_str: Literal["base", "turbo"] = "turbo",
+    stream: bool = False,
+    cancel: Optional[threading.Event] = None,
+    batch_size: Optional[int] = None,
+    checkpoint_dir: Optional[Path] = None,
+    resume: bool = True,
+    vad: bool = False,
+    overlap: float = 0.0,
+    http_headers: Optional[dict[str, str]] = None,
+    source_id: Optional[str] = None,
+    cascade: Optional[CascadeThresholds] = None,
+    word_timestamps: Optional[bool] = None,
+    language: Optional[str] = None,
+    skip_failed: bool = True,
+) -> Iterator[SegmentStore]:
+    """Yield each chunk's segments in chunk order, as soon as all earlier chunks are done.
+
+    Takes the same arguments as `transcribe_chunks`. Chunks finish out of
+    order across workers; a `ReorderBuffer` releases them in order, so the
+    first chunk's segments arrive after roughly one chunk's inference time
+    (plus the next chunk's, when chunks overlap). Chunks that failed are
+    skipped, or with `skip_failed=False` reported with `ChunksFailed` once
+    every other chunk has been yielded (and checkpointed, for a later
+    resume to retry). Timestamps are relative to the whole file.
+    """
+    if http_headers is not None and not stream:
+        raise ValueError("Audio can only be read from a URL with stream=True")
+    if vad and stream:
+        raise ValueError(
+            "Voice activity detection needs the decoded audio, not a stream"
+        )
+    if not 0 <= overlap < chunk_duration:
+        raise ValueError("overlap must be at least 0 and shorter than chunk_duration")
+    if word_timestamps is None:
+        # Overlapping chunks are merged on their words
+        word_timestamps = overlap > 0
+
+    failed = []
+
+    def in_order() -> Iterator[tuple[Chunk, Optional[SegmentStore]]]:
+        checkpoint = None
+        reorder = ReorderBuffer()
+        if checkpoint_dir is not None:
+            checkpoint = ChunkCheckpoint.open(
+                checkpoint_dir,
+                source_hash=source_id or hash_file(audio_path),
+                model_str=model_str,
+                chunk_samples=int(chunk_duration * SAMPLE_RATE),
+                options={
+                    "batched": bool(batch_size),
+                    "vad": vad,
+                    "overlap": overlap,
+                    "cascade": None if cascade is None else list(cascade),
+                    "words": word_timestamps,
+                    "language": language,
+                },
+                resume=resume,
+            )
+            for index, segments in checkpoint.load_chunks().items():
+                chunk = Chunk(index, *checkpoint.boundaries(index))
+                yield from reorder.add(index, (chunk, segments.sort()))
+
+        with contextlib.ExitStack() as stack:
+            total = None
+            if stream:
+                logger.info("Streaming audio through the decoder...")
+                chunks = stream_chunks(
+                    audio_path, chunk_duration, overlap, http_headers
+                )
+            elif max_workers <= 1:
+                logger.info("Decoding audio...")
+                audio = load_audio(audio_path)
+                boundaries = (
+                    speech_chunk_boundaries(audio, chunk_duration)
+                    if vad
+                    else chunk_boundaries(len(audio), chunk_duration, overlap=overlap)
+                )
+                total = len(boundaries)
+                chunks = (
+                    (chunk, audio[chunk.start : chunk.end]) for chunk in boundaries
+                )
+            else:
+                logger.info("Decoding audio into shared memory...")
+                shared = stack.enter_context(SharedAudio.from_file(audio_path))
+                boundaries = (
+                    speech_chunk_boundaries(shared.array, chunk_duration)
+                    if vad
+                    else chunk_boundaries(
+                        shared.num_samples, chunk_duration, overlap=overlap
+                    )
+                )
+                total = len(boundaries)
+                chunks = (
+                    (
+                        chunk,
+                        SharedSlice(
+                            shared.name, shared.num_samples, chunk.start, chunk.end
+                        ),
+                    )
+                    for chunk in boundaries
+                )
+            if checkpoint is not None:
+                chunks = (
+                    (chunk, audio)
+                    for chunk, audio in chunks
+                    if not checkpoint.is_done(chunk.index)
+                )
+
+            for chunk, segments in iter_chunk_results(
+                chunks,
+                max_workers,
+                model_str,
+                cancel=cancel,
+                batch_size=batch_size,
+                cascade=cascade,
+                word_timestamps=word_timestamps,
+                language=language,
+            ):
+                logger.debug(f"Chunk {chunk.index} done")
+                if segments is None:
+                    failed.append(chunk.index)
+                if checkpoint is not None:
+                    if segments is not None:
+                        checkpoint.save_chunk(chunk, segments)
+                    else:
+                        checkpoint.mark_failed(chunk, "transcription failed")
+
+                ready = reorder.add(chunk.index, (chunk, segments and segments.sort()))
+                if ready:
+                    logger.info(
+                        f"Transcript ready up to chunk {reorder.next_index}"
+                        + (f" of {total}" if total else "")
+                    )
+                yield from ready
+
+    yield from merge_chunk_overlaps(in_order())
+    if failed and not skip_failed:
+        raise ChunksFailed(f"Chunks {', '.join(map(str, failed))} failed")
+
+
+def transcribe_chunks(
+    audio_path: Union[Path, str],
+    chunk_duration: int = 300,
+    max_workers: int = 4,
+    model_str: Literal["base", "turbo"] = "turbo",
+    stream: bool = False,
+    cancel: Optional[threading.Event] = None,
+    batch_size: Optional[int] = None,
+    checkpoint_dir: Optional[Path] = None,
+    resume: bool = True,
+    vad: bool = False,
+    overlap: float = 0.0,
+    http_headers: Optional[dict[str, str]] = None,
+    source_id: Optional[str] = None,
+    cascade: Optional[CascadeThresholds] = None,
+    word_timestamps: Optional[bool] = None,
+    language: Optional[str] = None,
+) -> list[dict]:
+    """Transcribe an audio file in fixed-length chunks across worker processes.
+
+    By default the file is decoded once to 16 kHz mono float32 and workers
+    read their chunk straight out of shared memory. With `stream=True` the
+    file is decoded through an ffmpeg pipe one chunk at a time instead, so
+    peak memory depends on `chunk_duration` and `max_workers` rather than on
+    the length of the audio.
+
+    Each worker process loads the model once and is limited to
+    `cpu_count // max_workers` torch threads so workers do not oversubscribe
+    the cores. With `max_workers=1` the chunks are transcribed in-process.
+    Use `iter_transcribed_chunks` to consume chunks as they finish.
+
+    Args:
+        audio_path (Path | str): The path to the audio file to transcribe.
+        chunk_duration (int, optional): Length of each chunk in seconds. Defaults to 300.
+        max_workers (int, optional): Number of worker processes. Defaults to 4.
+        model_str (Literal["base", "turbo"], optional): The model to use. Defaults to "turbo".
+        stream (bool, optional): Decode the audio incrementally. Defaults to False.
+        cancel (threading.Event, optional): Set to stop between chunks with `TranscriptionCancelled`.
+        batch_size (int, optional): Run each chunk's 30 second windows through the model in batches of this size.
+        checkpoint_dir (Path, optional): Save each finished chunk here (see `ChunkCheckpoint`).
+        resume (bool, optional): Skip chunks an earlier run already saved in `checkpoint_dir`. Defaults to True.
+        vad (bool, optional): Place chunks around speech and skip silence (see `speech_chunk_boundaries`).
+            Not supported with `stream=True`. Defaults to False.
+        overlap (float, optional): Seconds each fixed-length chunk runs into the next. The repeated
+            speech is de-duplicated when chunks are merged (see `merge_chunk_overlaps`). Defaults to 0.
+        http_headers (dict, optional): With `stream=True`, `audio_path` can be a media URL fetched
+            with these headers. Chunks are then transcribed while the rest is still downloading.
+        source_id (str, optional): Identifies the audio in the checkpoint. Defaults to the file's hash.
+        cascade (CascadeThresholds, optional): Transcribe each chunk with the fast model first and
+            re-transcribe only the segments outside these thresholds with `model_str`.
+        word_timestamps (bool, optional): Align each segment's words while transcribing. Defaults to
+            only when chunks overlap, where the words line up the repeated speech.
+        language (str, optional): The language spoken in the audio (see `src.language.resolve_language`).
+            Defaults to letting Whisper detect it in every chunk, for audio that switches language.
+
+    Returns:
+        list[dict]: The segments of all chunks, with timestamps relative to the whole file.
+    """
+    chunks = iter_transcribed_chunks(
+        audio_path,
+        chunk_duration=chunk_duration,
+        max_workers=max_workers,
+        model_str=model_str,
+        stream=stream,
+        cancel=cancel,
+        batch_size=batch_size,
+        checkpoint_dir=checkpoint_dir,
+        resume=resume,
+        vad=vad,
+        overlap=overlap,
+        http_headers=http_headers,
+        source_id=source_id,
+        cascade=cascade,
+        word_timestamps=word_timestamps,
+        language=language,
+    )
+    # Chunks arrive in order, each sorted by start time
+    return SegmentStore.concat(list(chunks)).to_segments()
 
 
 if __name__ == "__main__":
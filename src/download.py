@@ -1,10 +1,15 @@
+import copy
 import re
+import threading
 from pathlib import Path
-from typing import Union
+from typing import Callable, Literal, Optional, Union
+from urllib.parse import parse_qs, urlparse
 
-import yt_dlp
 from loguru import logger
 
+from src.cache import DiskCache, get_info_cache
+from src.sections import Section
+
 
 def sanitize_title(title: str) -> str:
     """Convert title to snake_case and remove special characters.
@@ -31,58 +36,210 @@ def sanitize_title(title: str) -> str:
     return title
 
 
-def get_video_title(url: str) -> str:
+_VIDEO_ID_RE = re.compile(r"^[\w-]{11}$")
+
+
+def get_video_id(url: str) -> Optional[str]:
+    """Extract the video id from a YouTube URL (watch, shorts, youtu.be) or a bare id."""
+    if _VIDEO_ID_RE.match(url):
+        return url
+
+    parsed = urlparse(url)
+    if "v" in parse_qs(parsed.query):
+        return parse_qs(parsed.query)["v"][0]
+    if parsed.netloc.endswith("youtu.be"):
+        return parsed.path.strip("/") or None
+    for prefix in ("/shorts/", "/live/", "/embed/"):
+        if parsed.path.startswith(prefix):
+            return parsed.path[len(prefix) :].split("/")[0] or None
+    return None
+
+
+def get_video_info(url: str, cache: Optional[DiskCache] = None) -> dict:
+    """Return yt-dlp's info dict for a video, extracting it at most once per video id.
+
+    Args:
+        url: YouTube video URL
+        cache: Where to look up and store info dicts. Defaults to the on-disk info cache.
+
+    Returns:
+        The sanitized (JSON serializable) info dict
+    """
+    cache = cache if cache is not None else get_info_cache()
+    video_id = get_video_id(url)
+    if video_id is not None:
+        info = cache.get(video_id)
+        if info is not None:
+            logger.debug(f"Using cached video info for {video_id}")
+            return info
+
+    import yt_dlp
+
     with yt_dlp.YoutubeDL({"quiet": True, "no_warnings": True}) as ydl:
+        info = ydl.sanitize_info(ydl.extract_info(url, download=False))
+
+    cache.set(info.get("id") or video_id or url, info)
+    return info
+
+
+def get_playlist_urls(url: str) -> list[str]:
+    """List the video URLs of a playlist or channel without resolving each video."""
+    import yt_dlp
+
+    ydl_opts = {"quiet": True, "no_warnings": True, "extract_flat": "in_playlist"}
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
         info = ydl.extract_info(url, download=False)
-        original_title = info.get("title", "untitled")
-        sanitized_title = sanitize_title(original_title)
+
+    entries = info.get("entries") or [info]
+    return [
+        entry.get("url") or f"https://www.youtube.com/watch?v={entry['id']}"
+        for entry in entries
+        if entry
+    ]
+
+
+def get_video_title(url: str, info: Optional[dict] = None) -> str:
+    if info is None:
+        info = get_video_info(url)
+    original_title = info.get("title", "untitled")
+    sanitized_title = sanitize_title(original_title)
 
     return sanitized_title
 
 
-def download_audio(url: str, output_path: Union[str, Path]) -> Path:
+AudioFormat = Literal["native", "wav", "flac", "mp3"]
+AUDIO_FORMATS = ("native", "wav", "flac", "mp3")
+
+
+def audio_postprocessors(audio_format: AudioFormat) -> list[dict]:
+    """yt-dlp postprocessors that produce `audio_format` from the best audio stream.
+
+    "native" keeps the downloaded container (opus/m4a) untouched, "wav" and
+    "flac" write 16 kHz mono, Whisper's input format, and "mp3" writes a
+    192 kbps file for people to listen to.
+    """
+    if audio_format == "native":
+        return []
+    if audio_format == "mp3":
+        return [
+            {
+                "key": "FFmpegExtractAudio",
+                "preferredcodec": "mp3",
+                "preferredquality": "192",
+            }
+        ]
+    return [{"key": "FFmpegExtractAudio", "preferredcodec": audio_format}]
+
+
+def _cancel_hook(cancel: threading.Event) -> Callable[[dict], None]:
+    """yt-dlp progress hook that aborts the download once `cancel` is set."""
+    from yt_dlp.utils import DownloadCancelled
+
+    def hook(status: dict) -> None:
+        if cancel.is_set():
+            raise DownloadCancelled("Download cancelled")
+
+    return hook
+
+
+def get_audio_stream(url: str, info: Optional[dict] = None) -> tuple[str, dict]:
+    """Resolve the audio stream yt-dlp would download, without downloading it.
+
+    Args:
+        url: YouTube video URL
+        info: The video's info dict from `get_video_info`, fetched if not given
+
+    Returns:
+        The media URL of the best audio format, and the HTTP headers to fetch it with
+    """
+    import yt_dlp
+
+    if info is None:
+        info = get_video_info(url)
+    ydl_opts = {"format": "bestaudio/best", "quiet": True, "no_warnings": True}
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        selected = ydl.process_ie_result(copy.deepcopy(info), download=False)
+    if not selected.get("url"):
+        raise RuntimeError(f"No single audio stream to read for: {url}")
+    return selected["url"], selected.get("http_headers") or {}
+
+
+def download_audio(
+    url: str,
+    output_path: Union[str, Path],
+    audio_format: AudioFormat = "mp3",
+    info: Optional[dict] = None,
+    cancel: Optional[threading.Event] = None,
+    section: Optional[Section] = None,
+) -> Path:
     """Download audio from YouTube URL.
 
     Args:
         url: YouTube video URL
         output_path: Path to save the audio file
+        audio_format: One of "native", "wav", "flac" or "mp3" (see `audio_postprocessors`)
+        info: The video's info dict from `get_video_info`, fetched if not given
+        cancel: When set, the download is aborted with `DownloadCancelled`
+        section: Only download this (start, end) range of the video, in seconds
 
     Returns:
         Path to the downloaded audio file
     """
+    import yt_dlp
+    from yt_dlp.utils import DownloadCancelled, download_range_func
+
     logger.info(f"Downloading audio from: {url}")
     logger.debug(f"Output path: {output_path}")
 
     # First, get the info without downloading
-    sanitized_title = get_video_title(url)
+    if info is None:
+        info = get_video_info(url)
+    sanitized_title = get_video_title(url, info=info)
+    if section is not None:
+        # Each section gets its own file
+        sanitized_title += f"_{section[0]:g}s"
 
     # Now download with the sanitized filename
     ydl_opts = {
         "format": "bestaudio/best",
         "outtmpl": f"{output_path}/{sanitized_title}.%(ext)s",  # Use sanitized title here
-        "postprocessors": [
-            {
-                "key": "FFmpegExtractAudio",
-                "preferredcodec": "mp3",
-                "preferredquality": "192",
-            }
-        ],
+        "postprocessors": audio_postprocessors(audio_format),
         "quiet": True,
         "no_warnings": True,
     }
+    if cancel is not None:
+        ydl_opts["progress_hooks"] = [_cancel_hook(cancel)]
+    if section is not None:
+        start, end = section
+        ydl_opts["download_ranges"] = download_range_func(
+            None, [(start, float("inf") if end is None else end)]
+        )
+    if audio_format in ("wav", "flac"):
+        ydl_opts["postprocessor_args"] = {"extractaudio": ["-ar", "16000", "-ac", "1"]}
 
     try:
         with yt_dlp.YoutubeDL(ydl_opts) as ydl:
             logger.debug("Starting download...")
-            ydl.download([url])
+            # Reuse the extracted info rather than resolving the URL again
+            ydl.process_ie_result(copy.deepcopy(info), download=True)
 
             # Get the output file path
-            output_file = Path(output_path) / f"{sanitized_title}.mp3"
+            if audio_format == "native":
+                # The extension depends on the stream YouTube served
+                matches = sorted(Path(output_path).glob(f"{sanitized_title}.*"))
+                output_file = (
+                    matches[0] if matches else Path(output_path) / sanitized_title
+                )
+            else:
+                output_file = Path(output_path) / f"{sanitized_title}.{audio_format}"
             logger.success(f"Audio downloaded successfully: {output_file}")
             assert output_file.exists(), "Audio file not found"
 
             return output_file
 
+    except DownloadCancelled:
+        logger.info("Download cancelled")
+        raise
     except Exception as e:
         logger.exception("Download failed")
         raise RuntimeError(f"Failed to download audio: {str(e)}")
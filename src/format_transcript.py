@@ -1,5 +1,15 @@
+import concurrent.futures
+import io
+import json
+import multiprocessing
+import re
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, TextIO, Union
+
 import click
 
+from src.segments import SegmentStore
+
 
 def format_timestamp(seconds: float) -> str:
     """Convert seconds to HH:MM:SS format."""
@@ -9,7 +19,138 @@ def format_timestamp(seconds: float) -> str:
     return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
 
 
-def format_transcript(segments: dict, timestamps: bool = True) -> str:
+OUTPUT_FORMATS = ("text", "timestamps", "srt", "vtt", "jsonl", "word-srt")
+FORMAT_SUFFIXES = {
+    "text": ".txt",
+    "timestamps": ".txt",
+    "srt": ".srt",
+    "vtt": ".vtt",
+    "jsonl": ".jsonl",
+    "word-srt": ".words.srt",
+}
+# Formats written from word timings, which are only aligned when one is asked for
+WORD_FORMATS = ("word-srt",)
+
+
+def format_subtitle_timestamp(seconds: float, decimal_marker: str = ",") -> str:
+    """Convert seconds to HH:MM:SS,mmm (SRT) or HH:MM:SS.mmm (WebVTT) format."""
+    milliseconds = round(seconds * 1000)
+    hours, milliseconds = divmod(milliseconds, 3_600_000)
+    minutes, milliseconds = divmod(milliseconds, 60_000)
+    seconds, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}{decimal_marker}{milliseconds:03d}"
+
+
+def write_transcript(
+    segments: Iterable[dict], f: TextIO, output_format: str = "timestamps"
+) -> None:
+    """Stream segments to a file handle in one of `OUTPUT_FORMATS`.
+
+    Segments are written one at a time as they are consumed, so `segments`
+    can be a generator and memory use does not grow with the transcript.
+
+    Args:
+        segments: Transcript segments
+            {"start": float, "end": float, "text": str}
+        f: Text file handle to write to
+        output_format: "text" (continuous text), "timestamps" ([HH:MM:SS -> HH:MM:SS] lines),
+            "srt", "vtt", "jsonl" (one {"start", "end", "text"} object per line, plus
+            "words" when the segments have them) or "word-srt" (one SRT cue per word;
+            segments without word timings get one cue)
+    """
+    if output_format == "text":
+        separator = ""
+        for segment in segments:
+            # Clean up any double spaces
+            text = " ".join(segment["text"].split())
+            if text:
+                f.write(separator + text)
+                separator = " "
+        f.write("\n")
+    elif output_format == "timestamps":
+        for segment in segments:
+            start_time = format_timestamp(segment["start"])
+            end_time = format_timestamp(segment["end"])
+            text = segment["text"].strip()
+            f.write(f"[{start_time} -> {end_time}] {text}\n")
+    elif output_format in ("srt", "vtt"):
+        decimal_marker = "," if output_format == "srt" else "."
+        if output_format == "vtt":
+            f.write("WEBVTT\n\n")
+        for index, segment in enumerate(segments, start=1):
+            start_time = format_subtitle_timestamp(segment["start"], decimal_marker)
+            end_time = format_subtitle_timestamp(segment["end"], decimal_marker)
+            if output_format == "srt":
+                f.write(f"{index}\n")
+            f.write(f"{start_time} --> {end_time}\n{segment['text'].strip()}\n\n")
+    elif output_format == "word-srt":
+        index = 0
+        for segment in segments:
+            for word in segment.get("words") or [segment]:
+                text = word.get("word", word.get("text", "")).strip()
+                if not text:
+                    continue
+                index += 1
+                start_time = format_subtitle_timestamp(word["start"])
+                end_time = format_subtitle_timestamp(word["end"])
+                f.write(f"{index}\n{start_time} --> {end_time}\n{text}\n\n")
+    elif output_format == "jsonl":
+        for segment in segments:
+            record = {
+                "start": float(segment["start"]),
+                "end": float(segment["end"]),
+                "text": segment["text"].strip(),
+            }
+            if segment.get("words"):
+                record["words"] = [
+                    {
+                        "word": word["word"],
+                        "start": float(word["start"]),
+                        "end": float(word["end"]),
+                    }
+                    for word in segment["words"]
+                ]
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    else:
+        raise ValueError(
+            f"Unknown output format {output_format!r}, expected one of {OUTPUT_FORMATS}"
+        )
+
+
+def save_transcript(
+    segments: Iterable[dict],
+    output_fpath: Union[str, Path],
+    output_format: str = "timestamps",
+    buffer_size: int = 1 << 16,
+) -> Path:
+    """Stream segments to a file through a write buffer of `buffer_size` bytes."""
+    with open(output_fpath, "w", buffering=buffer_size, encoding="utf-8") as f:
+        write_transcript(segments, f, output_format)
+    return Path(output_fpath)
+
+
+def save_transcript_chunks(
+    chunks: Iterable[Iterable[dict]],
+    output_fpath: Union[str, Path],
+    output_format: str = "timestamps",
+) -> Path:
+    """Stream segments to a file a chunk at a time, flushing after each chunk.
+
+    The file fills in as chunks arrive, so it can be followed (`tail -f`)
+    while the rest of the audio is still being transcribed.
+    """
+    with open(output_fpath, "w", encoding="utf-8") as f:
+
+        def segments() -> Iterator[dict]:
+            for chunk in chunks:
+                yield from chunk
+                f.flush()
+
+        write_transcript(segments(), f, output_format)
+    return Path(output_fpath)
+
+
+def format_transcript(segments: Iterable[dict], timestamps: bool = True) -> str:
     """Format the transcript with optional timestamps.
 
     Args:
@@ -20,30 +161,139 @@ def format_transcript(segments: dict, timestamps: bool = True) -> str:
     Returns:
         Formatted transcript as string
     """
-    if timestamps:
-        # Format with timestamps
-        formatted_transcript = ""
-        for segment in segments:
-            start_time = format_timestamp(segment["start"])
-            end_time = format_timestamp(segment["end"])
-            text = segment["text"].strip()
-            formatted_transcript += f"[{start_time} -> {end_time}] {text}\n"
-    else:
-        # Format as continuous text
-        formatted_transcript = " ".join(segment["text"].strip() for segment in segments)
-        # Clean up any double spaces
-        formatted_transcript = " ".join(formatted_transcript.split())
-        formatted_transcript += "\n"
+    buffer = io.StringIO()
+    write_transcript(segments, buffer, "timestamps" if timestamps else "text")
+    return buffer.getvalue()
+
+
+# [H:]MM:SS with optional .mmm or ,mmm, as used by our own output, SRT and WebVTT
+_TIMESTAMP = r"(?:(\d+):)?(\d{1,2}):(\d{2})(?:[.,](\d{1,3}))?"
+_BRACKET_LINE_RE = re.compile(rf"\[{_TIMESTAMP} -> {_TIMESTAMP}\]\s?(.*)")
+_CUE_TIMING_RE = re.compile(rf"{_TIMESTAMP}\s+-->\s+{_TIMESTAMP}")
+_CUE_TAG_RE = re.compile(r"<[^>]*>")
+INPUT_SUFFIXES = (".txt", ".srt", ".vtt")
+
+
+def _to_seconds(hours: str, minutes: str, seconds: str, fraction: str) -> float:
+    total = int(hours or 0) * 3600 + int(minutes) * 60 + int(seconds)
+    return total + (int(fraction) / 10 ** len(fraction) if fraction else 0.0)
+
+
+def iter_segments(lines: Iterable[str]) -> Iterator[dict]:
+    """Parse transcript lines into segments, one line at a time.
+
+    Understands our own "[HH:MM:SS -> HH:MM:SS] text" lines as well as SRT
+    and WebVTT cues (cue numbers, the WEBVTT header, NOTE blocks and inline
+    tags are skipped). Lines outside any of these are ignored.
+    """
+    cue = None
+    for line in lines:
+        line = line.strip()
+        if cue is not None:
+            if line:
+                cue["text"].append(_CUE_TAG_RE.sub("", line))
+                continue
+            yield {
+                "start": cue["start"],
+                "end": cue["end"],
+                "text": " ".join(cue["text"]),
+            }
+            cue = None
+            continue
+
+        match = _BRACKET_LINE_RE.match(line)
+        if match:
+            groups = match.groups()
+            yield {
+                "start": _to_seconds(*groups[:4]),
+                "end": _to_seconds(*groups[4:8]),
+                "text": groups[8].strip(),
+            }
+            continue
+
+        match = _CUE_TIMING_RE.match(line)
+        if match:
+            groups = match.groups()
+            cue = {
+                "start": _to_seconds(*groups[:4]),
+                "end": _to_seconds(*groups[4:8]),
+                "text": [],
+            }
+
+    if cue is not None:
+        yield {"start": cue["start"], "end": cue["end"], "text": " ".join(cue["text"])}
+
+
+def load_transcript(input_file: Union[str, Path]) -> SegmentStore:
+    """Parse a timestamped, SRT or WebVTT transcript file into a `SegmentStore`."""
+    with open(input_file, encoding="utf-8-sig") as f:
+        return SegmentStore.from_segments(list(iter_segments(f)))
+
+
+def default_output_path(input_file: Union[str, Path], output_format: str) -> Path:
+    return Path(input_file).with_suffix(".formatted" + FORMAT_SUFFIXES[output_format])
+
 
-    return formatted_transcript
+def convert_file(
+    input_file: Union[str, Path],
+    output_file: Union[str, Path],
+    output_format: str = "timestamps",
+) -> Path:
+    """Re-format a transcript file, streaming segments from the input to the output."""
+    with open(input_file, encoding="utf-8-sig") as f:
+        return save_transcript(iter_segments(f), output_file, output_format)
+
+
+def convert_directory(
+    input_dir: Union[str, Path],
+    output_dir: Optional[Union[str, Path]] = None,
+    output_format: str = "timestamps",
+    max_workers: Optional[int] = None,
+) -> tuple[list[Path], list[tuple[Path, str]]]:
+    """Re-format every transcript file in `input_dir` across worker processes.
+
+    Outputs go to `output_dir` (default: next to the inputs) with a
+    ".formatted" suffix; earlier outputs in `input_dir` are not re-read as
+    inputs.
+
+    Returns:
+        The files written, and (input file, error) pairs for files that failed.
+    """
+    inputs = sorted(
+        path
+        for path in Path(input_dir).iterdir()
+        if path.suffix in INPUT_SUFFIXES
+        and path.is_file()
+        and ".formatted" not in path.suffixes
+    )
+    outputs = [default_output_path(path, output_format) for path in inputs]
+    if output_dir is not None:
+        Path(output_dir).mkdir(parents=True, exist_ok=True)
+        outputs = [Path(output_dir) / path.name for path in outputs]
+
+    written, failed = [], []
+    # Spawned, not forked: a fork of a process that has run torch or numba can hang
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        futures = {
+            executor.submit(convert_file, path, output, output_format): path
+            for path, output in zip(inputs, outputs)
+        }
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                written.append(future.result())
+            except Exception as e:
+                failed.append((futures[future], str(e)))
+    return sorted(written), sorted(failed)
 
 
 @click.command()
-@click.argument("input_file", type=click.Path(exists=True))
+@click.argument("input_path", type=click.Path(exists=True))
 @click.option(
     "--output",
     "-o",
-    help="Output file path for the formatted transcript",
+    help="Output file path (or directory, when INPUT_PATH is a directory)",
     default=None,
 )
 @click.option(
@@ -51,47 +301,41 @@ def format_transcript(segments: dict, timestamps: bool = True) -> str:
     help="Include timestamps in the output",
     default=False,
 )
-def cli(input_file, output, with_timestamps):
-    """Format a transcript file with optional timestamps.
+@click.option(
+    "--format",
+    "output_format",
+    help="Output format (default: timestamps, or text with --no-timestamps)",
+    type=click.Choice(OUTPUT_FORMATS),
+    default=None,
+)
+@click.option(
+    "--workers",
+    "-w",
+    help="Number of worker processes in directory mode (default: one per CPU core)",
+    type=click.IntRange(min=1),
+    default=None,
+)
+def cli(input_path, output, with_timestamps, output_format, workers):
+    """Format transcript files.
 
-    INPUT_FILE: Path to the input transcript file (txt format)
+    INPUT_PATH: A transcript file ([HH:MM:SS -> HH:MM:SS] lines, SRT or WebVTT),
+    or a directory of them to convert in parallel
     """
-    from pathlib import Path
-
-    # Read the input file
-    with open(input_file, "r") as f:
-        text = f.read()
-
-    # Parse the text into segments
-    segments = []
-    for line in text.strip().split("\n"):
-        if line.startswith("["):
-            # Extract timestamp and text
-            timestamp_part, text_part = line.split("]", 1)
-            start_str, end_str = timestamp_part[1:].split(" -> ")
-
-            # Convert timestamps to seconds
-            def time_to_seconds(time_str):
-                h, m, s = map(int, time_str.split(":"))
-                return h * 3600 + m * 60 + s
-
-            segments.append(
-                {
-                    "start": time_to_seconds(start_str),
-                    "end": time_to_seconds(end_str),
-                    "text": text_part.strip(),
-                }
-            )
-
-    # Format the transcript
-    formatted_text = format_transcript(segments, timestamps=with_timestamps)
-
-    # Handle output
-    if output is None:
-        output = Path(input_file).with_suffix(".formatted.txt")
+    if output_format is None:
+        output_format = "timestamps" if with_timestamps else "text"
 
-    with open(output, "w") as f:
-        f.write(formatted_text)
+    if Path(input_path).is_dir():
+        written, failed = convert_directory(input_path, output, output_format, workers)
+        for path, error in failed:
+            click.echo(f"Failed: {path} ({error})", err=True)
+        click.echo(f"Formatted {len(written)} transcripts")
+        if failed:
+            raise SystemExit(1)
+        return
+
+    if output is None:
+        output = default_output_path(input_path, output_format)
+    convert_file(input_path, output, output_format)
 
     click.echo(f"Formatted transcript saved to: {output}")
 
@@ -0,0 +1,73 @@
+import asyncio
+import threading
+from typing import Awaitable, Callable, Literal, Optional, TypeVar
+
+from loguru import logger
+
+T = TypeVar("T")
+
+
+def has_captions(info: dict) -> Optional[bool]:
+    """Whether yt-dlp's info dict lists any caption tracks (None if it does not say)."""
+    if "subtitles" not in info and "automatic_captions" not in info:
+        return None
+    return bool(info.get("subtitles") or info.get("automatic_captions"))
+
+
+async def race_with_hedge(
+    primary: Awaitable[Optional[T]],
+    hedge: Callable[[threading.Event], T],
+    delay: float,
+) -> tuple[T, Literal["primary", "hedge"]]:
+    """Run `primary`, and start `hedge` in a thread if it has not succeeded after `delay` seconds.
+
+    The first usable result wins. `primary` is usable when it returns
+    something other than None; `hedge` is usable when it returns at all. The
+    loser is cancelled: the primary task through asyncio, the hedge through
+    the `threading.Event` it is given, which it should check regularly and
+    then clean up after itself. We wait for the hedge to finish cleaning up
+    before returning.
+
+    Raises:
+        The hedge's exception, if the primary produced nothing usable and the hedge failed.
+    """
+    cancel = threading.Event()
+    primary_task = asyncio.ensure_future(primary)
+    hedge_task = None
+
+    def primary_result() -> Optional[T]:
+        if primary_task.cancelled() or primary_task.exception() is not None:
+            if not primary_task.cancelled():
+                logger.warning(f"Primary path failed: {primary_task.exception()}")
+            return None
+        return primary_task.result()
+
+    try:
+        done, _ = await asyncio.wait({primary_task}, timeout=delay)
+        if done and primary_result() is not None:
+            return primary_result(), "primary"
+
+        logger.info("Starting hedged fallback")
+        hedge_task = asyncio.ensure_future(asyncio.to_thread(hedge, cancel))
+        pending = {task for task in (primary_task, hedge_task) if not task.done()}
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            if primary_task in done and primary_result() is not None:
+                return primary_result(), "primary"
+            if hedge_task in done:
+                if hedge_task.exception() is None or primary_task.done():
+                    # Either the hedge won, or both failed and its error is the one to report
+                    return hedge_task.result(), "hedge"
+                logger.warning(f"Hedged fallback failed: {hedge_task.exception()}")
+
+        # Only reachable when the primary finished with nothing and the hedge failed
+        return hedge_task.result(), "hedge"
+    finally:
+        primary_task.cancel()
+        cancel.set()
+        if hedge_task is not None:
+            await asyncio.wait({hedge_task})
+            if hedge_task.exception() is not None:
+                logger.debug(f"Hedged fallback stopped: {hedge_task.exception()!r}")
@@ -0,0 +1,106 @@
+from pathlib import Path
+from typing import Literal, Optional, Union
+
+import numpy as np
+from loguru import logger
+
+from src.audio import SAMPLE_RATE, stream_audio
+from src.model_registry import get_model
+from src.vad import FRAME_SECONDS, frame_energy_db, speech_regions
+
+# Audio decoded from the start of a video to find its first speech in
+SEARCH_SECONDS = 120
+# Whisper detects the language from one 30 second window
+DETECT_SECONDS = 30
+# Asks for the language to be detected in every chunk, for videos that switch language
+MIXED_LANGUAGE = "mixed"
+
+
+def normalize_language(code: Optional[str]) -> Optional[str]:
+    """The base language of a YouTube or yt-dlp language code ("en-GB" -> "en")."""
+    if not code:
+        return None
+    return code.split("-")[0].lower()
+
+
+def language_from_info(info: dict) -> Optional[str]:
+    """The spoken language of a video according to its yt-dlp metadata, if Whisper knows it.
+
+    Uses the video's `language` field, else the automatic caption track
+    YouTube marks as the original ("<code>-orig"): speech recognition
+    captions are always in the spoken language.
+    """
+    from whisper.tokenizer import LANGUAGES
+
+    language = info.get("language")
+    if not language:
+        language = next(
+            (
+                code[: -len("-orig")]
+                for code in info.get("automatic_captions") or {}
+                if code.endswith("-orig")
+            ),
+            None,
+        )
+    language = normalize_language(language)
+    return language if language in LANGUAGES else None
+
+
+def first_speech(
+    audio: np.ndarray, sr: int = SAMPLE_RATE, duration: float = DETECT_SECONDS
+) -> np.ndarray:
+    """Up to `duration` seconds of `audio` from where speech starts (or from the start)."""
+    frame_samples = int(FRAME_SECONDS * sr)
+    regions = speech_regions(frame_energy_db(audio, frame_samples))
+    start = regions[0][0] * frame_samples if regions else 0
+    return audio[start : start + int(duration * sr)]
+
+
+def detect_language(
+    audio: np.ndarray, model_str: Literal["base", "turbo"] = "turbo"
+) -> str:
+    """Whisper's most likely language for up to 30 seconds of 16 kHz mono float32 audio.
+
+    Costs one encoder pass and one decoder step, against one per window
+    when `model.transcribe` is left to detect the language of every chunk.
+    """
+    import torch
+    from whisper.audio import N_FRAMES, log_mel_spectrogram, pad_or_trim
+
+    model = get_model(model_str)
+    if not model.is_multilingual:
+        return "en"
+    mel = log_mel_spectrogram(audio, model.dims.n_mels)
+    mel = pad_or_trim(mel, N_FRAMES).to(model.device, next(model.parameters()).dtype)
+    with torch.no_grad():
+        _, probs = model.detect_language(mel)
+    return max(probs, key=probs.get)
+
+
+def resolve_language(
+    source: Union[str, Path],
+    info: Optional[dict] = None,
+    model_str: Literal["base", "turbo"] = "turbo",
+    http_headers: Optional[dict[str, str]] = None,
+) -> str:
+    """Pick the one language every chunk of a video is transcribed in.
+
+    The caption metadata in `info` is used when it names a language Whisper
+    knows. Otherwise Whisper detects the language once, from the first
+    speech in the first `SEARCH_SECONDS` of `source` (a file, or a URL
+    fetched with `http_headers`), which is decoded on its own so this does
+    not wait for the whole file to be decoded.
+    """
+    language = language_from_info(info) if info else None
+    if language is not None:
+        logger.info(f"Language from the video's captions: {language}")
+        return language
+
+    pieces = stream_audio(source, SEARCH_SECONDS, http_headers=http_headers)
+    try:
+        audio = next(pieces, np.zeros(0, dtype=np.float32))
+    finally:
+        pieces.close()
+    language = detect_language(first_speech(audio), model_str)
+    logger.info(f"Detected language: {language}")
+    return language
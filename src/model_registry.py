@@ -0,0 +1,154 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Iterable, Optional
+
+from loguru import logger
+
+ModelKey = tuple[str, str, str]
+
+
+def resolve_device(device: Optional[str] = None) -> str:
+    """Return the torch device to load models onto ("cuda" if available, else "cpu")."""
+    if device is not None:
+        return device
+
+    import torch
+
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+
+def load_whisper_model(model_str: str, device: str, dtype: str) -> Any:
+    """Load a Whisper checkpoint onto `device`, casting it to `dtype`."""
+    import whisper
+
+    model = whisper.load_model(model_str, device=device)
+    if dtype == "float16":
+        model = model.half()
+    return model
+
+
+def model_nbytes(model: Any) -> int:
+    """Estimate the memory held by a model's parameters and buffers, in bytes."""
+    nbytes = 0
+    for attr in ("parameters", "buffers"):
+        tensors = getattr(model, attr, None)
+        if tensors is None:
+            continue
+        for tensor in tensors():
+            nbytes += tensor.numel() * tensor.element_size()
+    return nbytes
+
+
+def _budget_from_env() -> Optional[int]:
+    budget_mb = os.environ.get("YTT_MODEL_MEMORY_BUDGET_MB")
+    return int(budget_mb) * 1024 * 1024 if budget_mb else None
+
+
+class ModelRegistry:
+    """Cache of loaded models keyed by (model name, device, dtype).
+
+    Every caller asking for the same key gets the same instance. When the
+    summed size of the cached models exceeds `memory_budget` bytes the least
+    recently used models are evicted (the most recently requested model is
+    always kept, even if it alone exceeds the budget).
+
+    Args:
+        memory_budget: Maximum bytes of model weights to keep loaded. None means unbounded.
+        loader: Callable `(model_str, device, dtype) -> model`. Defaults to loading Whisper.
+        sizeof: Callable `(model) -> int` used to measure each model.
+    """
+
+    def __init__(
+        self,
+        memory_budget: Optional[int] = None,
+        loader: Callable[[str, str, str], Any] = load_whisper_model,
+        sizeof: Callable[[Any], int] = model_nbytes,
+    ):
+        self.memory_budget = memory_budget
+        self._loader = loader
+        self._sizeof = sizeof
+        self._models: OrderedDict[ModelKey, tuple[Any, int]] = OrderedDict()
+        self._lock = threading.RLock()
+
+    def get(
+        self,
+        model_str: str,
+        device: Optional[str] = None,
+        dtype: str = "float32",
+    ) -> Any:
+        """Return the model for the key, loading it on first use."""
+        key = (model_str, resolve_device(device), dtype)
+        with self._lock:
+            if key in self._models:
+                self._models.move_to_end(key)
+                return self._models[key][0]
+
+            logger.info(f"Loading Whisper {model_str} model ({key[1]}, {dtype})...")
+            model = self._loader(*key)
+            self._models[key] = (model, self._sizeof(model))
+            self._evict_to_budget()
+            return model
+
+    def warmup(
+        self,
+        model_strs: Iterable[str],
+        device: Optional[str] = None,
+        dtype: str = "float32",
+    ) -> None:
+        """Load models ahead of time so the first transcription does not pay for it."""
+        for model_str in model_strs:
+            self.get(model_str, device=device, dtype=dtype)
+
+    def set_memory_budget(self, memory_budget: Optional[int]) -> None:
+        with self._lock:
+            self.memory_budget = memory_budget
+            self._evict_to_budget()
+
+    def evict(self, key: ModelKey) -> None:
+        with self._lock:
+            self._models.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._models.clear()
+
+    @property
+    def memory_usage(self) -> int:
+        return sum(nbytes for _, nbytes in self._models.values())
+
+    def keys(self) -> list[ModelKey]:
+        return list(self._models)
+
+    def __contains__(self, key: ModelKey) -> bool:
+        return key in self._models
+
+    def __len__(self) -> int:
+        return len(self._models)
+
+    def _evict_to_budget(self) -> None:
+        if self.memory_budget is None:
+            return
+        while len(self._models) > 1 and self.memory_usage > self.memory_budget:
+            key, _ = self._models.popitem(last=False)
+            logger.info(f"Evicted model {key} to stay within memory budget")
+        if self.memory_usage > self.memory_budget:
+            logger.warning(
+                f"Model {next(iter(self._models))} alone exceeds the memory budget "
+                f"({self.memory_usage} > {self.memory_budget} bytes)"
+            )
+
+
+_registry = ModelRegistry(memory_budget=_budget_from_env())
+
+
+def get_registry() -> ModelRegistry:
+    """Return the process-wide model registry."""
+    return _registry
+
+
+def get_model(
+    model_str: str, device: Optional[str] = None, dtype: str = "float32"
+) -> Any:
+    """Return a shared model instance from the process-wide registry."""
+    return _registry.get(model_str, device=device, dtype=dtype)
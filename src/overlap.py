@@ -0,0 +1,127 @@
+import difflib
+import re
+from typing import NamedTuple, Optional
+
+# Matched words or segments further apart than this are not the same speech
+MATCH_TOLERANCE_SECONDS = 1.0
+# Segments whose text is at least this similar can stand in for each other
+SEGMENT_SIMILARITY = 0.6
+
+_NON_WORD_RE = re.compile(r"[^\w']+")
+
+
+def _normalize(text: str) -> str:
+    return _NON_WORD_RE.sub(" ", text.lower()).strip()
+
+
+class _Unit(NamedTuple):
+    """A word (or a whole segment, when there are no word timestamps) in an overlap."""
+
+    segment: int
+    word: Optional[int]
+    key: str
+    start: float
+
+
+def _units(segments: list[dict], use_words: bool) -> list[_Unit]:
+    if not use_words:
+        return [
+            _Unit(i, None, _normalize(s["text"]), s["start"])
+            for i, s in enumerate(segments)
+        ]
+    return [
+        _Unit(i, j, _normalize(w["word"]), w["start"])
+        for i, s in enumerate(segments)
+        for j, w in enumerate(s["words"])
+    ]
+
+
+def _rebuild(segments: list[dict], units: list[_Unit]) -> list[dict]:
+    """The segments, trimmed to the words in `units`."""
+    words = {}
+    for unit in units:
+        words.setdefault(unit.segment, []).append(unit.word)
+
+    rebuilt = []
+    for i, kept in words.items():
+        segment = segments[i]
+        if kept == [None] or len(kept) == len(segment.get("words", ())):
+            rebuilt.append(segment)
+            continue
+        segment_words = [segment["words"][j] for j in kept]
+        trimmed = {
+            key: value
+            for key, value in segment.items()
+            if key not in ("tokens", "seek")
+        }
+        trimmed.update(
+            start=segment_words[0]["start"],
+            end=segment_words[-1]["end"],
+            text="".join(w["word"] for w in segment_words),
+            words=segment_words,
+        )
+        rebuilt.append(trimmed)
+    return rebuilt
+
+
+def _word_anchor(left: list[_Unit], right: list[_Unit]) -> Optional[tuple[int, int]]:
+    """Indices of the middle of the longest run of words both sides heard at the same time."""
+    matcher = difflib.SequenceMatcher(
+        None, [u.key for u in left], [u.key for u in right], autojunk=False
+    )
+    a, b, size = matcher.find_longest_match(0, len(left), 0, len(right))
+    if size < 2:
+        return None
+    i, j = a + size // 2, b + size // 2
+    if abs(left[i].start - right[j].start) > MATCH_TOLERANCE_SECONDS:
+        return None
+    return i, j
+
+
+def _segment_anchor(left: list[_Unit], right: list[_Unit]) -> Optional[tuple[int, int]]:
+    """Indices of the most similar pair of segments that start at about the same time."""
+    best, best_ratio = None, SEGMENT_SIMILARITY
+    for i, a in enumerate(left):
+        for j, b in enumerate(right):
+            if abs(a.start - b.start) > MATCH_TOLERANCE_SECONDS:
+                continue
+            ratio = difflib.SequenceMatcher(None, a.key, b.key).ratio()
+            if ratio >= best_ratio:
+                best, best_ratio = (i, j), ratio
+    return best
+
+
+def merge_overlap(
+    left: list[dict], right: list[dict], overlap_start: float, overlap_end: float
+) -> tuple[list[dict], list[dict]]:
+    """Keep one copy of the speech two neighbouring chunks both transcribed.
+
+    `left` is the end of one chunk and `right` the start of the next, on the
+    same timeline, and both cover `overlap_start`..`overlap_end`. The two
+    transcriptions are aligned on their word timestamps and text: the cut
+    goes in the middle of the longest run of words both heard at the same
+    time, so neither side's edge (where words tend to be clipped or
+    garbled) is used. Without word timestamps the most similar pair of
+    segments is the anchor, and with no match at all the cut is the middle
+    of the overlap.
+
+    Returns:
+        tuple[list[dict], list[dict]]: What to keep of `left` and of `right`.
+            Together they are in order and do not overlap.
+    """
+    use_words = all(s.get("words") for s in left + right)
+    left_units, right_units = _units(left, use_words), _units(right, use_words)
+
+    anchor = (_word_anchor if use_words else _segment_anchor)(left_units, right_units)
+    if anchor is not None:
+        i, j = anchor
+        kept_left, kept_right = left_units[:i], right_units[j:]
+    else:
+        middle = (overlap_start + overlap_end) / 2
+        kept_left = [u for u in left_units if u.start < middle]
+        kept_right = [u for u in right_units if u.start >= middle]
+
+    left, right = _rebuild(left, kept_left), _rebuild(right, kept_right)
+    if left and right and left[-1]["end"] > right[0]["start"]:
+        left[-1] = {**left[-1], "end": max(right[0]["start"], left[-1]["start"])}
+    return left, right
@@ -0,0 +1,91 @@
+import re
+from typing import Iterable, Optional
+
+# (start, end) in seconds of the original video. An end of None runs to the end.
+Section = tuple[float, Optional[float]]
+
+_TIMESTAMP_RE = re.compile(r"^(?:(?:(\d+):)?(\d+):)?(\d+(?:\.\d*)?)$")
+
+
+def parse_timestamp(text: str) -> float:
+    """Seconds from "SS", "MM:SS" or "HH:MM:SS", each optionally with a fraction."""
+    match = _TIMESTAMP_RE.match(text.strip())
+    if match is None:
+        raise ValueError(f"Invalid timestamp {text!r}, expected [[HH:]MM:]SS")
+    hours, minutes, seconds = match.groups()
+    return int(hours or 0) * 3600 + int(minutes or 0) * 60 + float(seconds)
+
+
+def parse_section(text: str) -> Section:
+    """Parse "START-END" (e.g. "40:00-55:00"). Either side may be left empty."""
+    start, sep, end = text.partition("-")
+    if not sep:
+        raise ValueError(f"Invalid section {text!r}, expected START-END")
+    return make_section(
+        parse_timestamp(start) if start.strip() else None,
+        parse_timestamp(end) if end.strip() else None,
+    )
+
+
+def make_section(start: Optional[float], end: Optional[float]) -> Section:
+    start = start or 0.0
+    if end is not None and end <= start:
+        raise ValueError(f"Section ends ({end}s) before it starts ({start}s)")
+    return (start, end)
+
+
+def merge_sections(sections: Iterable[Section]) -> list[Section]:
+    """Sort sections and join the ones that overlap or touch."""
+    merged = []
+    for start, end in sorted(sections, key=lambda s: s[0]):
+        if merged and (merged[-1][1] is None or start <= merged[-1][1]):
+            previous_end = merged[-1][1]
+            merged[-1] = (
+                merged[-1][0],
+                None if previous_end is None or end is None else max(previous_end, end),
+            )
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def in_sections(start: float, end: float, sections: Iterable[Section]) -> bool:
+    """Whether start..end overlaps any of the sections."""
+    return any(
+        end > section_start and (section_end is None or start < section_end)
+        for section_start, section_end in sections
+    )
+
+
+def clip_transcript(transcript: dict, sections: Iterable[Section]) -> dict:
+    """The transcript with only the segments that fall in `sections`."""
+    sections = list(sections)
+    segments = [
+        segment
+        for segment in transcript["segments"]
+        if in_sections(segment["start"], segment["end"], sections)
+    ]
+    return {
+        **transcript,
+        "segments": segments,
+        # Caption segments have no leading space to join on, unlike Whisper's
+        "text": " ".join(segment["text"].strip() for segment in segments),
+    }
+
+
+def shift_segments(segments: list[dict], offset: float) -> list[dict]:
+    """Move segments (and their words) `offset` seconds later on the timeline."""
+    shifted = []
+    for segment in segments:
+        segment = {
+            **segment,
+            "start": segment["start"] + offset,
+            "end": segment["end"] + offset,
+        }
+        if "words" in segment:
+            segment["words"] = [
+                {**word, "start": word["start"] + offset, "end": word["end"] + offset}
+                for word in segment["words"]
+            ]
+        shifted.append(segment)
+    return shifted
@@ -0,0 +1,293 @@
+import copy
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Sequence, Union
+
+import numpy as np
+
+
+def _ragged_index(
+    offsets: np.ndarray, indices: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """Flat positions and new offsets for picking rows `indices` out of a ragged column."""
+    starts = offsets[:-1][indices]
+    lengths = offsets[1:][indices] - starts
+    new_offsets = np.zeros(len(indices) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=new_offsets[1:])
+    flat = np.repeat(starts - new_offsets[:-1], lengths) + np.arange(new_offsets[-1])
+    return flat, new_offsets
+
+
+def _offsets_from_lengths(lengths: Iterable[int], count: int) -> np.ndarray:
+    offsets = np.zeros(count + 1, dtype=np.int64)
+    np.cumsum(np.fromiter(lengths, dtype=np.int64, count=count), out=offsets[1:])
+    return offsets
+
+
+class SegmentStore:
+    """Transcript segments held column-wise instead of as a list of Whisper dicts.
+
+    Start and end times (float64) and a score (float32, Whisper's
+    `avg_logprob` for segments or `probability` for words) are NumPy arrays.
+    All texts live in one UTF-8 buffer indexed by `text_offsets`. Token ids
+    and per-word timings are optional ragged columns: tokens as one int32
+    array with offsets, words as a nested `SegmentStore` with offsets.
+
+    Shifting, sorting, slicing and concatenating work on whole columns, and
+    `save`/`load` write the columns to a single `.npz` file. Stores are
+    treated as immutable: operations return new stores.
+    """
+
+    def __init__(
+        self,
+        start: np.ndarray,
+        end: np.ndarray,
+        text_buffer: np.ndarray,
+        text_offsets: np.ndarray,
+        score: Optional[np.ndarray] = None,
+        tokens: Optional[np.ndarray] = None,
+        token_offsets: Optional[np.ndarray] = None,
+        words: Optional["SegmentStore"] = None,
+        word_offsets: Optional[np.ndarray] = None,
+        text_key: str = "text",
+        score_key: str = "avg_logprob",
+    ):
+        self.start = np.asarray(start, dtype=np.float64)
+        self.end = np.asarray(end, dtype=np.float64)
+        self.text_buffer = np.asarray(text_buffer, dtype=np.uint8)
+        self.text_offsets = np.asarray(text_offsets, dtype=np.int64)
+        self.score = None if score is None else np.asarray(score, dtype=np.float32)
+        self.tokens = None if tokens is None else np.asarray(tokens, dtype=np.int32)
+        self.token_offsets = token_offsets
+        self.words = words
+        self.word_offsets = word_offsets
+        self.text_key = text_key
+        self.score_key = score_key
+
+        if not len(self.start) == len(self.end) == len(self.text_offsets) - 1:
+            raise ValueError("start, end and text_offsets describe different lengths")
+
+    @classmethod
+    def empty(cls) -> "SegmentStore":
+        return cls(np.empty(0), np.empty(0), np.empty(0), np.zeros(1))
+
+    @classmethod
+    def from_segments(
+        cls,
+        segments: Sequence[dict],
+        keep_tokens: bool = False,
+        keep_words: bool = True,
+        text_key: str = "text",
+        score_key: str = "avg_logprob",
+    ) -> "SegmentStore":
+        """Pack Whisper-style segment dicts into columns.
+
+        The score, tokens and words columns are kept only when every segment
+        has them. Tokens are dropped unless `keep_tokens` is set, since
+        nothing downstream of transcription reads them.
+        """
+        n = len(segments)
+        encoded = [segment[text_key].encode() for segment in segments]
+        store = cls(
+            start=np.fromiter((s["start"] for s in segments), np.float64, count=n),
+            end=np.fromiter((s["end"] for s in segments), np.float64, count=n),
+            text_buffer=np.frombuffer(b"".join(encoded), dtype=np.uint8),
+            text_offsets=_offsets_from_lengths(map(len, encoded), n),
+            text_key=text_key,
+            score_key=score_key,
+        )
+
+        if n and all(score_key in s for s in segments):
+            store.score = np.fromiter(
+                (s[score_key] for s in segments), np.float32, count=n
+            )
+        if keep_tokens and n and all("tokens" in s for s in segments):
+            store.tokens = np.fromiter(
+                (t for s in segments for t in s["tokens"]), np.int32
+            )
+            store.token_offsets = _offsets_from_lengths(
+                (len(s["tokens"]) for s in segments), n
+            )
+        if keep_words and n and all("words" in s for s in segments):
+            store.words = cls.from_segments(
+                [word for s in segments for word in s["words"]],
+                text_key="word",
+                score_key="probability",
+            )
+            store.word_offsets = _offsets_from_lengths(
+                (len(s["words"]) for s in segments), n
+            )
+        return store
+
+    def __len__(self) -> int:
+        return len(self.start)
+
+    def text(self, i: int) -> str:
+        return (
+            self.text_buffer[self.text_offsets[i] : self.text_offsets[i + 1]]
+            .tobytes()
+            .decode()
+        )
+
+    def texts(self) -> list[str]:
+        return [self.text(i) for i in range(len(self))]
+
+    def full_text(self) -> str:
+        """All segment texts joined, like the "text" field of a Whisper result."""
+        return self.text_buffer.tobytes().decode()
+
+    def segment(self, i: int) -> dict:
+        """Unpack one row back into a Whisper-style dict."""
+        segment = {
+            "start": float(self.start[i]),
+            "end": float(self.end[i]),
+            self.text_key: self.text(i),
+        }
+        if self.score is not None:
+            segment[self.score_key] = float(self.score[i])
+        if self.tokens is not None:
+            segment["tokens"] = self.tokens[
+                self.token_offsets[i] : self.token_offsets[i + 1]
+            ].tolist()
+        if self.words is not None:
+            segment["words"] = self.words[
+                self.word_offsets[i] : self.word_offsets[i + 1]
+            ].to_segments()
+        return segment
+
+    def __iter__(self) -> Iterator[dict]:
+        return (self.segment(i) for i in range(len(self)))
+
+    def to_segments(self) -> list[dict]:
+        return list(self)
+
+    def __getitem__(
+        self, key: Union[int, slice, np.ndarray, Sequence[int]]
+    ) -> Union[dict, "SegmentStore"]:
+        if isinstance(key, (int, np.integer)):
+            return self.segment(range(len(self))[key])
+        if isinstance(key, slice):
+            return self.take(np.arange(len(self))[key])
+        key = np.asarray(key)
+        return self.take(np.flatnonzero(key) if key.dtype == bool else key)
+
+    def take(self, indices: np.ndarray) -> "SegmentStore":
+        """New store with the rows at `indices`, in that order."""
+        indices = np.asarray(indices, dtype=np.int64)
+        text_index, text_offsets = _ragged_index(self.text_offsets, indices)
+        store = SegmentStore(
+            self.start[indices],
+            self.end[indices],
+            self.text_buffer[text_index],
+            text_offsets,
+            score=None if self.score is None else self.score[indices],
+            text_key=self.text_key,
+            score_key=self.score_key,
+        )
+        if self.tokens is not None:
+            token_index, store.token_offsets = _ragged_index(
+                self.token_offsets, indices
+            )
+            store.tokens = self.tokens[token_index]
+        if self.words is not None:
+            word_index, store.word_offsets = _ragged_index(self.word_offsets, indices)
+            store.words = self.words.take(word_index)
+        return store
+
+    def shift(self, offset: float) -> "SegmentStore":
+        """New store with every start and end time (including words) moved by `offset` seconds."""
+        store = copy.copy(self)
+        store.start = self.start + offset
+        store.end = self.end + offset
+        if self.words is not None:
+            store.words = self.words.shift(offset)
+        return store
+
+    def sort(self) -> "SegmentStore":
+        """New store ordered by start time (stable, so ties keep their order)."""
+        return self.take(np.argsort(self.start, kind="stable"))
+
+    @classmethod
+    def concat(cls, stores: Iterable["SegmentStore"]) -> "SegmentStore":
+        """Join stores end to end. Optional columns survive only if every store has them."""
+        stores = [store for store in stores if len(store)]
+        if not stores:
+            return cls.empty()
+        if len(stores) == 1:
+            return stores[0]
+
+        def join_offsets(offsets: list[np.ndarray]) -> np.ndarray:
+            shifts = np.cumsum([0] + [o[-1] for o in offsets[:-1]])
+            return np.concatenate(
+                [offsets[0][:1]] + [o[1:] + s for o, s in zip(offsets, shifts)]
+            )
+
+        first = stores[0]
+        store = cls(
+            np.concatenate([s.start for s in stores]),
+            np.concatenate([s.end for s in stores]),
+            np.concatenate([s.text_buffer for s in stores]),
+            join_offsets([s.text_offsets for s in stores]),
+            text_key=first.text_key,
+            score_key=first.score_key,
+        )
+        if all(s.score is not None for s in stores):
+            store.score = np.concatenate([s.score for s in stores])
+        if all(s.tokens is not None for s in stores):
+            store.tokens = np.concatenate([s.tokens for s in stores])
+            store.token_offsets = join_offsets([s.token_offsets for s in stores])
+        if all(s.words is not None for s in stores):
+            store.words = cls.concat(s.words for s in stores)
+            store.word_offsets = join_offsets([s.word_offsets for s in stores])
+        return store
+
+    def _arrays(self, prefix: str = "") -> dict[str, np.ndarray]:
+        arrays = {
+            "start": self.start,
+            "end": self.end,
+            "text_buffer": self.text_buffer,
+            "text_offsets": self.text_offsets,
+            "text_key": np.array(self.text_key),
+            "score_key": np.array(self.score_key),
+        }
+        if self.score is not None:
+            arrays["score"] = self.score
+        if self.tokens is not None:
+            arrays["tokens"] = self.tokens
+            arrays["token_offsets"] = self.token_offsets
+        arrays = {prefix + name: array for name, array in arrays.items()}
+        if self.words is not None:
+            arrays[prefix + "word_offsets"] = self.word_offsets
+            arrays.update(self.words._arrays(prefix + "words."))
+        return arrays
+
+    @classmethod
+    def _from_arrays(cls, arrays, prefix: str = "") -> "SegmentStore":
+        def get(name: str) -> Optional[np.ndarray]:
+            return arrays[prefix + name] if prefix + name in arrays else None
+
+        store = cls(
+            get("start"),
+            get("end"),
+            get("text_buffer"),
+            get("text_offsets"),
+            score=get("score"),
+            tokens=get("tokens"),
+            token_offsets=get("token_offsets"),
+            text_key=str(get("text_key")),
+            score_key=str(get("score_key")),
+        )
+        if get("word_offsets") is not None:
+            store.word_offsets = get("word_offsets")
+            store.words = cls._from_arrays(arrays, prefix + "words.")
+        return store
+
+    def save(self, path: Union[str, Path]) -> Path:
+        """Write the columns to an uncompressed `.npz` file."""
+        with open(path, "wb") as f:
+            np.savez(f, **self._arrays())
+        return Path(path)
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "SegmentStore":
+        with np.load(path, allow_pickle=False) as arrays:
+            return cls._from_arrays({name: arrays[name] for name in arrays.files})
@@ -0,0 +1,456 @@
+import contextlib
+import dataclasses
+import heapq
+import itertools
+import json
+import math
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Optional
+
+from loguru import logger
+
+from src.cache import TranscriptStore
+from src.captions import fetch_captions
+from src.chunk_audio import iter_chunk_results, make_worker_pool, stream_chunks
+from src.download import download_audio, get_video_id, get_video_info, get_video_title
+from src.format_transcript import (
+    FORMAT_SUFFIXES,
+    OUTPUT_FORMATS,
+    WORD_FORMATS,
+    save_transcript,
+)
+from src.language import language_from_info
+from src.model_registry import get_registry
+from src.segments import SegmentStore
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_SERVER = f"http://{DEFAULT_HOST}:{DEFAULT_PORT}"
+
+# Per-job options a client may set when submitting
+JOB_OPTIONS = ("output_format", "model_str", "audio_format")
+
+
+class JobCancelled(Exception):
+    """Raised by a job runner that noticed its job was cancelled."""
+
+
+@dataclass
+class Job:
+    """A transcription request queued on the server, and its progress.
+
+    Jobs with a higher `priority` run first; equal priorities run in
+    submission order.
+    """
+
+    url: str
+    priority: int = 0
+    options: dict = field(default_factory=dict)
+    id: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
+    status: str = "queued"  # "queued", "running", "done", "failed" or "cancelled"
+    stage: Optional[str] = None
+    progress: float = 0.0
+    source: Optional[str] = None  # "store", "captions" or "whisper"
+    output: Optional[str] = None
+    error: Optional[str] = None
+    created: float = field(default_factory=time.time)
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    cancel: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    def report(self, stage: str, progress: float) -> None:
+        """Record the stage the job is in and how far along it is (0 to 1)."""
+        if self.cancel.is_set():
+            raise JobCancelled(f"Job {self.id} cancelled")
+        self.stage = stage
+        self.progress = round(progress, 3)
+
+    def to_dict(self) -> dict:
+        return {
+            f.name: getattr(self, f.name)
+            for f in dataclasses.fields(self)
+            if f.name != "cancel"
+        }
+
+
+class TranscriptionService:
+    """Priority queue of transcription jobs, run by `concurrency` worker threads.
+
+    `runner` does the work for one job: it reports progress through
+    `job.report`, should stop when `job.cancel` is set, and returns the path
+    of the transcript it wrote.
+    """
+
+    def __init__(self, runner: Callable[[Job], Path], concurrency: int = 1):
+        self.runner = runner
+        self.concurrency = concurrency
+        self._jobs: dict[str, Job] = {}
+        self._queue: list[tuple[int, int, Job]] = []
+        self._order = itertools.count()
+        self._condition = threading.Condition()
+        self._stopping = False
+        self._threads: list[threading.Thread] = []
+
+    def start(self) -> "TranscriptionService":
+        self._threads = [
+            threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+            for i in range(self.concurrency)
+        ]
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self, cancel_running: bool = True) -> None:
+        """Stop taking jobs and wait for the worker threads to finish."""
+        with self._condition:
+            self._stopping = True
+            if cancel_running:
+                for job in self._jobs.values():
+                    job.cancel.set()
+            self._condition.notify_all()
+        for thread in self._threads:
+            thread.join()
+
+    def submit(
+        self, url: str, priority: int = 0, options: Optional[dict] = None
+    ) -> Job:
+        options = options or {}
+        unknown = set(options) - set(JOB_OPTIONS)
+        if unknown:
+            raise ValueError(f"Unknown job options: {sorted(unknown)}")
+        if options.get("output_format", "timestamps") not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output format: {options['output_format']}")
+        if options.get("model_str", "turbo") not in ("base", "turbo"):
+            raise ValueError(f"Unknown model: {options['model_str']}")
+
+        job = Job(url=url, priority=priority, options=options)
+        with self._condition:
+            if self._stopping:
+                raise RuntimeError("Server is shutting down")
+            self._jobs[job.id] = job
+            heapq.heappush(self._queue, (-priority, next(self._order), job))
+            self._condition.notify()
+        logger.info(f"[{job.id}] Queued {url} (priority {priority})")
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def jobs(self) -> list[Job]:
+        return list(self._jobs.values())
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """Cancel a job: queued jobs never start, running jobs stop at their next check."""
+        with self._condition:
+            job = self._jobs.get(job_id)
+            if job is None or job.status in ("done", "failed", "cancelled"):
+                return job
+            job.cancel.set()
+            if job.status == "queued":
+                job.status = "cancelled"
+                job.finished = time.time()
+        return job
+
+    def _next_job(self) -> Optional[Job]:
+        with self._condition:
+            while True:
+                while self._queue and self._queue[0][2].status != "queued":
+                    heapq.heappop(self._queue)  # cancelled while waiting
+                if self._stopping:
+                    return None
+                if self._queue:
+                    job = heapq.heappop(self._queue)[2]
+                    job.status = "running"
+                    job.started = time.time()
+                    return job
+                self._condition.wait()
+
+    def _work(self) -> None:
+        while (job := self._next_job()) is not None:
+            try:
+                job.output = str(self.runner(job))
+                job.status = "done"
+                job.progress = 1.0
+                logger.success(f"[{job.id}] Done: {job.output}")
+            except Exception as e:
+                # Cancelled jobs stop with whichever error the stage they were in raises
+                if job.cancel.is_set():
+                    job.status = "cancelled"
+                    logger.info(f"[{job.id}] Cancelled")
+                else:
+                    job.status = "failed"
+                    job.error = str(e)
+                    logger.error(f"[{job.id}] Failed: {e}")
+            finally:
+                job.finished = time.time()
+
+
+def make_job_runner(
+    output_dir: Path,
+    model_str: str = "turbo",
+    audio_format: str = "native",
+    chunk_duration: int = 300,
+    transcribe_workers: int = 1,
+    store: Optional[TranscriptStore] = None,
+    warmup: bool = True,
+) -> tuple[Callable[[Job], Path], Callable[[], None]]:
+    """Build the runner that transcribes a job the way `ytt` does, with warm models.
+
+    Captions are used when the video has them. Otherwise the audio is
+    downloaded and transcribed chunk by chunk, reporting progress per chunk.
+    With one transcribe worker the model lives in the server process and
+    inference is serialized between jobs; with more, jobs share a pool of
+    worker processes that each keep their model loaded.
+
+    Returns:
+        The runner, and a function that releases its worker pool.
+    """
+    executor = (
+        make_worker_pool(transcribe_workers, model_str)
+        if transcribe_workers > 1
+        else None
+    )
+    if executor is None and warmup:
+        get_registry().warmup([model_str])
+    inference_lock = threading.Lock()
+
+    def transcribe(
+        job: Job, info: dict, job_model: str, word_timestamps: bool = False
+    ) -> dict:
+        job.report("download", 0.1)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            audio_path = download_audio(
+                job.url,
+                output_path=temp_dir,
+                audio_format=job.options.get("audio_format", audio_format),
+                info=info,
+                cancel=job.cancel,
+            )
+            job.report("transcribe", 0.2)
+            # The duration is only used to estimate progress
+            expected = max(1, math.ceil((info.get("duration") or 0) / chunk_duration))
+            # Without one from the metadata, each chunk detects its own language
+            language = language_from_info(info)
+            results = []
+            with inference_lock if executor is None else contextlib.nullcontext():
+                chunks = stream_chunks(audio_path, chunk_duration)
+                for chunk, segments in iter_chunk_results(
+                    chunks,
+                    transcribe_workers,
+                    job_model,
+                    executor=executor,
+                    cancel=job.cancel,
+                    word_timestamps=word_timestamps,
+                    language=language,
+                ):
+                    if segments is None:
+                        raise RuntimeError(f"chunk {chunk.index} failed")
+                    results.append(segments)
+                    job.report(
+                        "transcribe", 0.2 + 0.75 * min(1, len(results) / expected)
+                    )
+
+        segments = SegmentStore.concat(results).sort()
+        return {
+            "segments": segments.to_segments(),
+            "text": segments.full_text(),
+            "language": language,
+        }
+
+    def run(job: Job) -> Path:
+        job_model = job.options.get("model_str", model_str)
+        output_format = job.options.get("output_format", "timestamps")
+        whisper_options = {"chunk_duration": chunk_duration}
+        word_timestamps = output_format in WORD_FORMATS
+        if word_timestamps:
+            whisper_options["words"] = True
+
+        job.report("info", 0.0)
+        info = get_video_info(job.url)
+        video_id = info.get("id") or get_video_id(job.url)
+
+        transcript = None
+        if store is not None and video_id is not None:
+            transcript = store.get(video_id, "captions") or store.get(
+                video_id, "whisper", job_model, whisper_options
+            )
+            job.source = "store" if transcript is not None else None
+
+        if transcript is None and video_id is not None:
+            job.report("captions", 0.05)
+            result = fetch_captions(video_id)
+            if result.status == "ok":
+                transcript = result.transcript
+                job.source = "captions"
+                if store is not None:
+                    store.put(transcript, video_id, "captions")
+
+        if transcript is None:
+            transcript = transcribe(job, info, job_model, word_timestamps)
+            job.source = "whisper"
+            if store is not None and video_id is not None:
+                store.put(transcript, video_id, "whisper", job_model, whisper_options)
+
+        job.report("write", 0.98)
+        title = get_video_title(job.url, info=info)
+        return save_transcript(
+            transcript["segments"],
+            Path(output_dir) / f"{title}{FORMAT_SUFFIXES[output_format]}",
+            output_format,
+        )
+
+    def close() -> None:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    return run, close
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """JSON API over a `TranscriptionService`.
+
+    POST /jobs                 {"url", "priority", "options"} -> the queued job
+    GET /jobs                  all jobs
+    GET /jobs/<id>             one job's status and progress
+    DELETE /jobs/<id>          cancel a job
+    GET /health
+    """
+
+    server: "TranscriptionServer"
+
+    def _send(self, status: int, payload) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _job_id(self) -> Optional[str]:
+        parts = self.path.strip("/").split("/")
+        return parts[1] if len(parts) == 2 and parts[0] == "jobs" else None
+
+    def do_GET(self) -> None:
+        service = self.server.service
+        if self.path == "/health":
+            self._send(200, {"status": "ok", "jobs": len(service.jobs())})
+        elif self.path.rstrip("/") == "/jobs":
+            self._send(200, [job.to_dict() for job in service.jobs()])
+        elif (job_id := self._job_id()) and (job := service.get(job_id)):
+            self._send(200, job.to_dict())
+        else:
+            self._send(404, {"error": f"Not found: {self.path}"})
+
+    def do_POST(self) -> None:
+        if self.path.rstrip("/") != "/jobs":
+            self._send(404, {"error": f"Not found: {self.path}"})
+            return
+        try:
+            request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            job = self.server.service.submit(
+                request["url"],
+                priority=int(request.get("priority", 0)),
+                options=request.get("options"),
+            )
+        except (KeyError, TypeError, ValueError) as e:
+            self._send(400, {"error": f"Bad job request: {e}"})
+            return
+        except RuntimeError as e:
+            self._send(503, {"error": str(e)})
+            return
+        self._send(201, job.to_dict())
+
+    def do_DELETE(self) -> None:
+        job_id = self._job_id()
+        job = self.server.service.cancel(job_id) if job_id else None
+        if job is None:
+            self._send(404, {"error": f"Not found: {self.path}"})
+        else:
+            self._send(200, job.to_dict())
+
+    def log_message(self, format: str, *args) -> None:
+        logger.debug(f"{self.address_string()} {format % args}")
+
+
+class TranscriptionServer(ThreadingHTTPServer):
+    """HTTP server exposing a `TranscriptionService` on localhost."""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        service: TranscriptionService,
+        host: str = DEFAULT_HOST,
+        port: int = DEFAULT_PORT,
+    ):
+        super().__init__((host, port), _Handler)
+        self.service = service
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def _request(method: str, url: str, payload: Optional[dict] = None):
+    data = json.dumps(payload).encode() if payload is not None else None
+    request = urllib.request.Request(
+        url, data=data, method=method, headers={"Content-Type": "application/json"}
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return json.load(response)
+    except urllib.error.HTTPError as e:
+        raise RuntimeError(json.load(e).get("error", str(e))) from e
+    except urllib.error.URLError as e:
+        raise RuntimeError(f"Could not reach ytt server at {url}: {e.reason}") from e
+
+
+def submit_job(
+    url: str,
+    server: str = DEFAULT_SERVER,
+    priority: int = 0,
+    options: Optional[dict] = None,
+) -> dict:
+    """Queue a video on a running `ytt serve`, returning the job."""
+    return _request(
+        "POST",
+        f"{server}/jobs",
+        {"url": url, "priority": priority, "options": options or {}},
+    )
+
+
+def get_job(job_id: str, server: str = DEFAULT_SERVER) -> dict:
+    return _request("GET", f"{server}/jobs/{job_id}")
+
+
+def list_jobs(server: str = DEFAULT_SERVER) -> list[dict]:
+    return _request("GET", f"{server}/jobs")
+
+
+def cancel_job(job_id: str, server: str = DEFAULT_SERVER) -> dict:
+    return _request("DELETE", f"{server}/jobs/{job_id}")
+
+
+def wait_for_job(
+    job_id: str,
+    server: str = DEFAULT_SERVER,
+    poll_interval: float = 1.0,
+    on_update: Optional[Callable[[dict], None]] = None,
+) -> dict:
+    """Poll a job until it finishes, calling `on_update` with each status seen."""
+    while True:
+        job = get_job(job_id, server)
+        if on_update is not None:
+            on_update(job)
+        if job["status"] in ("done", "failed", "cancelled"):
+            return job
+        time.sleep(poll_interval)
@@ -0,0 +1,27 @@
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from loguru import logger
+
+
+class StageTimer:
+    """Accumulate wall-clock time spent in each named stage of a run."""
+
+    def __init__(self):
+        self.timings: dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.timings[name] = self.timings.get(name, 0.0) + elapsed
+            logger.debug(f"Stage {name} took {elapsed:.2f}s")
+
+    def summary(self) -> str:
+        return ", ".join(
+            f"{name}={elapsed:.2f}s" for name, elapsed in self.timings.items()
+        )
@@ -1,14 +1,20 @@
 from pathlib import Path
-from typing import Any, Literal
+from typing import Any, Literal, Optional
 
-import whisper
+import numpy as np
 from loguru import logger
 
+from src.audio import load_audio
+from src.cascade import FAST_MODEL, CascadeThresholds, cascade_transcribe
+from src.language import detect_language, first_speech
+from src.model_registry import get_model
+
 
 def transcribe_audio(
     audio_file: Path,
     model_str: Literal["base", "turbo"] = "turbo",
     kwargs: dict[str, Any] = {},
+    cascade: Optional[CascadeThresholds] = None,
 ) -> list[dict]:
     """Transcribe an audio file using the Whisper model.
 
@@ -16,22 +22,41 @@ def transcribe_audio(
         audio_file (Path): The path to the audio file to transcribe.
         model_str (Literal["base", "turbo"], optional): The model to use for transcription. Defaults to "turbo".
         kwargs (dict[str, Any], optional): Additional keyword arguments to pass to the Whisper model .transcribe() method.
+            Pass `word_timestamps=True` for word timings, which cost an extra alignment pass (see also `src.align`),
+            and `language` to skip language detection (Whisper otherwise detects it once, from the first 30 seconds).
+        cascade (CascadeThresholds, optional): Transcribe with the fast model first and re-transcribe only
+            the segments outside these thresholds with `model_str` (see `src.cascade`).
 
     Returns:
         list[dict]: The transcription result. Three keys: "segments", "text", and "language".
     """
-    default_kwargs = {"language": "en", "verbose": False, "word_timestamps": True}
+    default_kwargs = {"language": None, "verbose": False}
     kwargs = {**default_kwargs, **kwargs}
 
-    logger.info(f"Loading Whisper {model_str} model...")
-    model = whisper.load_model(model_str)
-
     logger.info(f"Starting transcription of: {audio_file}")
     try:
-        result = model.transcribe(
-            audio_file.as_posix(),
-            **kwargs,
-        )
+        if cascade is not None:
+            audio = load_audio(audio_file)
+            if kwargs["language"] is None:
+                # Detect once, rather than in every escalated span
+                kwargs["language"] = detect_language(first_speech(audio), model_str)
+
+            def transcribe(audio: np.ndarray, model_str: str) -> list[dict]:
+                return get_model(model_str).transcribe(audio, **kwargs)["segments"]
+
+            segments, _ = cascade_transcribe(
+                audio, transcribe, FAST_MODEL, model_str, cascade
+            )
+            result = {
+                "segments": segments,
+                "text": "".join(segment["text"] for segment in segments),
+                "language": kwargs.get("language"),
+            }
+        else:
+            result = get_model(model_str).transcribe(
+                audio_file.as_posix(),
+                **kwargs,
+            )
         logger.success("Transcription completed successfully")
         return result
 
@@ -0,0 +1,141 @@
+import numpy as np
+from loguru import logger
+
+from src.audio import SAMPLE_RATE
+
+FRAME_SECONDS = 0.03
+# Frames quieter than this, relative to the loud end of the recording, are silence
+RELATIVE_THRESHOLD_DB = -35.0
+# Anything below this is silence however quiet the recording is
+FLOOR_THRESHOLD_DB = -60.0
+
+
+def frame_energy_db(
+    audio: np.ndarray, frame_samples: int, block_frames: int = 1 << 16
+) -> np.ndarray:
+    """Mean power of each whole frame of `audio`, in dBFS.
+
+    Works through the audio a block of frames at a time so the temporary
+    arrays stay small however long the recording is.
+    """
+    num_frames = len(audio) // frame_samples
+    frames = audio[: num_frames * frame_samples].reshape(num_frames, frame_samples)
+    power = np.empty(num_frames, dtype=np.float64)
+    for start in range(0, num_frames, block_frames):
+        block = frames[start : start + block_frames].astype(np.float64)
+        power[start : start + block_frames] = np.einsum("ij,ij->i", block, block)
+    power /= frame_samples
+    return 10 * np.log10(np.maximum(power, 1e-12))
+
+
+def _runs(mask: np.ndarray) -> np.ndarray:
+    """(start, end) frame indices of every run of True in `mask`."""
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], mask.view(np.int8), [0]))))
+    return edges.reshape(-1, 2)
+
+
+def speech_regions(
+    energy_db: np.ndarray,
+    frame_seconds: float = FRAME_SECONDS,
+    min_silence: float = 0.3,
+    min_speech: float = 0.1,
+    pad: float = 0.2,
+) -> list[tuple[int, int]]:
+    """Find the stretches of frames that contain speech.
+
+    A frame is speech when it is within `RELATIVE_THRESHOLD_DB` of the loud
+    end (95th percentile) of the recording and above `FLOOR_THRESHOLD_DB`.
+    Pauses shorter than `min_silence` seconds do not split a region, bursts
+    shorter than `min_speech` (clicks, breaths) are dropped, and each region
+    is padded by `pad` seconds so word onsets and tails are kept.
+
+    Returns:
+        list[tuple[int, int]]: (start, end) frame indices, sorted and non-overlapping.
+    """
+    if len(energy_db) == 0:
+        return []
+    threshold = max(
+        np.percentile(energy_db, 95) + RELATIVE_THRESHOLD_DB, FLOOR_THRESHOLD_DB
+    )
+    min_silence_frames = int(round(min_silence / frame_seconds))
+    min_speech_frames = int(round(min_speech / frame_seconds))
+    pad_frames = int(round(pad / frame_seconds))
+
+    regions = []
+    for start, end in _runs(energy_db > threshold):
+        if regions and start - regions[-1][1] < min_silence_frames:
+            regions[-1][1] = end
+        else:
+            regions.append([start, end])
+
+    padded = []
+    for start, end in regions:
+        if end - start < min_speech_frames:
+            continue
+        start = max(start - pad_frames, 0)
+        end = min(end + pad_frames, len(energy_db))
+        if padded and start <= padded[-1][1]:
+            padded[-1] = (padded[-1][0], end)
+        else:
+            padded.append((start, end))
+    return padded
+
+
+def speech_spans(
+    audio: np.ndarray,
+    chunk_duration: float = 300,
+    max_gap: float = 2.0,
+    sr: int = SAMPLE_RATE,
+) -> list[tuple[int, int]]:
+    """Plan chunks of at most `chunk_duration` seconds that cover only speech.
+
+    Speech regions are packed into a chunk until the next one would make it
+    too long, or is more than `max_gap` seconds of silence away, so every cut
+    falls in a pause rather than mid-word and long silent or music-only
+    stretches are never transcribed. A region with no pause long enough is
+    cut at its quietest frame shortly before the target length.
+
+    Returns:
+        list[tuple[int, int]]: (start, end) sample indices into `audio`.
+    """
+    frame_samples = int(FRAME_SECONDS * sr)
+    energy_db = frame_energy_db(audio, frame_samples)
+    chunk_frames = max(int(chunk_duration / FRAME_SECONDS), 1)
+    gap_frames = int(max_gap / FRAME_SECONDS)
+    search_frames = max(chunk_frames // 10, 1)
+
+    spans = []
+    current = None
+    for start, end in speech_regions(energy_db):
+        if (
+            current is not None
+            and start - current[1] <= gap_frames
+            and end - current[0] <= chunk_frames
+        ):
+            current = (current[0], end)
+            continue
+        if current is not None:
+            spans.append(current)
+        current = (start, end)
+        while current[1] - current[0] > chunk_frames:
+            target = current[0] + chunk_frames
+            quiet = target - search_frames
+            cut = quiet + int(np.argmin(energy_db[quiet:target]))
+            spans.append((current[0], cut))
+            current = (cut, current[1])
+    if current is not None:
+        spans.append(current)
+
+    # The last frame absorbs the samples after the final whole frame
+    samples = [
+        (
+            int(start) * frame_samples,
+            len(audio) if end == len(energy_db) else int(end) * frame_samples,
+        )
+        for start, end in spans
+    ]
+    speech = sum(end - start for start, end in samples) / sr
+    logger.info(
+        f"Voice activity: {speech:.0f}s of {len(audio) / sr:.0f}s in {len(samples)} chunks"
+    )
+    return samples
@@ -0,0 +1,9 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache_dir(tmp_path, monkeypatch):
+    """Keep the on-disk caches of every test inside its own tmp_path."""
+    cache_dir = tmp_path / "ytt_cache"
+    monkeypatch.setenv("YTT_CACHE_DIR", str(cache_dir))
+    return cache_dir
@@ -0,0 +1,97 @@
+import time
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from src.align import _windows, align_words
+from src.audio import SAMPLE_RATE
+from src.chunk_audio import transcribe_chunk
+
+whisper = pytest.importorskip("whisper")
+
+
+@pytest.fixture(scope="module")
+def tiny_model():
+    """A randomly initialised Whisper small enough to run in tests."""
+    import torch
+    from whisper.model import ModelDimensions, Whisper
+
+    torch.manual_seed(0)
+    dims = ModelDimensions(
+        n_mels=80,
+        n_audio_ctx=1500,
+        n_audio_state=16,
+        n_audio_head=2,
+        n_audio_layer=1,
+        n_vocab=51865,
+        n_text_ctx=448,
+        n_text_state=16,
+        n_text_head=2,
+        n_text_layer=1,
+    )
+    return Whisper(dims).eval()
+
+
+def noise(seconds: float) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    return (rng.standard_normal(int(seconds * SAMPLE_RATE)) * 0.1).astype(np.float32)
+
+
+def test_windows_fit_in_thirty_seconds():
+    segments = [
+        {"start": float(start), "end": start + 9.0, "text": " hi"}
+        for start in range(0, 60, 10)
+    ]
+
+    assert [[s["start"] for s in window] for window in _windows(segments)] == [
+        [0.0, 10.0, 20.0],
+        [30.0, 40.0, 50.0],
+    ]
+
+
+def test_align_words(tiny_model):
+    segments = [
+        {"start": 1.0, "end": 4.0, "text": "The quick brown fox"},
+        {"start": 4.0, "end": 7.5, "text": "jumps over the lazy dog."},
+        {"start": 40.0, "end": 42.0, "text": "Later on.", "avg_logprob": -0.3},
+    ]
+
+    with patch("src.align.get_model", return_value=tiny_model):
+        aligned = align_words(noise(45), segments, "base", language="en")
+
+    assert [s["text"] for s in aligned] == [s["text"] for s in segments]
+    assert aligned[2]["avg_logprob"] == -0.3
+    assert "words" not in segments[0]
+    words = [w["word"] for s in aligned for w in s["words"]]
+    assert (
+        "".join(words).split()
+        == "The quick brown fox jumps over the lazy dog. Later on.".split()
+    )
+    for segment in aligned:
+        starts = [w["start"] for w in segment["words"]]
+        assert starts == sorted(starts)
+    # Each window's words are placed on the full timeline
+    assert (
+        0.5 <= aligned[0]["words"][0]["start"]
+        and aligned[1]["words"][-1]["end"] <= 31.0
+    )
+    assert 39.5 <= aligned[2]["words"][0]["start"]
+
+
+@pytest.mark.slow
+def test_word_timestamps_benchmark():
+    """Compare the default path, without word timings, with word alignment on."""
+    audio = noise(60)
+    transcribe_chunk(audio[: 5 * SAMPLE_RATE], "base")  # load the model
+
+    start = time.perf_counter()
+    transcribe_chunk(audio, "base")
+    without_words = time.perf_counter() - start
+
+    start = time.perf_counter()
+    transcribe_chunk(audio, "base", word_timestamps=True)
+    with_words = time.perf_counter() - start
+
+    print(f"without words: {without_words:.2f}s, with words: {with_words:.2f}s")
+    assert without_words < with_words
@@ -0,0 +1,106 @@
+import io
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from src.audio import (
+    SharedAudio,
+    ffmpeg_decode_cmd,
+    pcm16_to_float32,
+    stream_pcm,
+    stream_pipe,
+)
+
+
+def test_pcm16_to_float32():
+    pcm = np.array([0, 16384, -32768, 32767], dtype=np.int16).tobytes()
+
+    audio = pcm16_to_float32(pcm)
+
+    assert audio.dtype == np.float32
+    np.testing.assert_allclose(audio, [0.0, 0.5, -1.0, 32767 / 32768])
+
+
+def test_ffmpeg_decode_cmd_outputs_16k_mono_pcm():
+    cmd = ffmpeg_decode_cmd("audio.opus")
+
+    assert cmd[0] == "ffmpeg"
+    assert cmd[cmd.index("-i") + 1] == "audio.opus"
+    assert cmd[cmd.index("-ar") + 1] == "16000"
+    assert cmd[cmd.index("-ac") + 1] == "1"
+
+
+def test_ffmpeg_decode_cmd_reads_urls_with_headers():
+    cmd = ffmpeg_decode_cmd("https://media/audio", http_headers={"User-Agent": "ytt"})
+
+    assert cmd[cmd.index("-headers") + 1] == "User-Agent: ytt\r\n"
+    assert cmd.index("-reconnect") < cmd.index("-i")
+    assert cmd[cmd.index("-i") + 1] == "https://media/audio"
+
+
+def test_shared_audio_attach_sees_same_samples():
+    pcm = np.array([0, 16384, -16384], dtype=np.int16).tobytes()
+
+    with SharedAudio.from_pcm16(pcm) as shared:
+        attached = SharedAudio.attach(shared.name, shared.num_samples)
+        np.testing.assert_array_equal(attached.array, [0.0, 0.5, -0.5])
+
+        shared.array[0] = 0.25
+        assert attached.array[0] == 0.25
+        attached.close()
+
+
+def test_stream_pcm_yields_fixed_windows():
+    pcm = np.arange(10, dtype=np.int16).tobytes() + b"\x01"  # trailing half sample
+
+    windows = list(stream_pcm(io.BufferedReader(io.BytesIO(pcm)), window_samples=4))
+
+    assert [len(w) for w in windows] == [4, 4, 2]
+    np.testing.assert_allclose(np.concatenate(windows) * 32768, np.arange(10))
+
+
+def test_stream_pipe_raises_on_decoder_failure():
+    with pytest.raises(RuntimeError, match="Failed to decode audio"):
+        list(stream_pipe(["sh", "-c", "echo bad input >&2; exit 1"], 4))
+
+
+# Six hours of 16 kHz 16-bit mono PCM, and the peak RSS the decoder may use for it
+STREAM_SECONDS = 6 * 3600
+STREAM_RSS_CAP_MB = 200
+
+# Peak RSS is read from VmHWM rather than ru_maxrss, which Linux carries over
+# from the parent across fork and exec (and pytest may have loaded torch)
+STREAM_RSS_SCRIPT = """
+from src.audio import stream_pipe
+
+cmd = ["head", "-c", str({nbytes}), "/dev/zero"]
+n_samples = sum(len(window) for window in stream_pipe(cmd, {window_samples}))
+assert n_samples == {nbytes} // 2, n_samples
+with open("/proc/self/status") as f:
+    print(next(line.split()[1] for line in f if line.startswith("VmHWM:")))
+"""
+
+
+@pytest.mark.skipif(
+    shutil.which("head") is None or not Path("/proc/self/status").exists(),
+    reason="needs coreutils head and /proc",
+)
+def test_stream_pipe_peak_rss_is_bounded():
+    nbytes = STREAM_SECONDS * 16000 * 2
+    script = STREAM_RSS_SCRIPT.format(nbytes=nbytes, window_samples=300 * 16000)
+
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=Path(__file__).parent.parent,
+    )
+
+    peak_rss_mb = int(result.stdout) / 1024  # VmHWM is in KiB
+    assert peak_rss_mb < STREAM_RSS_CAP_MB
+    assert peak_rss_mb < nbytes / 1024 / 1024 / 2
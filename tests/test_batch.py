@@ -0,0 +1,137 @@
+import io
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+
+from src.audio import SAMPLE_RATE
+from src.batch import read_urls, run_batch
+from src.cache import DiskCache, TranscriptStore
+from src.captions import CaptionResult
+
+CAPTIONS = {
+    "segments": [{"start": 0.0, "end": 1.0, "text": "from captions"}],
+    "text": "from captions",
+    "language": "en",
+}
+
+
+def test_read_urls_from_file(tmp_path):
+    url_file = tmp_path / "urls.txt"
+    url_file.write_text(
+        "https://www.youtube.com/watch?v=aaaaaaaaaaa\n"
+        "\n"
+        "# a comment\n"
+        "  https://www.youtube.com/watch?v=bbbbbbbbbbb  \n"
+    )
+
+    assert read_urls(str(url_file)) == [
+        "https://www.youtube.com/watch?v=aaaaaaaaaaa",
+        "https://www.youtube.com/watch?v=bbbbbbbbbbb",
+    ]
+
+
+def test_read_urls_from_stdin():
+    with patch("sys.stdin", io.StringIO("aaaaaaaaaaa\nbbbbbbbbbbb\n")):
+        assert read_urls("-") == ["aaaaaaaaaaa", "bbbbbbbbbbb"]
+
+
+def test_read_urls_expands_playlist():
+    with patch("src.batch.get_playlist_urls", return_value=["a", "b"]) as mock_list:
+        assert read_urls("https://www.youtube.com/playlist?list=PL123") == ["a", "b"]
+    mock_list.assert_called_once()
+
+
+def fake_info(url):
+    video_id = url.split("v=")[1]
+    return {"id": video_id, "title": f"Video {video_id}"}
+
+
+async def fake_fetch_captions(video_id, limiter):
+    if video_id == "captions000":
+        return CaptionResult(video_id, "ok", transcript=CAPTIONS, attempts=1)
+    return CaptionResult(video_id, "unavailable", error="TranscriptsDisabled")
+
+
+def fake_download(url, output_path, audio_format, info):
+    if info["id"] == "broken00000":
+        raise RuntimeError("HTTP Error 403")
+    audio_path = Path(output_path) / f"{info['id']}.webm"
+    audio_path.touch()
+    return audio_path
+
+
+def test_run_batch_mixes_captions_whisper_and_failures(tmp_path):
+    urls = [
+        "https://www.youtube.com/watch?v=captions000",
+        "https://www.youtube.com/watch?v=whisper0000",
+        "https://www.youtube.com/watch?v=broken00000",
+    ]
+    store = TranscriptStore(DiskCache(tmp_path / "store"))
+
+    with patch("src.batch.get_video_info", side_effect=fake_info), patch(
+        "src.batch.fetch_captions_async", side_effect=fake_fetch_captions
+    ), patch("src.batch.download_audio", side_effect=fake_download), patch(
+        "src.chunk_audio.stream_audio",
+        side_effect=lambda path, chunk_duration, **kwargs: iter(
+            [np.zeros(10 * SAMPLE_RATE, dtype=np.float32)] * 2
+        ),
+    ), patch(
+        "src.chunk_audio.transcribe_chunk",
+        side_effect=lambda audio, model_str, word_timestamps=False, language=None: [
+            {"start": 0.0, "end": 2.0, "text": " from whisper"}
+        ],
+    ):
+        items = run_batch(
+            urls,
+            output_dir=tmp_path,
+            chunk_duration=10,
+            transcribe_workers=1,
+            store=store,
+        )
+
+    assert [item.source for item in items] == ["captions", "whisper", None]
+    assert items[2].error == "download: HTTP Error 403"
+    assert (
+        (tmp_path / "video_captions000.txt")
+        .read_text()
+        .startswith("[00:00:00 -> 00:00:01] from captions")
+    )
+    assert (tmp_path / "video_whisper0000.txt").read_text() == (
+        "[00:00:00 -> 00:00:02] from whisper\n[00:00:10 -> 00:00:12] from whisper\n"
+    )
+    assert store.get("whisper0000", "whisper", "turbo", {"chunk_duration": 10})
+
+
+def test_run_batch_uses_stored_transcripts(tmp_path):
+    store = TranscriptStore(DiskCache(tmp_path / "store"))
+    store.put(CAPTIONS, "stored00000", "captions")
+
+    with patch("src.batch.get_video_info", side_effect=fake_info), patch(
+        "src.batch.fetch_captions_async"
+    ) as mock_extract, patch("src.batch.download_audio") as mock_download:
+        (item,) = run_batch(
+            ["https://www.youtube.com/watch?v=stored00000"],
+            output_dir=tmp_path,
+            transcribe_workers=1,
+            store=store,
+        )
+
+    assert item.source == "store"
+    mock_extract.assert_not_called()
+    mock_download.assert_not_called()
+
+
+def test_run_batch_survives_a_temp_dir_that_cannot_be_created(tmp_path):
+    urls = [f"https://www.youtube.com/watch?v=whisper000{i}" for i in range(3)]
+
+    with patch("src.batch.get_video_info", side_effect=fake_info), patch(
+        "src.batch.fetch_captions_async", side_effect=fake_fetch_captions
+    ), patch("src.batch.tempfile") as mock_tempfile:
+        mock_tempfile.TemporaryDirectory.side_effect = OSError("No space left")
+        items = run_batch(
+            urls, output_dir=tmp_path, download_workers=1, transcribe_workers=1
+        )
+
+    # The one download thread carried on to every video
+    assert [item.error for item in items] == ["download: No space left"] * 3
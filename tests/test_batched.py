@@ -0,0 +1,213 @@
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from src.audio import SAMPLE_RATE
+from src.batched import (
+    BatchedTranscriber,
+    batch_windows,
+    iter_windows,
+    log_mel_batch,
+    segments_from_tokens,
+    transcribe_batched_many,
+)
+from src.chunk_audio import (
+    Chunk,
+    _transcribe_task,
+    batch_groups,
+    transcribe_chunk,
+    transcribe_chunks,
+)
+
+whisper = pytest.importorskip("whisper")
+
+
+@pytest.fixture(scope="module")
+def tiny_model():
+    """A randomly initialised Whisper small enough to run in tests."""
+    import torch
+    from whisper.model import ModelDimensions, Whisper
+
+    torch.manual_seed(0)
+    dims = ModelDimensions(
+        n_mels=80,
+        n_audio_ctx=1500,
+        n_audio_state=16,
+        n_audio_head=2,
+        n_audio_layer=1,
+        n_vocab=51865,
+        n_text_ctx=448,
+        n_text_state=16,
+        n_text_head=2,
+        n_text_layer=1,
+    )
+    return Whisper(dims).eval()
+
+
+def noise(seconds: float) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    return (rng.standard_normal(int(seconds * SAMPLE_RATE)) * 0.1).astype(np.float32)
+
+
+def test_iter_and_batch_windows():
+    windows = list(iter_windows(noise(75), key="a", offset=600.0))
+
+    assert [w.offset for w in windows] == [600.0, 630.0, 660.0]
+    assert [len(w.audio) for w in windows] == [30 * SAMPLE_RATE] * 2 + [
+        15 * SAMPLE_RATE
+    ]
+    mixed = windows + list(iter_windows(noise(30), key="b"))
+    assert [[w.key for w in batch] for batch in batch_windows(mixed, 3)] == [
+        ["a", "a", "a"],
+        ["b"],
+    ]
+
+
+def test_log_mel_batch_matches_whisper():
+    audio = noise(60).reshape(2, -1)
+
+    mel = log_mel_batch(audio)
+
+    for row, samples in zip(mel, audio):
+        expected = whisper.log_mel_spectrogram(samples)
+        np.testing.assert_allclose(row.numpy(), expected.numpy(), atol=1e-5)
+
+
+def test_segments_from_tokens():
+    from whisper.tokenizer import get_tokenizer
+
+    tokenizer = get_tokenizer(multilingual=True)
+    ts = tokenizer.timestamp_begin
+    hello, world = tokenizer.encode(" hello"), tokenizer.encode(" world")
+    tokens = [ts, *hello, ts + 50, ts + 50, *world, tokenizer.eot]
+
+    segments = segments_from_tokens(tokens, tokenizer, offset=30.0, duration=12.0)
+
+    assert [(s["start"], s["end"], s["text"]) for s in segments] == [
+        (30.0, 31.0, " hello"),
+        (31.0, 42.0, " world"),
+    ]
+
+
+def test_transcriber_encodes_whole_batches(tiny_model):
+    batch_sizes = []
+    encoder_forward = tiny_model.encoder.forward
+
+    def spy(mel):
+        batch_sizes.append(mel.shape[0])
+        return encoder_forward(mel)
+
+    windows = list(iter_windows(noise(75), key="chunk-0"))
+    transcriber = BatchedTranscriber(tiny_model, batch_size=2, temperatures=(0.0,))
+    with patch.object(tiny_model.encoder, "forward", side_effect=spy):
+        results = list(transcriber.transcribe(windows))
+
+    assert batch_sizes == [2, 1]
+    assert [window.offset for window, _ in results] == [0.0, 30.0, 60.0]
+    for window, segments in results:
+        for segment in segments:
+            assert window.offset <= segment["start"] <= segment["end"]
+            assert segment["end"] <= window.offset + len(window.audio) / SAMPLE_RATE
+
+
+def test_transcribe_batched_many_fills_batches_across_pieces(tiny_model):
+    batches = []
+
+    def fake_transcribe_batch(self, windows):
+        batches.append([(w.key, w.offset) for w in windows])
+        return [[{"start": w.offset, "end": w.offset + 1.0}] for w in windows]
+
+    with patch("src.batched.get_model", return_value=tiny_model), patch.object(
+        BatchedTranscriber, "transcribe_batch", fake_transcribe_batch
+    ):
+        results = transcribe_batched_many([noise(40), noise(40)], "base", 4)
+
+    assert batches == [[(0, 0.0), (0, 30.0), (1, 0.0), (1, 30.0)]]
+    # Each piece's segments are timed from its own start
+    assert [[s["start"] for s in segments] for segments in results] == [
+        [0.0, 30.0],
+        [0.0, 30.0],
+    ]
+
+
+def test_batch_groups_fill_the_batch_size():
+    minute = 60 * SAMPLE_RATE
+    chunks = [(Chunk(i, i * minute, (i + 1) * minute), None) for i in range(9)]
+
+    groups = list(batch_groups(chunks, batch_size=8))
+
+    assert [[chunk.index for chunk, _ in group] for group in groups] == [
+        [0, 1, 2, 3],
+        [4, 5, 6, 7],
+        [8],
+    ]
+
+
+def test_transcribe_chunks_batches_across_chunks():
+    calls = []
+
+    def fake_batched_many(audios, model_str, batch_size, language):
+        calls.append(len(audios))
+        return [[{"start": 0.0, "end": 1.0, "text": " hi"}] for _ in audios]
+
+    with patch("src.chunk_audio.load_audio", return_value=noise(240)), patch(
+        "src.chunk_audio.transcribe_batched_many", side_effect=fake_batched_many
+    ):
+        segments = transcribe_chunks(
+            Path("audio.mp3"), chunk_duration=60, max_workers=1, batch_size=8
+        )
+
+    assert calls == [4]
+    assert [s["start"] for s in segments] == [0.0, 60.0, 120.0, 180.0]
+
+
+def test_transcribe_task_batched():
+    audio = noise(1)
+    with patch(
+        "src.chunk_audio.transcribe_batched",
+        return_value=[{"start": 0.0, "end": 1.0, "text": " hi"}],
+    ) as batched, patch("src.chunk_audio.transcribe_chunk") as per_chunk:
+        store = _transcribe_task(audio, "base", batch_size=4)
+
+    batched.assert_called_once_with(audio, "base", 4, None)
+    per_chunk.assert_not_called()
+    assert store.texts() == [" hi"]
+
+
+def test_transcribe_task_batched_aligns_words():
+    audio = noise(1)
+    segments = [{"start": 0.0, "end": 1.0, "text": " hi"}]
+    words = [{"word": " hi", "start": 0.2, "end": 0.6}]
+    with patch("src.chunk_audio.transcribe_batched", return_value=segments), patch(
+        "src.chunk_audio.align_words",
+        return_value=[{**segments[0], "words": words}],
+    ) as align:
+        store = _transcribe_task(audio, "base", batch_size=4, word_timestamps=True)
+
+    align.assert_called_once_with(audio, segments, "base", None)
+    assert store.to_segments()[0]["words"] == words
+
+
+@pytest.mark.slow
+def test_batched_throughput_benchmark():
+    """Compare the batched path with model.transcribe on two minutes of audio."""
+    from src.model_registry import get_model
+
+    audio = noise(120)
+    model = get_model("base")
+
+    start = time.perf_counter()
+    transcribe_chunk(audio, "base")
+    sequential = time.perf_counter() - start
+
+    start = time.perf_counter()
+    list(BatchedTranscriber(model, batch_size=4).transcribe(iter_windows(audio)))
+    batched = time.perf_counter() - start
+
+    print(
+        f"per-chunk: {120 / sequential:.1f}x realtime, batched: {120 / batched:.1f}x realtime"
+    )
+    assert batched < sequential
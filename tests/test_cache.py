@@ -0,0 +1,88 @@
+import hashlib
+import os
+import time
+from unittest.mock import patch
+
+import numpy as np
+
+from src.cache import DiskCache, TranscriptStore, get_cache_dir, hash_file
+
+
+def test_get_cache_dir_respects_env(isolated_cache_dir):
+    assert get_cache_dir() == isolated_cache_dir
+
+
+def test_disk_cache_roundtrip(tmp_path):
+    cache = DiskCache(tmp_path)
+
+    assert cache.get("abc") is None
+    cache.set("abc", {"title": "Test", "duration": 12.5})
+
+    assert cache.get("abc") == {"title": "Test", "duration": 12.5}
+    assert "abc" in cache
+    cache.delete("abc")
+    assert "abc" not in cache
+
+
+def test_disk_cache_ttl_expires_entries(tmp_path):
+    cache = DiskCache(tmp_path, ttl=60)
+    cache.set("abc", 1)
+    assert cache.get("abc") == 1
+
+    with patch("src.cache.time.time", return_value=time.time() + 120):
+        assert cache.get("abc") is None
+    assert not cache._path("abc").exists()
+
+
+def test_disk_cache_evicts_least_recently_used(tmp_path):
+    cache = DiskCache(tmp_path)
+    for key in ("a", "b", "c"):
+        cache.set(key, "x" * 100)
+    entry_size = cache._path("a").stat().st_size
+
+    # Make "a" the oldest write but the most recent read
+    now = time.time()
+    for age, key in ((30, "a"), (20, "b"), (10, "c")):
+        os.utime(cache._path(key), (now - age, now - age))
+    cache.get("a")
+
+    cache.max_bytes = 2 * entry_size + entry_size // 2
+    cache.set("d", "x" * 100)
+
+    assert "b" not in cache
+    assert "c" not in cache
+    assert "a" in cache
+    assert "d" in cache
+
+
+def test_disk_cache_drops_corrupt_entries(tmp_path):
+    cache = DiskCache(tmp_path)
+    cache.set("abc", 1)
+    cache._path("abc").write_text("{not json")
+
+    assert cache.get("abc") is None
+    assert not cache._path("abc").exists()
+
+
+def test_transcript_store_keys_on_model_and_options(tmp_path):
+    store = TranscriptStore(DiskCache(tmp_path))
+    transcript = {
+        "text": " hi",
+        "segments": [{"start": np.float64(0.0), "end": np.float32(1.5), "text": " hi"}],
+        "language": "en",
+    }
+
+    store.put(transcript, "abc", "whisper", "turbo", {"chunk_duration": 300})
+
+    stored = store.get("abc", "whisper", "turbo", {"chunk_duration": 300})
+    assert stored["segments"][0]["end"] == 1.5
+    assert store.get("abc", "whisper", "base", {"chunk_duration": 300}) is None
+    assert store.get("abc", "whisper", "turbo", {"chunk_duration": 60}) is None
+    assert store.get("abc", "captions") is None
+
+
+def test_hash_file(tmp_path):
+    path = tmp_path / "audio.opus"
+    path.write_bytes(b"abc")
+
+    assert hash_file(path) == hashlib.sha256(b"abc").hexdigest()
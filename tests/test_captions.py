@@ -0,0 +1,131 @@
+import asyncio
+import threading
+import time
+from unittest.mock import patch
+from xml.etree.ElementTree import ParseError
+
+import pytest
+from youtube_transcript_api._transcripts import TranscriptsDisabled
+
+from src.captions import (
+    RateLimiter,
+    backoff_delay,
+    extract_transcript,
+    fetch_captions,
+    fetch_many_captions,
+)
+
+CAPTIONS = [
+    {"text": "hello", "start": 0.0, "duration": 1.5},
+    {"text": "world", "start": 1.5, "duration": 2.0},
+]
+
+
+@pytest.fixture(autouse=True)
+def no_backoff_sleep():
+    with patch("src.captions.backoff_delay", return_value=0):
+        yield
+
+
+def test_fetch_captions_permanent_error_is_not_retried():
+    with patch(
+        "src.captions.fetch_caption_track",
+        side_effect=TranscriptsDisabled("abc"),
+    ) as mock_get:
+        result = fetch_captions("abc")
+
+    assert result.status == "unavailable"
+    assert result.error == "TranscriptsDisabled"
+    assert mock_get.call_count == 1
+
+
+def test_fetch_captions_retries_transient_errors():
+    with patch(
+        "src.captions.fetch_caption_track",
+        side_effect=[
+            ParseError("no element found"),
+            ConnectionError(),
+            (CAPTIONS, "en-GB"),
+        ],
+    ) as mock_get:
+        result = fetch_captions("abc")
+
+    assert result.status == "ok"
+    assert result.attempts == 3
+    assert mock_get.call_count == 3
+    assert result.transcript["language"] == "en"
+    assert result.transcript["segments"][1] == {
+        "start": 1.5,
+        "end": 3.5,
+        "text": "world",
+    }
+
+
+def test_fetch_captions_gives_up_after_retries():
+    with patch(
+        "src.captions.fetch_caption_track",
+        side_effect=ParseError("no element found"),
+    ) as mock_get:
+        result = fetch_captions("abc", retries=2)
+
+    assert result.status == "error"
+    assert result.error == "ParseError: no element found"
+    assert mock_get.call_count == 3
+
+
+def test_fetch_many_captions_respects_concurrency():
+    in_flight = 0
+    max_in_flight = 0
+    lock = threading.Lock()
+
+    def fetch_caption_track(video_id):
+        nonlocal in_flight, max_in_flight
+        with lock:
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+        time.sleep(0.02)
+        with lock:
+            in_flight -= 1
+        return CAPTIONS, "en"
+
+    video_ids = [f"video{i:06d}" for i in range(12)]
+    with patch(
+        "src.captions.fetch_caption_track",
+        side_effect=fetch_caption_track,
+    ):
+        results = asyncio.run(fetch_many_captions(video_ids, max_concurrency=3))
+
+    assert list(results) == video_ids
+    assert all(result.status == "ok" for result in results.values())
+    assert max_in_flight <= 3
+
+
+def test_rate_limiter_spaces_request_starts():
+    async def run():
+        limiter = RateLimiter(max_concurrency=10, requests_per_second=50)
+        starts = []
+
+        async def request():
+            async with limiter:
+                starts.append(asyncio.get_running_loop().time())
+
+        await asyncio.gather(*(request() for _ in range(5)))
+        return starts
+
+    starts = sorted(asyncio.run(run()))
+    assert starts[-1] - starts[0] >= 4 * 0.02 * 0.9
+
+
+def test_backoff_delay_is_capped():
+    for attempt in range(10):
+        assert 0 <= backoff_delay(attempt, base_delay=0.5, max_delay=4) <= 4
+
+
+def test_extract_transcript_falls_back_on_permanent_error():
+    with patch(
+        "src.captions.fetch_caption_track",
+        side_effect=TranscriptsDisabled("abc"),
+    ):
+        assert extract_transcript("https://www.youtube.com/watch?v=abc") is None
+
+    assert extract_transcript("https://example.com/not-youtube") is None
@@ -0,0 +1,94 @@
+from unittest.mock import patch
+
+import numpy as np
+
+from src.audio import SAMPLE_RATE
+from src.cascade import (
+    CascadeThresholds,
+    Escalation,
+    cascade_transcribe,
+    escalation_spans,
+    is_low_confidence,
+)
+from src.chunk_audio import _transcribe_task
+
+
+def segment(start: float, end: float, text: str, avg_logprob: float = -0.2) -> dict:
+    return {
+        "start": start,
+        "end": end,
+        "text": text,
+        "avg_logprob": avg_logprob,
+        "compression_ratio": 1.5,
+        "no_speech_prob": 0.01,
+    }
+
+
+FAST = [
+    segment(0.0, 2.0, " one"),
+    segment(2.0, 4.0, " too", avg_logprob=-0.9),
+    segment(4.5, 6.0, " tree", avg_logprob=-1.2),
+    segment(6.0, 8.0, " four"),
+    segment(8.5, 10.0, " fife", avg_logprob=-0.8),
+]
+
+
+def fake_transcribe(calls: list):
+    def transcribe(
+        audio: np.ndarray,
+        model_str: str,
+        word_timestamps: bool = False,
+        language: str = None,
+    ) -> list[dict]:
+        calls.append((model_str, len(audio) / SAMPLE_RATE))
+        if model_str == "base":
+            return FAST
+        # The accurate model hears whatever the span covers
+        return [segment(0.1, len(audio) / SAMPLE_RATE, " redone", avg_logprob=-0.1)]
+
+    return transcribe
+
+
+def test_is_low_confidence():
+    thresholds = CascadeThresholds(min_avg_logprob=-0.5)
+
+    assert not is_low_confidence(segment(0, 1, " ok"), thresholds)
+    assert is_low_confidence(segment(0, 1, " hm", avg_logprob=-0.7), thresholds)
+    assert is_low_confidence(
+        {**segment(0, 1, " la la la"), "compression_ratio": 3.0}, thresholds
+    )
+    assert is_low_confidence({**segment(0, 1, ""), "no_speech_prob": 0.9}, thresholds)
+    assert not is_low_confidence({"start": 0, "end": 1, "text": " ?"}, thresholds)
+
+
+def test_escalation_spans_join_runs_and_stop_at_kept_segments():
+    spans = escalation_spans(FAST, duration=10.0, padding=0.5)
+
+    assert spans == [Escalation(1, 3, 2.0, 6.0), Escalation(4, 5, 8.0, 10.0)]
+
+
+def test_cascade_transcribe_splices_in_accurate_segments():
+    calls = []
+    audio = np.zeros(10 * SAMPLE_RATE, dtype=np.float32)
+
+    segments, escalated = cascade_transcribe(audio, fake_transcribe(calls))
+
+    assert calls == [("base", 10.0), ("turbo", 4.0), ("turbo", 2.0)]
+    assert escalated == 6.0
+    assert [(s["start"], s["end"], s["text"]) for s in segments] == [
+        (0.0, 2.0, " one"),
+        (2.1, 6.0, " redone"),
+        (6.0, 8.0, " four"),
+        (8.1, 10.0, " redone"),
+    ]
+
+
+def test_transcribe_task_cascade():
+    calls = []
+    audio = np.zeros(10 * SAMPLE_RATE, dtype=np.float32)
+
+    with patch("src.chunk_audio.transcribe_chunk", side_effect=fake_transcribe(calls)):
+        store = _transcribe_task(audio, "turbo", cascade=CascadeThresholds())
+
+    assert [model_str for model_str, _ in calls] == ["base", "turbo", "turbo"]
+    assert store.texts() == [" one", " redone", " four", " redone"]
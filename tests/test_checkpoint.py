@@ -0,0 +1,101 @@
+import json
+from unittest.mock import patch
+
+import numpy as np
+
+from src.audio import SAMPLE_RATE
+from src.checkpoint import (
+    ChunkCheckpoint,
+    find_downloaded_audio,
+    get_job_dir,
+    record_downloaded_audio,
+)
+from src.chunk_audio import transcribe_chunks
+
+
+def run_chunks(audio_path, checkpoint_dir, fake_transcribe_chunk, resume=True):
+    audio = np.zeros(25 * SAMPLE_RATE, dtype=np.float32)
+    with patch("src.chunk_audio.load_audio", return_value=audio), patch(
+        "src.chunk_audio.transcribe_chunk", side_effect=fake_transcribe_chunk
+    ):
+        return transcribe_chunks(
+            audio_path,
+            chunk_duration=10,
+            max_workers=1,
+            model_str="base",
+            checkpoint_dir=checkpoint_dir,
+            resume=resume,
+        )
+
+
+def test_resume_only_transcribes_missing_chunks(tmp_path):
+    audio_path = tmp_path / "audio.mp3"
+    audio_path.write_bytes(b"audio")
+    job_dir = tmp_path / "job"
+    calls = []
+
+    def flaky(audio, model_str, word_timestamps=False, language=None):
+        calls.append(len(audio))
+        if len(calls) == 2:
+            raise RuntimeError("boom")
+        return [{"start": 0.0, "end": 1.0, "text": f" {len(calls)}"}]
+
+    first = run_chunks(audio_path, job_dir, flaky)
+
+    assert [s["start"] for s in first] == [0.0, 20.0]
+    manifest = json.loads((job_dir / "manifest.json").read_text())
+    assert manifest["model_str"] == "base"
+    assert manifest["chunk_samples"] == 10 * SAMPLE_RATE
+    assert {i: c["status"] for i, c in manifest["chunks"].items()} == {
+        "0": "done",
+        "1": "failed",
+        "2": "done",
+    }
+    assert manifest["chunks"]["1"]["start"] == 10 * SAMPLE_RATE
+
+    calls.clear()
+    second = run_chunks(audio_path, job_dir, flaky)
+
+    assert calls == [10 * SAMPLE_RATE]
+    assert [(s["start"], s["text"]) for s in second] == [
+        (0.0, " 1"),
+        (10.0, " 1"),
+        (20.0, " 3"),
+    ]
+
+
+def test_checkpoint_discarded_when_identity_changes(tmp_path):
+    job_dir = tmp_path / "job"
+    checkpoint = ChunkCheckpoint.open(job_dir, "hash", "base", 10)
+    checkpoint.manifest["chunks"]["0"] = {"status": "done"}
+    checkpoint._write_manifest()
+    (job_dir / "chunk_00000.npz").touch()
+
+    assert ChunkCheckpoint.open(job_dir, "hash", "base", 10).done == {0}
+    assert ChunkCheckpoint.open(job_dir, "hash", "turbo", 10).done == set()
+    assert not (job_dir / "chunk_00000.npz").exists()
+
+
+def test_no_resume_starts_over(tmp_path):
+    job_dir = tmp_path / "job"
+    checkpoint = ChunkCheckpoint.open(job_dir, "hash", "base", 10)
+    checkpoint.manifest["chunks"]["0"] = {"status": "done"}
+    checkpoint._write_manifest()
+
+    assert ChunkCheckpoint.open(job_dir, "hash", "base", 10, resume=False).done == set()
+
+
+def test_downloaded_audio_is_recorded(tmp_path):
+    job_dir = get_job_dir("abc", "base", {"chunk_duration": 300})
+    assert job_dir == get_job_dir("abc", "base", {"chunk_duration": 300})
+    assert job_dir != get_job_dir("abc", "turbo", {"chunk_duration": 300})
+    assert find_downloaded_audio(job_dir) is None
+
+    audio_path = job_dir / "audio" / "video.webm"
+    audio_path.parent.mkdir(parents=True)
+    audio_path.touch()
+    record_downloaded_audio(job_dir, [(0.0, audio_path)])
+
+    assert find_downloaded_audio(job_dir) == [(0.0, audio_path)]
+    audio_path.unlink()
+    assert find_downloaded_audio(job_dir) is None
@@ -0,0 +1,261 @@
+import threading
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from src.audio import SAMPLE_RATE, SharedAudio
+from src.chunk_audio import (
+    Chunk,
+    ChunksFailed,
+    ReorderBuffer,
+    SharedSlice,
+    TranscriptionCancelled,
+    _attached,
+    _transcribe_task,
+    chunk_audio,
+    chunk_boundaries,
+    iter_chunk_results,
+    iter_transcribed_chunks,
+    prefetch,
+    threads_per_worker,
+    transcribe_chunks,
+)
+
+
+def test_threads_per_worker():
+    assert threads_per_worker(4, cpu_count=32) == 8
+    assert threads_per_worker(3, cpu_count=32) == 10
+    assert threads_per_worker(64, cpu_count=32) == 1
+    assert threads_per_worker(0, cpu_count=8) == 8
+
+
+def test_chunk_boundaries():
+    chunks = chunk_boundaries(25 * SAMPLE_RATE, chunk_duration=10)
+
+    assert [(c.start, c.end) for c in chunks] == [
+        (0, 10 * SAMPLE_RATE),
+        (10 * SAMPLE_RATE, 20 * SAMPLE_RATE),
+        (20 * SAMPLE_RATE, 25 * SAMPLE_RATE),
+    ]
+    assert [c.offset for c in chunks] == [0.0, 10.0, 20.0]
+
+
+def test_reorder_buffer_releases_contiguous_results():
+    reorder = ReorderBuffer()
+
+    assert reorder.add(2, "c") == []
+    assert reorder.add(0, "a") == ["a"]
+    assert reorder.add(1, None) == [None, "c"]
+    assert reorder.add(3, "d") == ["d"]
+    assert reorder.pending == {}
+
+
+def test_prefetch_produces_the_next_item_while_the_current_one_is_used():
+    produced = []
+    closed = threading.Event()
+
+    def items():
+        try:
+            for i in range(5):
+                produced.append(i)
+                yield i
+        finally:
+            closed.set()
+
+    iterator = prefetch(items())
+    assert next(iterator) == 0
+    # The producer moves on without waiting for the caller
+    for _ in range(100):
+        if len(produced) >= 2:
+            break
+        threading.Event().wait(0.01)
+    assert produced[:2] == [0, 1]
+    # ...but only `depth` items ahead
+    assert len(produced) <= 3
+
+    iterator.close()
+    assert closed.is_set()
+
+
+def test_prefetch_raises_the_producers_error():
+    def items():
+        yield 1
+        raise ValueError("decode failed")
+
+    iterator = prefetch(items())
+    assert next(iterator) == 1
+    with pytest.raises(ValueError, match="decode failed"):
+        next(iterator)
+
+
+def test_chunk_audio_returns_views():
+    audio = np.zeros(25 * SAMPLE_RATE, dtype=np.float32)
+
+    chunks = chunk_audio(audio, chunk_duration=10)
+
+    assert [len(c) for c in chunks] == [
+        10 * SAMPLE_RATE,
+        10 * SAMPLE_RATE,
+        5 * SAMPLE_RATE,
+    ]
+    assert all(np.shares_memory(c, audio) for c in chunks)
+
+
+def fake_audio(seconds: int) -> np.ndarray:
+    return np.zeros(seconds * SAMPLE_RATE, dtype=np.float32)
+
+
+def test_transcribe_chunks_sequential_offsets():
+    def fake_transcribe_chunk(audio, model_str, word_timestamps=False, language=None):
+        return [{"start": 1.0, "end": 2.0, "text": f" {len(audio) // SAMPLE_RATE}s"}]
+
+    with patch("src.chunk_audio.load_audio", return_value=fake_audio(500)), patch(
+        "src.chunk_audio.transcribe_chunk", side_effect=fake_transcribe_chunk
+    ):
+        segments = transcribe_chunks(Path("audio.mp3"), max_workers=1)
+
+    assert [s["start"] for s in segments] == [1.0, 301.0]
+    assert [s["end"] for s in segments] == [2.0, 302.0]
+    assert [s["text"] for s in segments] == [" 300s", " 200s"]
+
+
+def test_transcribe_chunks_skips_failed_chunk():
+    calls = []
+
+    def fake_transcribe_chunk(audio, model_str, word_timestamps=False, language=None):
+        calls.append(audio)
+        if len(calls) == 1:
+            raise RuntimeError("boom")
+        return [{"start": 0.0, "end": 1.0, "text": " ok"}]
+
+    with patch("src.chunk_audio.load_audio", return_value=fake_audio(500)), patch(
+        "src.chunk_audio.transcribe_chunk", side_effect=fake_transcribe_chunk
+    ):
+        segments = transcribe_chunks(Path("audio.mp3"), max_workers=1)
+
+    assert segments == [{"start": 300.0, "end": 301.0, "text": " ok"}]
+
+
+def test_iter_transcribed_chunks_reports_failed_chunks_at_the_end():
+    calls = []
+
+    def fake_transcribe_chunk(audio, model_str, word_timestamps=False, language=None):
+        calls.append(audio)
+        if len(calls) == 1:
+            raise RuntimeError("boom")
+        return [{"start": 0.0, "end": 1.0, "text": " ok"}]
+
+    stores = []
+    with patch("src.chunk_audio.load_audio", return_value=fake_audio(500)), patch(
+        "src.chunk_audio.transcribe_chunk", side_effect=fake_transcribe_chunk
+    ), pytest.raises(ChunksFailed, match="Chunks 0 failed"):
+        for store in iter_transcribed_chunks(
+            Path("audio.mp3"), max_workers=1, skip_failed=False
+        ):
+            stores.append(store)
+
+    # The chunk after the failed one is still transcribed
+    assert len(calls) == 2
+    assert [s.texts() for s in stores] == [[" ok"]]
+
+
+def test_shared_chunk_reads_slice_without_copy():
+    pcm = (np.arange(20 * SAMPLE_RATE) % 100).astype(np.int16).tobytes()
+    seen = []
+
+    with SharedAudio.from_pcm16(pcm) as shared, patch(
+        "src.chunk_audio.transcribe_chunk",
+        side_effect=lambda audio, model_str, word_timestamps=False, language=None: seen.append(
+            audio
+        )
+        or [],
+    ):
+        ref = SharedSlice(
+            shared.name, shared.num_samples, 10 * SAMPLE_RATE, 20 * SAMPLE_RATE
+        )
+        _transcribe_task(ref, "base")
+
+        (audio,) = seen
+        assert not audio.flags.owndata
+        np.testing.assert_array_equal(audio, shared.array[ref.start : ref.end])
+
+        del audio, seen[:]
+        _attached.pop(shared.name).close()
+
+
+def test_transcribe_chunks_stream_offsets():
+    windows = [fake_audio(300), fake_audio(300), fake_audio(42)]
+
+    with patch("src.chunk_audio.stream_audio", return_value=iter(windows)), patch(
+        "src.chunk_audio.load_audio"
+    ) as mock_load, patch(
+        "src.chunk_audio.transcribe_chunk",
+        side_effect=lambda audio, model_str, word_timestamps=False, language=None: [
+            {"start": 0.5, "end": 1.0, "text": " hi"}
+        ],
+    ) as mock_transcribe:
+        segments = transcribe_chunks(Path("audio.mp3"), max_workers=1, stream=True)
+
+    mock_load.assert_not_called()
+    assert mock_transcribe.call_count == 3
+    assert [s["start"] for s in segments] == [0.5, 300.5, 600.5]
+
+
+def test_transcribe_chunks_stops_when_cancelled():
+    cancel = threading.Event()
+
+    def fake_transcribe_chunk(audio, model_str, word_timestamps=False, language=None):
+        cancel.set()
+        return []
+
+    with patch("src.chunk_audio.load_audio", return_value=fake_audio(900)), patch(
+        "src.chunk_audio.transcribe_chunk", side_effect=fake_transcribe_chunk
+    ) as mock_transcribe:
+        with pytest.raises(TranscriptionCancelled):
+            transcribe_chunks(Path("audio.mp3"), max_workers=1, cancel=cancel)
+
+    assert mock_transcribe.call_count == 1
+
+
+def test_iter_chunk_results_shares_in_flight_slots_between_threads():
+    import concurrent.futures
+
+    lock = threading.Lock()
+    counts = {"read": 0, "finished": 0, "peak": 0}
+
+    def chunks():
+        for i in range(6):
+            with lock:
+                counts["read"] += 1
+                counts["peak"] = max(
+                    counts["peak"], counts["read"] - counts["finished"]
+                )
+            yield Chunk(i, i * SAMPLE_RATE, (i + 1) * SAMPLE_RATE), fake_audio(1)
+
+    def fake_transcribe_chunk(audio, model_str, word_timestamps=False, language=None):
+        threading.Event().wait(0.01)
+        with lock:
+            counts["finished"] += 1
+        return []
+
+    in_flight = threading.BoundedSemaphore(2)
+    with patch(
+        "src.chunk_audio.transcribe_chunk", side_effect=fake_transcribe_chunk
+    ), concurrent.futures.ThreadPoolExecutor(4) as executor:
+
+        def run():
+            for _ in iter_chunk_results(
+                chunks(), 4, executor=executor, in_flight=in_flight
+            ):
+                pass
+
+        threads = [threading.Thread(target=run) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert counts["read"] == counts["finished"] == 12
+    assert counts["peak"] <= 2
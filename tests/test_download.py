@@ -1,9 +1,20 @@
+import threading
 from unittest.mock import MagicMock, patch
 
 import pytest
-from yt_dlp.utils import DownloadError
+from yt_dlp.utils import DownloadCancelled, DownloadError
 
-from src.download import download_audio, sanitize_title
+from src.cache import DiskCache
+from src.download import (
+    _cancel_hook,
+    audio_postprocessors,
+    download_audio,
+    get_audio_stream,
+    get_video_id,
+    get_video_info,
+    get_video_title,
+    sanitize_title,
+)
 
 
 def test_sanitize_title():
@@ -26,6 +37,7 @@ def mock_yt_dlp():
         # Mock the extract_info method
         mock_instance = MagicMock()
         mock_instance.extract_info.return_value = {"title": "Test Video"}
+        mock_instance.sanitize_info.side_effect = lambda info: info
         mock_ydl.return_value.__enter__.return_value = mock_instance
         yield mock_ydl
 
@@ -47,3 +59,132 @@ def test_download_audio_failure():
 
     with pytest.raises(DownloadError, match="Incomplete YouTube ID"):
         download_audio(url, "/fake/path")
+
+
+def test_audio_postprocessors():
+    assert audio_postprocessors("native") == []
+    assert audio_postprocessors("wav") == [
+        {"key": "FFmpegExtractAudio", "preferredcodec": "wav"}
+    ]
+    assert audio_postprocessors("mp3")[0]["preferredquality"] == "192"
+
+
+def test_download_audio_native_skips_transcode(mock_yt_dlp, tmp_path):
+    url = "https://www.youtube.com/watch?v=test"
+    expected_output = tmp_path / "test_video.webm"
+    expected_output.touch()
+
+    result = download_audio(url, tmp_path, audio_format="native")
+
+    assert result == expected_output
+    ydl_opts = mock_yt_dlp.call_args_list[-1].args[0]
+    assert ydl_opts["postprocessors"] == []
+
+
+def test_download_audio_wav_is_16k_mono(mock_yt_dlp, tmp_path):
+    url = "https://www.youtube.com/watch?v=test"
+    (tmp_path / "test_video.wav").touch()
+
+    result = download_audio(url, tmp_path, audio_format="wav")
+
+    assert result.suffix == ".wav"
+    ydl_opts = mock_yt_dlp.call_args_list[-1].args[0]
+    assert ydl_opts["postprocessor_args"] == {
+        "extractaudio": ["-ar", "16000", "-ac", "1"]
+    }
+
+
+def test_download_audio_section(mock_yt_dlp, tmp_path):
+    url = "https://www.youtube.com/watch?v=test"
+    (tmp_path / "test_video_2400s.mp3").touch()
+
+    result = download_audio(url, tmp_path, section=(2400.0, 3300.0))
+
+    assert result.name == "test_video_2400s.mp3"
+    ydl_opts = mock_yt_dlp.call_args_list[-1].args[0]
+    assert list(ydl_opts["download_ranges"]({}, None)) == [
+        {"start_time": 2400.0, "end_time": 3300.0}
+    ]
+
+
+def test_get_audio_stream(mock_yt_dlp):
+    ydl = mock_yt_dlp.return_value.__enter__.return_value
+    ydl.process_ie_result.return_value = {
+        "url": "https://media/audio",
+        "http_headers": {"User-Agent": "test"},
+    }
+
+    url, headers = get_audio_stream("https://www.youtube.com/watch?v=test", info={})
+
+    assert url == "https://media/audio"
+    assert headers == {"User-Agent": "test"}
+    assert mock_yt_dlp.call_args.args[0]["format"] == "bestaudio/best"
+    assert ydl.process_ie_result.call_args.kwargs["download"] is False
+
+
+def test_get_video_id():
+    test_cases = [
+        (
+            "https://www.youtube.com/watch?v=DTOU3vchBE0&ab_channel=DwarkeshPatel",
+            "DTOU3vchBE0",
+        ),
+        ("https://www.youtube.com/shorts/q5HiRc93xMU", "q5HiRc93xMU"),
+        ("https://youtu.be/Cybnip2Kyw0?t=10", "Cybnip2Kyw0"),
+        ("Cybnip2Kyw0", "Cybnip2Kyw0"),
+        ("https://example.com/video", None),
+    ]
+
+    for url, expected in test_cases:
+        assert get_video_id(url) == expected
+
+
+def test_get_video_info_uses_cache_without_network(tmp_path):
+    cache = DiskCache(tmp_path)
+    cache.set("DTOU3vchBE0", {"id": "DTOU3vchBE0", "title": "Cached Title"})
+
+    with patch("yt_dlp.YoutubeDL") as mock_ydl:
+        info = get_video_info(
+            "https://www.youtube.com/watch?v=DTOU3vchBE0", cache=cache
+        )
+
+    mock_ydl.assert_not_called()
+    assert get_video_title("unused", info=info) == "cached_title"
+
+
+def test_get_video_info_extracts_once(mock_yt_dlp, tmp_path):
+    cache = DiskCache(tmp_path)
+    url = "https://www.youtube.com/watch?v=DTOU3vchBE0"
+    mock_instance = mock_yt_dlp.return_value.__enter__.return_value
+    mock_instance.extract_info.return_value = {
+        "id": "DTOU3vchBE0",
+        "title": "Test Video",
+    }
+
+    first = get_video_info(url, cache=cache)
+    second = get_video_info(url, cache=cache)
+
+    assert first == second
+    assert mock_instance.extract_info.call_count == 1
+
+
+def test_download_audio_reuses_info(mock_yt_dlp, tmp_path):
+    (tmp_path / "given_title.mp3").touch()
+    mock_instance = mock_yt_dlp.return_value.__enter__.return_value
+
+    result = download_audio(
+        "https://www.youtube.com/watch?v=test", tmp_path, info={"title": "Given Title"}
+    )
+
+    assert result == tmp_path / "given_title.mp3"
+    mock_instance.extract_info.assert_not_called()
+    mock_instance.process_ie_result.assert_called_once()
+
+
+def test_cancel_hook_aborts_download():
+    cancel = threading.Event()
+    hook = _cancel_hook(cancel)
+
+    hook({"status": "downloading"})
+    cancel.set()
+    with pytest.raises(DownloadCancelled):
+        hook({"status": "downloading"})
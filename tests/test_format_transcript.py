@@ -1,4 +1,21 @@
-from src.format_transcript import format_timestamp, format_transcript
+import io
+import json
+
+import pytest
+from click.testing import CliRunner
+
+from src.format_transcript import (
+    cli,
+    convert_directory,
+    format_subtitle_timestamp,
+    format_timestamp,
+    format_transcript,
+    iter_segments,
+    load_transcript,
+    save_transcript,
+    save_transcript_chunks,
+    write_transcript,
+)
 from tests.segments import TEST_SEGMENTS
 
 
@@ -25,3 +42,153 @@ def test_format_transcript_without_timestamps():
     formatted = format_transcript(TEST_SEGMENTS, timestamps=False)
     expected = "Japan invades Manchuria in 1931, Hitler invades Poland in 1939, and in retrospect, we think of them as part of the same great global conflict, whereas they were separated by eight years.\n"
     assert formatted == expected
+
+
+def test_format_subtitle_timestamp():
+    assert format_subtitle_timestamp(0) == "00:00:00,000"
+    assert format_subtitle_timestamp(3661.5) == "01:01:01,500"
+    assert format_subtitle_timestamp(59.9996, ".") == "00:01:00.000"
+
+
+def test_write_srt():
+    f = io.StringIO()
+    write_transcript(iter(TEST_SEGMENTS), f, "srt")
+    assert f.getvalue().startswith(
+        "1\n00:00:00,000 --> 00:00:05,620\nJapan invades Manchuria"
+    )
+    assert "\n\n2\n00:00:05,620 --> " in f.getvalue()
+
+
+def test_write_vtt():
+    f = io.StringIO()
+    write_transcript(TEST_SEGMENTS, f, "vtt")
+    assert f.getvalue().startswith("WEBVTT\n\n00:00:00.000 --> 00:00:05.620\n")
+
+
+def test_save_jsonl(tmp_path):
+    path = save_transcript(
+        (segment for segment in TEST_SEGMENTS), tmp_path / "out.jsonl", "jsonl"
+    )
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [record["start"] for record in records] == [
+        segment["start"] for segment in TEST_SEGMENTS
+    ]
+    assert records[0]["text"] == TEST_SEGMENTS[0]["text"].strip()
+    assert records[0]["words"][0] == {"word": " Japan", "start": 0.0, "end": 0.38}
+
+
+def test_write_word_srt():
+    f = io.StringIO()
+    segments = [TEST_SEGMENTS[0], {"start": 10.0, "end": 11.5, "text": " No words."}]
+    write_transcript(segments, f, "word-srt")
+
+    cues = f.getvalue().strip().split("\n\n")
+    assert cues[0] == "1\n00:00:00,000 --> 00:00:00,380\nJapan"
+    assert len(cues) == len(TEST_SEGMENTS[0]["words"]) + 1
+    assert cues[-1].endswith("00:00:10,000 --> 00:00:11,500\nNo words.")
+
+
+def test_save_transcript_chunks_flushes_each_chunk(tmp_path):
+    output = tmp_path / "out.txt"
+    seen = []
+
+    def chunks():
+        yield TEST_SEGMENTS[:1]
+        # The first chunk is on disk before the second has been produced
+        seen.append(output.read_text())
+        yield TEST_SEGMENTS[1:2]
+
+    save_transcript_chunks(chunks(), output)
+
+    assert seen == [format_transcript(TEST_SEGMENTS[:1])]
+    assert output.read_text() == format_transcript(TEST_SEGMENTS[:2])
+
+
+def test_write_transcript_unknown_format():
+    with pytest.raises(ValueError):
+        write_transcript(TEST_SEGMENTS, io.StringIO(), "docx")
+
+
+SRT = """1
+00:00:01,250 --> 00:00:03,000
+Hello there,
+general
+
+2
+00:01:00,000 --> 01:00:00,500
+Bye
+"""
+
+VTT = """WEBVTT
+
+NOTE a comment
+that spans lines
+
+00:01.000 --> 00:02.500 align:start
+<c>Hi</c> again
+"""
+
+
+def test_iter_segments_timestamped_lines():
+    lines = [
+        "[00:00:01 -> 00:00:02] one\n",
+        "not a segment\n",
+        "[01:02:03.5 -> 01:02:04] two",
+    ]
+
+    segments = list(iter_segments(lines))
+
+    assert segments == [
+        {"start": 1.0, "end": 2.0, "text": "one"},
+        {"start": 3723.5, "end": 3724.0, "text": "two"},
+    ]
+
+
+def test_iter_segments_srt():
+    assert list(iter_segments(SRT.splitlines())) == [
+        {"start": 1.25, "end": 3.0, "text": "Hello there, general"},
+        {"start": 60.0, "end": 3600.5, "text": "Bye"},
+    ]
+
+
+def test_iter_segments_vtt():
+    assert list(iter_segments(VTT.splitlines())) == [
+        {"start": 1.0, "end": 2.5, "text": "Hi again"}
+    ]
+
+
+def test_round_trip_through_writers(tmp_path):
+    for output_format in ("timestamps", "srt", "vtt"):
+        path = save_transcript(TEST_SEGMENTS, tmp_path / "t", output_format)
+        store = load_transcript(path)
+        assert [text.strip() for text in store.texts()] == [
+            s["text"].strip() for s in TEST_SEGMENTS
+        ]
+
+
+def test_cli_single_file(tmp_path):
+    (tmp_path / "talk.srt").write_text(SRT)
+
+    result = CliRunner().invoke(cli, [str(tmp_path / "talk.srt"), "--format", "vtt"])
+
+    assert result.exit_code == 0, result.output
+    assert (
+        (tmp_path / "talk.formatted.vtt")
+        .read_text()
+        .startswith("WEBVTT\n\n00:00:01.250 --> 00:00:03.000\nHello there, general\n")
+    )
+
+
+def test_convert_directory(tmp_path):
+    (tmp_path / "a.srt").write_text(SRT)
+    (tmp_path / "b.vtt").write_text(VTT)
+    (tmp_path / "c.formatted.txt").write_text("[00:00:00 -> 00:00:01] old output")
+    (tmp_path / "notes.md").write_text("ignored")
+
+    written, failed = convert_directory(
+        tmp_path, tmp_path / "out", "text", max_workers=2
+    )
+
+    assert failed == []
+    assert [path.name for path in written] == ["a.formatted.txt", "b.formatted.txt"]
+    assert (tmp_path / "out" / "b.formatted.txt").read_text() == "Hi again\n"
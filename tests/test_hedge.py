@@ -0,0 +1,83 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.hedge import has_captions, race_with_hedge
+
+
+async def after(seconds, value):
+    await asyncio.sleep(seconds)
+    return value
+
+
+def test_has_captions():
+    assert has_captions({"subtitles": {}, "automatic_captions": {"en": []}}) is True
+    assert has_captions({"subtitles": {}, "automatic_captions": {}}) is False
+    assert has_captions({"title": "no caption metadata"}) is None
+
+
+def test_primary_wins_before_delay_without_starting_hedge():
+    started = threading.Event()
+
+    result = asyncio.run(
+        race_with_hedge(after(0, "captions"), lambda cancel: started.set(), delay=1)
+    )
+
+    assert result == ("captions", "primary")
+    assert not started.is_set()
+
+
+def test_hedge_wins_and_primary_is_cancelled():
+    async def slow_primary():
+        await asyncio.sleep(10)
+        return "captions"
+
+    start = time.perf_counter()
+    result = asyncio.run(race_with_hedge(slow_primary(), lambda cancel: "audio", 0.01))
+
+    assert result == ("audio", "hedge")
+    assert time.perf_counter() - start < 5
+
+
+def test_primary_wins_and_hedge_is_cancelled_and_cleaned_up():
+    cleaned_up = threading.Event()
+
+    def hedge(cancel):
+        try:
+            while not cancel.wait(0.01):
+                pass
+            raise RuntimeError("cancelled")
+        finally:
+            cleaned_up.set()
+
+    result = asyncio.run(race_with_hedge(after(0.05, "captions"), hedge, delay=0))
+
+    assert result == ("captions", "primary")
+    assert cleaned_up.is_set()
+
+
+def test_unusable_primary_waits_for_hedge():
+    result = asyncio.run(
+        race_with_hedge(after(0, None), lambda cancel: "audio", delay=1)
+    )
+
+    assert result == ("audio", "hedge")
+
+
+def test_hedge_failure_falls_back_to_primary():
+    def failing_hedge(cancel):
+        raise RuntimeError("download failed")
+
+    result = asyncio.run(race_with_hedge(after(0.05, "captions"), failing_hedge, 0))
+
+    assert result == ("captions", "primary")
+
+
+def test_both_failing_raises_hedge_error():
+    def failing_hedge(cancel):
+        raise RuntimeError("download failed")
+
+    with pytest.raises(RuntimeError, match="download failed"):
+        asyncio.run(race_with_hedge(after(0.05, None), failing_hedge, delay=0))
@@ -0,0 +1,83 @@
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from src.audio import SAMPLE_RATE
+from src.language import (
+    detect_language,
+    first_speech,
+    language_from_info,
+    normalize_language,
+    resolve_language,
+)
+
+whisper = pytest.importorskip("whisper")
+
+
+@pytest.fixture(scope="module")
+def tiny_model():
+    """A randomly initialised Whisper small enough to run in tests."""
+    import torch
+    from whisper.model import ModelDimensions, Whisper
+
+    torch.manual_seed(0)
+    dims = ModelDimensions(
+        n_mels=80,
+        n_audio_ctx=1500,
+        n_audio_state=16,
+        n_audio_head=2,
+        n_audio_layer=1,
+        n_vocab=51865,
+        n_text_ctx=448,
+        n_text_state=16,
+        n_text_head=2,
+        n_text_layer=1,
+    )
+    return Whisper(dims).eval()
+
+
+def test_normalize_language():
+    assert normalize_language("en-GB") == "en"
+    assert normalize_language("DE") == "de"
+    assert normalize_language(None) is None
+
+
+def test_language_from_info():
+    assert language_from_info({"language": "pt-BR"}) == "pt"
+    # Speech recognition captions are in the spoken language
+    captions = {"en": [], "ja-orig": [], "fr": []}
+    assert language_from_info({"automatic_captions": captions}) == "ja"
+    assert language_from_info({"language": "zz"}) is None
+    assert language_from_info({}) is None
+
+
+def test_first_speech_skips_leading_silence():
+    rng = np.random.default_rng(0)
+    silence = np.zeros(5 * SAMPLE_RATE, dtype=np.float32)
+    speech = (0.3 * rng.standard_normal(40 * SAMPLE_RATE)).astype(np.float32)
+
+    window = first_speech(np.concatenate([silence, speech]))
+
+    assert len(window) == 30 * SAMPLE_RATE
+    assert np.abs(window[:SAMPLE_RATE]).max() > 0.1
+
+
+def test_resolve_language_prefers_metadata():
+    with patch("src.language.stream_audio") as mock_stream:
+        language = resolve_language("video.webm", {"language": "de"})
+
+    assert language == "de"
+    mock_stream.assert_not_called()
+
+
+def test_resolve_language_detects_once(tiny_model):
+    audio = np.zeros(10 * SAMPLE_RATE, dtype=np.float32)
+    with patch("src.language.stream_audio", return_value=(a for a in [audio])), patch(
+        "src.language.get_model", return_value=tiny_model
+    ) as mock_model:
+        language = resolve_language("video.webm", {"title": "Untagged"}, "base")
+        mock_model.assert_called_once_with("base")
+        assert language == detect_language(audio, "base")
+
+    assert language in whisper.tokenizer.LANGUAGES
@@ -0,0 +1,90 @@
+from unittest.mock import patch
+
+from src.model_registry import ModelRegistry
+
+
+class StubModel:
+    def __init__(self, name: str):
+        self.name = name
+
+
+def make_registry(memory_budget=None, sizes=None):
+    loads = []
+    sizes = sizes or {}
+
+    def loader(model_str, device, dtype):
+        loads.append((model_str, device, dtype))
+        return StubModel(model_str)
+
+    registry = ModelRegistry(
+        memory_budget=memory_budget,
+        loader=loader,
+        sizeof=lambda model: sizes.get(model.name, 1),
+    )
+    return registry, loads
+
+
+def test_get_loads_each_key_once():
+    registry, loads = make_registry()
+
+    first = registry.get("base", device="cpu")
+    second = registry.get("base", device="cpu")
+
+    assert first is second
+    assert loads == [("base", "cpu", "float32")]
+
+
+def test_get_distinguishes_device_and_dtype():
+    registry, loads = make_registry()
+
+    registry.get("base", device="cpu")
+    registry.get("base", device="cuda")
+    registry.get("base", device="cuda", dtype="float16")
+
+    assert len(loads) == 3
+    assert len(registry) == 3
+
+
+def test_warmup_preloads_models():
+    registry, loads = make_registry()
+
+    registry.warmup(["base", "turbo"], device="cpu")
+    registry.get("turbo", device="cpu")
+
+    assert [load[0] for load in loads] == ["base", "turbo"]
+
+
+def test_lru_eviction_under_memory_budget():
+    registry, loads = make_registry(
+        memory_budget=10, sizes={"base": 4, "small": 4, "turbo": 6}
+    )
+
+    registry.get("base", device="cpu")
+    registry.get("small", device="cpu")
+    registry.get("base", device="cpu")  # base is now most recently used
+    registry.get("turbo", device="cpu")
+
+    assert ("small", "cpu", "float32") not in registry
+    assert ("base", "cpu", "float32") in registry
+    assert registry.memory_usage == 10
+
+
+def test_oversized_model_is_kept():
+    registry, _ = make_registry(memory_budget=1, sizes={"turbo": 5})
+
+    model = registry.get("turbo", device="cpu")
+
+    assert registry.keys() == [("turbo", "cpu", "float32")]
+    assert registry.get("turbo", device="cpu") is model
+
+
+def test_transcribe_audio_uses_shared_registry(tmp_path):
+    from src.transcribe import transcribe_audio
+
+    with patch("src.transcribe.get_model") as mock_get_model:
+        mock_get_model.return_value.transcribe.return_value = {"segments": []}
+        transcribe_audio(tmp_path / "audio.mp3", model_str="base")
+        transcribe_audio(tmp_path / "audio.mp3", model_str="base")
+
+    assert mock_get_model.call_count == 2
+    mock_get_model.assert_called_with("base")
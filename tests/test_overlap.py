@@ -0,0 +1,135 @@
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+
+from src.audio import SAMPLE_RATE
+from src.chunk_audio import chunk_boundaries, stream_chunks, transcribe_chunks
+from src.overlap import merge_overlap
+
+# One word every half second
+SCRIPT = "the quick brown fox jumps over the lazy dog while the cat sleeps".split()
+
+
+def heard(start: float, end: float, words_per_segment: int = 4) -> list[dict]:
+    """Segments with word timestamps for the script words between two times."""
+    words = [
+        {"word": f" {word}", "start": i * 0.5, "end": i * 0.5 + 0.4, "probability": 0.9}
+        for i, word in enumerate(SCRIPT)
+        if start <= i * 0.5 and i * 0.5 + 0.4 <= end
+    ]
+    return [
+        {
+            "start": group[0]["start"],
+            "end": group[-1]["end"],
+            "text": "".join(w["word"] for w in group),
+            "words": group,
+        }
+        for group in (
+            words[i : i + words_per_segment]
+            for i in range(0, len(words), words_per_segment)
+        )
+    ]
+
+
+def text(segments: list[dict]) -> str:
+    return "".join(s["text"] for s in segments).split()
+
+
+def test_merge_overlap_aligns_words():
+    left = heard(0.0, 3.5)
+    # The right chunk starts at 2.0s and clips the first word it hears
+    right = heard(2.0, 6.0, words_per_segment=3)
+    right[0]["text"] = " ox" + right[0]["text"][4:]
+    right[0]["words"][0] = {**right[0]["words"][0], "word": " ox"}
+
+    kept_left, kept_right = merge_overlap(left, right, 2.0, 3.5)
+
+    assert text(kept_left + kept_right) == SCRIPT[:12]
+    starts = [s["start"] for s in kept_left + kept_right]
+    ends = [s["end"] for s in kept_left + kept_right]
+    assert starts == sorted(starts)
+    assert all(end <= start for end, start in zip(ends, starts[1:]))
+
+
+def test_merge_overlap_segments_without_words():
+    left = [
+        {"start": 0.0, "end": 2.0, "text": " Hello there."},
+        {"start": 2.0, "end": 4.0, "text": " How are you?"},
+    ]
+    right = [
+        {"start": 2.1, "end": 4.0, "text": " how are you"},
+        {"start": 4.0, "end": 5.0, "text": " Fine."},
+    ]
+
+    kept_left, kept_right = merge_overlap(left, right, 1.5, 4.0)
+
+    assert [s["text"] for s in kept_left + kept_right] == [
+        " Hello there.",
+        " how are you",
+        " Fine.",
+    ]
+
+
+def test_merge_overlap_falls_back_to_middle():
+    left = [{"start": 1.0, "end": 2.0, "text": " one"}]
+    right = [
+        {"start": 1.2, "end": 1.8, "text": " um"},
+        {"start": 3.0, "end": 4.0, "text": " three"},
+    ]
+
+    kept_left, kept_right = merge_overlap(left, right, 0.0, 4.0)
+
+    assert [s["text"] for s in kept_left + kept_right] == [" one", " three"]
+
+
+def test_chunk_boundaries_overlap():
+    chunks = chunk_boundaries(25, chunk_duration=10, sr=1, overlap=2)
+
+    assert [(c.start, c.end) for c in chunks] == [(0, 12), (10, 22), (20, 25)]
+    assert chunk_boundaries(21, chunk_duration=10, sr=1, overlap=2)[-1].end == 21
+
+
+def test_stream_chunks_overlap():
+    pieces = [np.full(10 * SAMPLE_RATE, i, dtype=np.float32) for i in range(3)]
+
+    with patch("src.chunk_audio.stream_audio", return_value=iter(pieces)):
+        chunks = list(stream_chunks(Path("audio.mp3"), 10, overlap=2))
+
+    assert [(c.start // SAMPLE_RATE, c.end // SAMPLE_RATE) for c, _ in chunks] == [
+        (0, 10),
+        (8, 20),
+        (18, 30),
+    ]
+    assert all(len(audio) == c.end - c.start for c, audio in chunks)
+    assert chunks[1][1][0] == 0 and chunks[1][1][-1] == 1
+
+
+def test_transcribe_chunks_dedupes_overlap():
+    def fake_transcribe_chunk(audio, model_str, word_timestamps=False, language=None):
+        # Overlapping chunks are merged on their words
+        assert word_timestamps
+        # Which part of the script this chunk covers, on its own timeline
+        offset = float(audio[0])
+        duration = len(audio) / SAMPLE_RATE
+        segments = heard(offset, offset + duration)
+        for segment in segments:
+            segment["start"] -= offset
+            segment["end"] -= offset
+            segment["words"] = [
+                {**w, "start": w["start"] - offset, "end": w["end"] - offset}
+                for w in segment["words"]
+            ]
+        return segments
+
+    # Each sample holds the time it is at, so a chunk can tell where it starts
+    audio = (np.arange(7 * SAMPLE_RATE) / SAMPLE_RATE).astype(np.float32)
+    with patch("src.chunk_audio.load_audio", return_value=audio), patch(
+        "src.chunk_audio.transcribe_chunk", side_effect=fake_transcribe_chunk
+    ):
+        segments = transcribe_chunks(
+            Path("audio.mp3"), chunk_duration=2, max_workers=1, overlap=1
+        )
+
+    assert text(segments) == SCRIPT
+    assert all(a["end"] <= b["start"] for a, b in zip(segments, segments[1:]))
@@ -0,0 +1,75 @@
+import pytest
+
+from src.sections import (
+    clip_transcript,
+    merge_sections,
+    parse_section,
+    parse_timestamp,
+    shift_segments,
+)
+from tests.segments import TEST_SEGMENTS
+
+
+def test_parse_timestamp():
+    assert parse_timestamp("90") == 90.0
+    assert parse_timestamp("40:00") == 2400.0
+    assert parse_timestamp("1:02:03.5") == 3723.5
+    with pytest.raises(ValueError):
+        parse_timestamp("ten")
+
+
+def test_parse_section():
+    assert parse_section("40:00-55:00") == (2400.0, 3300.0)
+    assert parse_section("1:00:00-") == (3600.0, None)
+    assert parse_section("-30") == (0.0, 30.0)
+    with pytest.raises(ValueError):
+        parse_section("55:00-40:00")
+    with pytest.raises(ValueError):
+        parse_section("40:00")
+
+
+def test_merge_sections():
+    sections = [(100.0, None), (50.0, 60.0), (0.0, 10.0), (55.0, 70.0), (120.0, 130.0)]
+
+    assert merge_sections(sections) == [(0.0, 10.0), (50.0, 70.0), (100.0, None)]
+
+
+def test_clip_transcript():
+    transcript = {"segments": TEST_SEGMENTS, "text": "", "language": "en"}
+    start, end = TEST_SEGMENTS[1]["start"], TEST_SEGMENTS[1]["end"]
+
+    clipped = clip_transcript(transcript, [(start, end)])
+
+    assert clipped["segments"] == [TEST_SEGMENTS[1]]
+    assert clipped["text"] == TEST_SEGMENTS[1]["text"].strip()
+    assert clipped["language"] == "en"
+
+
+def test_clip_transcript_keeps_caption_words_apart():
+    captions = [
+        {"start": 0.0, "end": 1.0, "text": "hello"},
+        {"start": 1.0, "end": 2.0, "text": "world"},
+        {"start": 5.0, "end": 6.0, "text": "later"},
+    ]
+    transcript = {"segments": captions, "text": "hello world later"}
+
+    clipped = clip_transcript(transcript, [(0.0, 2.0)])
+
+    assert clipped["text"] == "hello world"
+
+
+def test_shift_segments():
+    segments = [
+        {
+            "start": 1.0,
+            "end": 2.0,
+            "text": " hi",
+            "words": [{"word": " hi", "start": 1.0, "end": 2.0}],
+        }
+    ]
+
+    shifted = shift_segments(segments, 60.0)
+
+    assert (shifted[0]["start"], shifted[0]["end"]) == (61.0, 62.0)
+    assert shifted[0]["words"][0]["start"] == 61.0
+    assert segments[0]["start"] == 1.0
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from src.segments import SegmentStore
+from tests.segments import TEST_SEGMENTS
+
+
+@pytest.fixture
+def store():
+    return SegmentStore.from_segments(TEST_SEGMENTS, keep_tokens=True)
+
+
+def test_round_trip(store):
+    segments = store.to_segments()
+
+    assert len(store) == len(TEST_SEGMENTS)
+    for packed, original in zip(segments, TEST_SEGMENTS):
+        assert packed["start"] == original["start"]
+        assert packed["text"] == original["text"]
+        assert packed["tokens"] == original["tokens"]
+        assert packed["avg_logprob"] == pytest.approx(original["avg_logprob"])
+        assert [w["word"] for w in packed["words"]] == [
+            w["word"] for w in original["words"]
+        ]
+    assert store.full_text() == "".join(s["text"] for s in TEST_SEGMENTS)
+
+
+def test_tokens_dropped_by_default():
+    assert "tokens" not in SegmentStore.from_segments(TEST_SEGMENTS)[0]
+
+
+def test_shift_moves_segments_and_words(store):
+    shifted = store.shift(300.0)
+
+    np.testing.assert_allclose(shifted.start, store.start + 300.0)
+    np.testing.assert_allclose(shifted.words.end, store.words.end + 300.0)
+    assert shifted[1]["words"][0]["start"] == store[1]["words"][0]["start"] + 300.0
+    # The original is left alone
+    assert store[0]["start"] == 0.0
+
+
+def test_concat_sort_and_slice(store):
+    merged = SegmentStore.concat([store.shift(10.0), store]).sort()
+
+    assert merged.texts() == [TEST_SEGMENTS[0]["text"], TEST_SEGMENTS[1]["text"]] * 2
+    assert list(merged.start) == sorted(merged.start)
+    assert [len(s["words"]) for s in merged] == [
+        len(s["words"]) for s in TEST_SEGMENTS
+    ] * 2
+
+    tail = merged[2:]
+    assert len(tail) == 2
+    assert tail[0]["start"] == 10.0
+    assert merged[merged.start >= 10.0].texts() == tail.texts()
+
+
+def test_concat_drops_columns_missing_from_any_store(store):
+    bare = SegmentStore.from_segments([{"start": 0.0, "end": 1.0, "text": " é"}])
+
+    merged = SegmentStore.concat([store, bare])
+
+    assert merged.words is None and merged.score is None
+    assert merged[-1] == {"start": 0.0, "end": 1.0, "text": " é"}
+    assert SegmentStore.concat([]).to_segments() == []
+
+
+def test_save_and_load(store, tmp_path):
+    path = store.save(tmp_path / "segments.npz")
+
+    loaded = SegmentStore.load(path)
+
+    assert loaded.to_segments() == store.to_segments()
@@ -0,0 +1,144 @@
+import threading
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from src.captions import CaptionResult
+from src.server import (
+    TranscriptionServer,
+    TranscriptionService,
+    cancel_job,
+    get_job,
+    list_jobs,
+    make_job_runner,
+    submit_job,
+    wait_for_job,
+)
+
+
+@pytest.fixture
+def server_for():
+    started = []
+
+    def start(runner, concurrency=1):
+        service = TranscriptionService(runner, concurrency=concurrency).start()
+        server = TranscriptionServer(service, port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        started.append((server, service))
+        return server
+
+    yield start
+    for server, service in started:
+        server.shutdown()
+        server.server_close()
+        service.stop()
+
+
+def test_submit_and_wait(server_for, tmp_path):
+    def runner(job):
+        job.report("transcribe", 0.5)
+        output = tmp_path / f"{job.id}.txt"
+        output.write_text(job.url)
+        return output
+
+    server = server_for(runner)
+
+    job = submit_job("https://youtu.be/abc", server.url)
+    updates = []
+    job = wait_for_job(
+        job["id"], server.url, poll_interval=0.01, on_update=updates.append
+    )
+
+    assert job["status"] == "done"
+    assert job["progress"] == 1.0
+    assert Path(job["output"]).read_text() == "https://youtu.be/abc"
+    assert [j["id"] for j in list_jobs(server.url)] == [job["id"]]
+
+
+def test_priority_order_and_cancel(server_for, tmp_path):
+    release = threading.Event()
+    order = []
+
+    def runner(job):
+        if job.url == "blocker":
+            release.wait(5)
+        order.append(job.url)
+        return tmp_path / job.url
+
+    server = server_for(runner, concurrency=1)
+    blocker = submit_job("blocker", server.url)
+    low = submit_job("low", server.url, priority=0)
+    high = submit_job("high", server.url, priority=5)
+    dropped = submit_job("dropped", server.url, priority=9)
+
+    assert cancel_job(dropped["id"], server.url)["status"] == "cancelled"
+    release.set()
+    for job in (blocker, low, high):
+        wait_for_job(job["id"], server.url, poll_interval=0.01)
+
+    assert order == ["blocker", "high", "low"]
+    assert get_job(dropped["id"], server.url)["status"] == "cancelled"
+
+
+def test_running_job_cancel_and_failure(server_for):
+    def runner(job):
+        if job.url == "broken":
+            raise RuntimeError("no audio")
+        while True:
+            job.report("transcribe", 0.1)
+            job.cancel.wait(0.01)
+
+    server = server_for(runner, concurrency=2)
+    broken = submit_job("broken", server.url)
+    slow = submit_job("slow", server.url)
+
+    assert wait_for_job(broken["id"], server.url, poll_interval=0.01)["error"] == (
+        "no audio"
+    )
+    while get_job(slow["id"], server.url)["status"] != "running":
+        pass
+    cancel_job(slow["id"], server.url)
+    assert wait_for_job(slow["id"], server.url, poll_interval=0.01)["status"] == (
+        "cancelled"
+    )
+
+
+def test_bad_requests(server_for):
+    server = server_for(lambda job: None)
+
+    with pytest.raises(RuntimeError, match="Unknown job options"):
+        submit_job("https://youtu.be/abc", server.url, options={"beam": 5})
+    with pytest.raises(RuntimeError, match="Not found"):
+        get_job("missing", server.url)
+
+
+def test_job_runner_uses_captions(tmp_path):
+    transcript = {
+        "segments": [{"start": 0.0, "end": 1.0, "text": " hello"}],
+        "text": " hello",
+        "language": "en",
+    }
+    runner, close = make_job_runner(tmp_path, warmup=False)
+    service = TranscriptionService(runner).start()
+
+    with patch(
+        "src.server.get_video_info", return_value={"id": "abc", "title": "A Talk"}
+    ), patch(
+        "src.server.fetch_captions",
+        return_value=CaptionResult("abc", "ok", transcript=transcript),
+    ), patch(
+        "src.server.download_audio"
+    ) as download:
+        job = service.submit(
+            "https://www.youtube.com/watch?v=abc", options={"output_format": "srt"}
+        )
+        while job.status in ("queued", "running"):
+            threading.Event().wait(0.01)
+    service.stop()
+    close()
+
+    assert job.status == "done" and job.source == "captions"
+    assert Path(job.output) == tmp_path / "a_talk.srt"
+    assert "hello" in Path(job.output).read_text()
+    download.assert_not_called()
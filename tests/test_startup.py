@@ -0,0 +1,69 @@
+import subprocess
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).parents[1]
+
+# Total import time allowed for the CLI. Loading torch alone takes well over this.
+IMPORT_BUDGET_SECONDS = 1.5
+
+# Only needed once the Whisper fallback actually runs
+WHISPER_MODULES = {"torch", "whisper", "pydub"}
+
+CAPTION_PATH_SCRIPT = """
+import sys
+from unittest.mock import patch
+
+from click.testing import CliRunner
+
+import ytt
+from src.captions import CaptionResult
+
+transcript = {
+    "segments": [{"start": 0.0, "end": 1.0, "text": " hello"}],
+    "text": " hello",
+    "language": "en",
+}
+with patch(
+    "src.captions.fetch_captions",
+    return_value=CaptionResult("dQw4w9WgXcQ", "ok", transcript=transcript),
+), patch("ytt.get_video_info", return_value={"id": "dQw4w9WgXcQ", "title": "Test"}):
+    url = "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+    result = CliRunner().invoke(ytt.cli, [url, "-d", sys.argv[1], "--no-cache"])
+assert result.exit_code == 0, result.output
+"""
+
+
+def import_profile(*args: str) -> tuple[set[str], float]:
+    """Run python -X importtime, returning the modules imported and the total import time."""
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules, total_us = set(), 0
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        modules.add(name.strip().split(".")[0])
+        if not name.startswith("  "):  # top-level imports include their children
+            total_us += int(cumulative)
+    return modules, total_us / 1e6
+
+
+def test_help_does_not_import_backends():
+    modules, seconds = import_profile("ytt.py", "--help")
+
+    assert not modules & (WHISPER_MODULES | {"yt_dlp", "youtube_transcript_api"})
+    assert seconds < IMPORT_BUDGET_SECONDS
+
+
+def test_caption_path_does_not_import_whisper(tmp_path):
+    modules, seconds = import_profile("-c", CAPTION_PATH_SCRIPT, str(tmp_path))
+
+    assert not modules & WHISPER_MODULES
+    assert seconds < IMPORT_BUDGET_SECONDS
+    assert (tmp_path / "test.txt").exists()
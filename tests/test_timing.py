@@ -0,0 +1,19 @@
+import pytest
+
+from src.timing import StageTimer
+
+
+def test_stage_timer_accumulates_stages():
+    timer = StageTimer()
+
+    with timer.stage("download"):
+        pass
+    with timer.stage("download"):
+        pass
+    with pytest.raises(ValueError):
+        with timer.stage("transcribe"):
+            raise ValueError
+
+    assert list(timer.timings) == ["download", "transcribe"]
+    assert all(elapsed >= 0 for elapsed in timer.timings.values())
+    assert timer.summary().startswith("download=")
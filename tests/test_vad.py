@@ -0,0 +1,86 @@
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+
+from src.audio import SAMPLE_RATE
+from src.chunk_audio import speech_chunk_boundaries, transcribe_chunks
+from src.vad import FRAME_SECONDS, frame_energy_db, speech_regions, speech_spans
+
+rng = np.random.default_rng(0)
+
+
+def speech(seconds: float) -> np.ndarray:
+    return (rng.standard_normal(int(seconds * SAMPLE_RATE)) * 0.1).astype(np.float32)
+
+
+def silence(seconds: float) -> np.ndarray:
+    return (rng.standard_normal(int(seconds * SAMPLE_RATE)) * 1e-4).astype(np.float32)
+
+
+def test_frame_energy_db():
+    audio = np.concatenate([np.full(480, 0.1), np.zeros(480), np.ones(100)])
+
+    energy = frame_energy_db(audio.astype(np.float32), 480, block_frames=1)
+
+    np.testing.assert_allclose(energy, [-20.0, -120.0], atol=1e-4)
+
+
+def test_speech_regions_bridge_short_pauses_and_drop_clicks():
+    energy = np.full(1000, -90.0)
+    energy[100:200] = energy[205:300] = -20.0  # a 0.15s pause
+    energy[600:602] = -20.0  # a click
+
+    regions = speech_regions(energy, pad=FRAME_SECONDS * 5)
+
+    assert regions == [(95, 305)]
+
+
+def test_speech_spans_skip_silence_and_cut_in_pauses():
+    audio = np.concatenate(
+        [silence(5), speech(10), silence(60), speech(10), silence(1), speech(25)]
+    )
+
+    spans = [
+        (start / SAMPLE_RATE, end / SAMPLE_RATE)
+        for start, end in speech_spans(audio, 30)
+    ]
+
+    # The minute of silence is never transcribed, and the 1s pause is where
+    # the last 36s of speech is cut to keep chunks under 30s
+    assert len(spans) == 3
+    assert 4.5 < spans[0][0] < 5.0 and 15.0 < spans[0][1] < 15.5
+    assert 74.5 < spans[1][0] < 75.0 and 85.0 < spans[1][1] < 86.0
+    assert 85.0 < spans[2][0] < 86.0 and spans[2][1] == 111.0
+    assert sum(end - start for start, end in spans) < 50
+
+
+def test_speech_spans_split_long_speech():
+    audio = speech(100)
+
+    spans = speech_spans(audio, 30)
+
+    assert spans[0][0] == 0 and spans[-1][1] == len(audio)
+    assert all(a[1] == b[0] for a, b in zip(spans, spans[1:]))
+    assert all(end - start <= 30 * SAMPLE_RATE for start, end in spans)
+
+
+def test_transcribe_chunks_vad_keeps_original_timeline():
+    audio = np.concatenate([silence(60), speech(5), silence(60), speech(5)])
+
+    def fake_transcribe_chunk(
+        chunk_audio, model_str, word_timestamps=False, language=None
+    ):
+        return [{"start": 0.5, "end": 1.0, "text": " hi"}]
+
+    with patch("src.chunk_audio.load_audio", return_value=audio), patch(
+        "src.chunk_audio.transcribe_chunk", side_effect=fake_transcribe_chunk
+    ) as fake:
+        segments = transcribe_chunks(
+            Path("audio.mp3"), chunk_duration=30, max_workers=1, vad=True
+        )
+
+    chunks = speech_chunk_boundaries(audio, 30)
+    assert fake.call_count == len(chunks) == 2
+    assert [s["start"] for s in segments] == [c.offset + 0.5 for c in chunks]
+    assert 59 < segments[0]["start"] < 61 and 124 < segments[1]["start"] < 126
@@ -1,8 +1,11 @@
+import asyncio
+import threading
 from pathlib import Path
-from unittest.mock import patch
+from unittest.mock import ANY, patch
 
 import pytest
 
+from src.segments import SegmentStore
 from tests.segments import TEST_SEGMENTS
 from ytt import get_downloads_dir, main
 
@@ -80,3 +83,596 @@ def test_main_without_timestamps(mock_dependencies, tmp_path):
             ],
         )
     assert result.exit_code == 0
+
+
+def test_main_workers_uses_chunked_transcription(tmp_path):
+    from click.testing import CliRunner
+
+    audio_path = tmp_path / "video.mp3"
+    audio_path.touch()
+
+    info = {"id": "test", "title": "Test", "language": "de"}
+    with patch("ytt.extract_transcript", return_value=None), patch(
+        "ytt.get_video_info", return_value=info
+    ), patch("ytt.download_audio", return_value=audio_path), patch(
+        "ytt.iter_transcribed_chunks",
+        return_value=iter([SegmentStore.from_segments(TEST_SEGMENTS[:1])]),
+    ) as mock_chunks, patch(
+        "ytt.transcribe_audio"
+    ) as mock_transcribe:
+        result = CliRunner().invoke(
+            main,
+            [
+                "https://www.youtube.com/watch?v=test",
+                "--output",
+                "test.txt",
+                "--output-dir",
+                str(tmp_path),
+                "--workers",
+                "4",
+                "--chunk-duration",
+                "60",
+            ],
+        )
+
+    assert result.exit_code == 0, result.output
+    mock_chunks.assert_called_once_with(
+        audio_path,
+        chunk_duration=60,
+        max_workers=4,
+        model_str="turbo",
+        stream=False,
+        cancel=None,
+        batch_size=None,
+        checkpoint_dir=ANY,
+        resume=False,
+        vad=False,
+        overlap=0.0,
+        http_headers=None,
+        source_id=None,
+        cascade=None,
+        word_timestamps=False,
+        language="de",
+        skip_failed=False,
+    )
+    mock_transcribe.assert_not_called()
+    assert "Japan invades Manchuria" in (tmp_path / "test.txt").read_text()
+
+
+def test_main_stream_download_transcribes_the_media_url(tmp_path):
+    from click.testing import CliRunner
+
+    headers = {"User-Agent": "test"}
+    with patch("ytt.extract_transcript", return_value=None), patch(
+        "ytt.get_video_info", return_value={"id": "test", "title": "Test"}
+    ), patch(
+        "ytt.get_audio_stream", return_value=("https://media/audio", headers)
+    ), patch(
+        "ytt.download_audio"
+    ) as mock_download, patch(
+        "ytt.resolve_language", return_value="fr"
+    ) as mock_language, patch(
+        "ytt.iter_transcribed_chunks",
+        return_value=iter([SegmentStore.from_segments(TEST_SEGMENTS[:1])]),
+    ) as mock_chunks:
+        result = CliRunner().invoke(
+            main,
+            [
+                "https://www.youtube.com/watch?v=test",
+                "-o",
+                "test.txt",
+                "-d",
+                str(tmp_path),
+                "--stream-download",
+            ],
+        )
+
+    assert result.exit_code == 0, result.output
+    mock_download.assert_not_called()
+    assert mock_chunks.call_args.args == ("https://media/audio",)
+    assert mock_chunks.call_args.kwargs["stream"] is True
+    assert mock_chunks.call_args.kwargs["http_headers"] == headers
+    assert mock_chunks.call_args.kwargs["source_id"] == "test"
+    # The language is detected once, from the start of the stream
+    assert mock_language.call_args.args[0] == "https://media/audio"
+    assert mock_language.call_args.args[3] == headers
+    assert mock_chunks.call_args.kwargs["language"] == "fr"
+    assert "Japan invades Manchuria" in (tmp_path / "test.txt").read_text()
+
+
+def test_main_keep_audio_exports_mp3_from_native_download(tmp_path):
+    from click.testing import CliRunner
+
+    audio_path = tmp_path / "video.webm"
+    audio_path.touch()
+
+    with patch("ytt.extract_transcript", return_value=None), patch(
+        "ytt.get_video_info", return_value={"id": "test", "title": "Test"}
+    ), patch("ytt.download_audio", return_value=audio_path) as mock_download, patch(
+        "ytt.transcribe_audio",
+        return_value={"text": " hi", "segments": TEST_SEGMENTS[:1]},
+    ), patch(
+        "ytt.export_mp3"
+    ) as mock_export, patch(
+        "ytt.Path.home", return_value=tmp_path
+    ):
+        result = CliRunner().invoke(
+            main,
+            [
+                "https://www.youtube.com/watch?v=test",
+                "-o",
+                "test.txt",
+                "-d",
+                str(tmp_path),
+                "--keep-audio",
+            ],
+        )
+
+    assert result.exit_code == 0, result.output
+    assert mock_download.call_args.kwargs["audio_format"] == "native"
+    mock_export.assert_called_once_with(
+        audio_path, tmp_path / "Downloads" / "video.mp3"
+    )
+
+
+def test_main_stored_transcript_skips_captions_and_download(tmp_path):
+    from click.testing import CliRunner
+
+    from src.cache import get_transcript_store
+
+    get_transcript_store().put(
+        {"text": " stored", "segments": TEST_SEGMENTS[:1], "language": "en"},
+        "DTOU3vchBE0",
+        "whisper",
+        "turbo",
+        {"chunk_duration": None},
+    )
+
+    with patch("ytt.extract_transcript") as mock_extract, patch(
+        "ytt.download_audio"
+    ) as mock_download:
+        result = CliRunner().invoke(
+            main,
+            [
+                "https://www.youtube.com/watch?v=DTOU3vchBE0",
+                "-o",
+                "test.txt",
+                "-d",
+                str(tmp_path),
+            ],
+        )
+
+    assert result.exit_code == 0, result.output
+    mock_extract.assert_not_called()
+    mock_download.assert_not_called()
+    assert "Japan invades Manchuria" in (tmp_path / "test.txt").read_text()
+
+
+def test_main_stores_whisper_transcript(tmp_path):
+    from click.testing import CliRunner
+
+    from src.cache import get_transcript_store
+
+    audio_path = tmp_path / "video.webm"
+    audio_path.touch()
+    transcript = {"text": " hi", "segments": TEST_SEGMENTS[:1], "language": "en"}
+
+    with patch("ytt.extract_transcript", return_value=None), patch(
+        "ytt.get_video_info", return_value={"id": "DTOU3vchBE0", "title": "Test"}
+    ), patch("ytt.download_audio", return_value=audio_path), patch(
+        "ytt.transcribe_audio", return_value=transcript
+    ):
+        args = ["https://www.youtube.com/watch?v=DTOU3vchBE0", "-d", str(tmp_path)]
+        result = CliRunner().invoke(main, args + ["--model", "base"])
+
+    assert result.exit_code == 0, result.output
+    stored = get_transcript_store().get(
+        "DTOU3vchBE0", "whisper", "base", {"chunk_duration": None}
+    )
+    assert stored["text"] == " hi"
+    assert stored["segments"][0]["words"][0]["word"] == " Japan"
+
+
+def test_main_start_filters_captions(tmp_path):
+    from click.testing import CliRunner
+
+    transcript = {"text": "", "segments": TEST_SEGMENTS, "language": "en"}
+    with patch("ytt.extract_transcript", return_value=transcript), patch(
+        "ytt.download_audio"
+    ) as mock_download:
+        result = CliRunner().invoke(
+            main,
+            [
+                "https://www.youtube.com/watch?v=DTOU3vchBE0",
+                "-o",
+                "test.txt",
+                "-d",
+                str(tmp_path),
+                "--start",
+                "0:06",
+            ],
+        )
+
+    assert result.exit_code == 0, result.output
+    mock_download.assert_not_called()
+    output = (tmp_path / "test.txt").read_text()
+    assert "Japan invades Manchuria" not in output
+    assert output.startswith("[00:00:05 -> 00:00:09] them as part")
+
+
+def test_main_sections_download_and_transcribe_only_those_ranges(tmp_path):
+    from click.testing import CliRunner
+
+    def fake_download(url, output_path, section=None, **kwargs):
+        path = tmp_path / f"video_{section[0]:g}s.webm"
+        path.touch()
+        return path
+
+    info = {"id": "test", "title": "Test", "language": "en-US"}
+    with patch("ytt.extract_transcript", return_value=None), patch(
+        "ytt.get_video_info", return_value=info
+    ), patch("ytt.download_audio", side_effect=fake_download) as mock_download, patch(
+        "ytt.transcribe_audio",
+        return_value={"text": " hi", "segments": TEST_SEGMENTS[:1], "language": "en"},
+    ) as mock_transcribe:
+        result = CliRunner().invoke(
+            main,
+            [
+                "https://www.youtube.com/watch?v=test",
+                "-o",
+                "test.txt",
+                "-d",
+                str(tmp_path),
+                "--section",
+                "1:00:00-1:10:00",
+                "--section",
+                "40:00-55:00",
+            ],
+        )
+
+    assert result.exit_code == 0, result.output
+    assert [c.kwargs["section"] for c in mock_download.call_args_list] == [
+        (2400.0, 3300.0),
+        (3600.0, 4200.0),
+    ]
+    # Both sections are transcribed in the one language
+    assert [c.kwargs["kwargs"]["language"] for c in mock_transcribe.call_args_list] == [
+        "en",
+        "en",
+    ]
+    lines = (tmp_path / "test.txt").read_text().splitlines()
+    assert [line[:24] for line in lines] == [
+        "[00:40:00 -> 00:40:05] J",
+        "[01:00:00 -> 01:00:05] J",
+    ]
+
+
+def test_cli_defaults_to_transcribe_command(tmp_path):
+    from click.testing import CliRunner
+
+    from ytt import cli
+
+    with patch("ytt.extract_transcript", return_value=None), patch(
+        "ytt.get_video_info", return_value={"id": "test", "title": "Test"}
+    ), patch("ytt.download_audio", return_value=tmp_path / "video.webm"), patch(
+        "ytt.transcribe_audio",
+        return_value={"text": " hi", "segments": TEST_SEGMENTS[:1]},
+    ):
+        (tmp_path / "video.webm").touch()
+        result = CliRunner().invoke(
+            cli, ["https://www.youtube.com/watch?v=test", "-d", str(tmp_path)]
+        )
+
+    assert result.exit_code == 0, result.output
+    assert (tmp_path / "test.txt").exists()
+
+
+def test_cli_batch_command(tmp_path):
+    from click.testing import CliRunner
+
+    from src.batch import BatchItem
+    from ytt import cli
+
+    url_file = tmp_path / "urls.txt"
+    url_file.write_text("https://www.youtube.com/watch?v=aaaaaaaaaaa\n")
+
+    with patch(
+        "ytt.run_batch",
+        return_value=[BatchItem(url="https://www.youtube.com/watch?v=aaaaaaaaaaa")],
+    ) as mock_run:
+        result = CliRunner().invoke(
+            cli, ["batch", str(url_file), "-d", str(tmp_path), "--workers", "2"]
+        )
+
+    assert result.exit_code == 0, result.output
+    assert mock_run.call_args.args[0] == ["https://www.youtube.com/watch?v=aaaaaaaaaaa"]
+    assert mock_run.call_args.kwargs["transcribe_workers"] == 2
+
+
+def test_cli_align_command(tmp_path):
+    from click.testing import CliRunner
+
+    from ytt import cli
+
+    transcript = tmp_path / "talk.txt"
+    transcript.write_text("[00:00:00 -> 00:00:05] Japan invades Manchuria\n")
+    audio = tmp_path / "talk.mp3"
+    audio.touch()
+
+    def fake_align(audio, segments, model_str, language):
+        return [{**segments[0], "words": TEST_SEGMENTS[0]["words"][:3]}]
+
+    with patch("ytt.load_audio") as mock_load, patch(
+        "ytt.align_words", side_effect=fake_align
+    ):
+        result = CliRunner().invoke(cli, ["align", str(transcript), str(audio)])
+
+    assert result.exit_code == 0, result.output
+    mock_load.assert_called_once_with(str(audio))
+    cues = (tmp_path / "talk.words.srt").read_text().strip().split("\n\n")
+    assert [cue.splitlines()[-1] for cue in cues] == ["Japan", "invades", "Manchuria"]
+
+
+def test_main_hedged_audio_wins_when_captions_stall(tmp_path):
+    from click.testing import CliRunner
+
+    from src.captions import CaptionResult
+
+    async def stalled_captions(video_id):
+        await asyncio.sleep(10)
+        return CaptionResult(video_id, "error")
+
+    audio_path = tmp_path / "video.webm"
+    audio_path.touch()
+
+    info = {"id": "DTOU3vchBE0", "title": "Test", "language": "en"}
+    with patch("ytt.fetch_captions_async", side_effect=stalled_captions), patch(
+        "ytt.extract_transcript"
+    ) as mock_extract, patch("ytt.get_video_info", return_value=info), patch(
+        "ytt.download_audio", return_value=audio_path
+    ) as mock_download, patch(
+        "ytt.iter_transcribed_chunks",
+        return_value=iter([SegmentStore.from_segments(TEST_SEGMENTS[:1])]),
+    ) as mock_chunks:
+        result = CliRunner().invoke(
+            main,
+            [
+                "https://www.youtube.com/watch?v=DTOU3vchBE0",
+                "-o",
+                "test.txt",
+                "-d",
+                str(tmp_path),
+                "--hedge-after",
+                "0.01",
+            ],
+        )
+
+    assert result.exit_code == 0, result.output
+    assert "Hedged run won by: audio" in result.output
+    assert mock_download.call_args.kwargs["cancel"] is not None
+    # Hedged audio is transcribed chunk by chunk, so it can be stopped
+    assert mock_chunks.call_args.kwargs["cancel"] is not None
+    mock_extract.assert_not_called()
+
+
+def test_main_hedge_that_lost_during_download_does_not_transcribe(
+    tmp_path, isolated_cache_dir
+):
+    from click.testing import CliRunner
+
+    from src.captions import CaptionResult, to_whisper_format
+
+    started = threading.Event()
+
+    def fake_download(url, output_path, cancel=None, **kwargs):
+        started.set()
+        # The download completes just as the captions win
+        cancel.wait(5)
+        path = Path(output_path) / "video.webm"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.touch()
+        return path
+
+    async def late_captions(video_id):
+        while not started.is_set():
+            await asyncio.sleep(0.01)
+        captions = [{"text": "hi", "start": 0.0, "duration": 1.0}]
+        return CaptionResult(video_id, "ok", transcript=to_whisper_format(captions))
+
+    info = {"id": "DTOU3vchBE0", "title": "Test", "language": "en"}
+    with patch("ytt.fetch_captions_async", side_effect=late_captions), patch(
+        "ytt.get_video_info", return_value=info
+    ), patch("ytt.download_audio", side_effect=fake_download), patch(
+        "ytt.iter_transcribed_chunks"
+    ) as mock_chunks, patch(
+        "ytt.transcribe_audio"
+    ) as mock_transcribe:
+        result = CliRunner().invoke(
+            main,
+            [
+                "https://www.youtube.com/watch?v=DTOU3vchBE0",
+                "-o",
+                "test.txt",
+                "-d",
+                str(tmp_path),
+                "--hedge-after",
+                "0",
+            ],
+        )
+
+    assert result.exit_code == 0, result.output
+    assert "Hedged run won by: captions" in result.output
+    mock_chunks.assert_not_called()
+    mock_transcribe.assert_not_called()
+    jobs_dir = isolated_cache_dir / "jobs"
+    assert not jobs_dir.exists() or not any(jobs_dir.iterdir())
+
+
+def test_main_hedged_chunked_run_cancelled_during_download_is_removed(
+    tmp_path, isolated_cache_dir
+):
+    from click.testing import CliRunner
+    from yt_dlp.utils import DownloadCancelled
+
+    from src.captions import CaptionResult, to_whisper_format
+
+    started = threading.Event()
+
+    def fake_download(url, output_path, cancel=None, **kwargs):
+        Path(output_path).mkdir(parents=True, exist_ok=True)
+        (Path(output_path) / "partial.webm.part").touch()
+        started.set()
+        cancel.wait(5)
+        raise DownloadCancelled("Download cancelled")
+
+    async def late_captions(video_id):
+        while not started.is_set():
+            await asyncio.sleep(0.01)
+        captions = [{"text": "hi", "start": 0.0, "duration": 1.0}]
+        return CaptionResult(video_id, "ok", transcript=to_whisper_format(captions))
+
+    with patch("ytt.fetch_captions_async", side_effect=late_captions), patch(
+        "ytt.get_video_info", return_value={"id": "DTOU3vchBE0", "title": "Test"}
+    ), patch("ytt.download_audio", side_effect=fake_download):
+        result = CliRunner().invoke(
+            main,
+            [
+                "https://www.youtube.com/watch?v=DTOU3vchBE0",
+                "-o",
+                "test.txt",
+                "-d",
+                str(tmp_path),
+                "--hedge-after",
+                "0",
+                "--workers",
+                "2",
+            ],
+        )
+
+    assert result.exit_code == 0, result.output
+    assert "Hedged run won by: captions" in result.output
+    assert started.is_set()
+    jobs_dir = isolated_cache_dir / "jobs"
+    assert not jobs_dir.exists() or not any(jobs_dir.iterdir())
+
+
+def test_main_resume_reuses_the_first_runs_language(tmp_path):
+    from click.testing import CliRunner
+
+    audio_path = tmp_path / "video.webm"
+    audio_path.touch()
+    args = ["https://www.youtube.com/watch?v=test", "-o", "test.txt"]
+    args += ["-d", str(tmp_path), "--workers", "2"]
+
+    with patch("ytt.extract_transcript", return_value=None), patch(
+        "ytt.get_video_info", return_value={"id": "test", "title": "Test"}
+    ), patch("ytt.download_audio", return_value=audio_path), patch(
+        "ytt.resolve_language", side_effect=["de", "fr"]
+    ) as mock_language, patch(
+        "ytt.iter_transcribed_chunks",
+        side_effect=[
+            RuntimeError("worker died"),
+            iter([SegmentStore.from_segments(TEST_SEGMENTS[:1])]),
+        ],
+    ) as mock_chunks:
+        interrupted = CliRunner().invoke(main, args)
+        resumed = CliRunner().invoke(main, [*args, "--resume"])
+
+    assert interrupted.exit_code != 0
+    assert resumed.exit_code == 0, resumed.output
+    mock_language.assert_called_once()
+    assert [c.kwargs["language"] for c in mock_chunks.call_args_list] == ["de", "de"]
+
+
+def test_main_keeps_the_job_when_a_chunk_fails(tmp_path, isolated_cache_dir):
+    from click.testing import CliRunner
+
+    from src.cache import get_transcript_store
+    from src.chunk_audio import ChunksFailed
+
+    audio_path = tmp_path / "video.webm"
+    audio_path.touch()
+
+    def chunks_with_a_gap(*args, **kwargs):
+        yield SegmentStore.from_segments(TEST_SEGMENTS[:1])
+        raise ChunksFailed("Chunks 1 failed")
+
+    with patch("ytt.extract_transcript", return_value=None), patch(
+        "ytt.get_video_info", return_value={"id": "test", "language": "en"}
+    ), patch("ytt.download_audio", return_value=audio_path), patch(
+        "ytt.iter_transcribed_chunks", side_effect=chunks_with_a_gap
+    ):
+        result = CliRunner().invoke(
+            main,
+            [
+                "https://www.youtube.com/watch?v=test",
+                "-o",
+                "test.txt",
+                "-d",
+                str(tmp_path),
+                "--workers",
+                "2",
+            ],
+        )
+
+    assert result.exit_code != 0
+    assert "Chunks 1 failed" in result.output
+    assert "--resume" in result.output
+    assert any((isolated_cache_dir / "jobs").iterdir())
+    assert (
+        get_transcript_store().get("test", "whisper", "turbo", {"chunk_duration": 300})
+        is None
+    )
+
+
+def test_main_captions_replace_a_hedge_that_finished_writing(tmp_path):
+    from click.testing import CliRunner
+
+    import ytt
+    from src.captions import CaptionResult, to_whisper_format
+
+    written = threading.Event()
+    save_transcript_chunks = ytt.save_transcript_chunks
+
+    def slow_save(*args, **kwargs):
+        path = save_transcript_chunks(*args, **kwargs)
+        written.set()
+        # Captions win while the hedge is still finishing up
+        threading.Event().wait(0.3)
+        return path
+
+    async def late_captions(video_id):
+        while not written.is_set():
+            await asyncio.sleep(0.01)
+        captions = [{"text": "from captions", "start": 0.0, "duration": 1.0}]
+        return CaptionResult(video_id, "ok", transcript=to_whisper_format(captions))
+
+    audio_path = tmp_path / "video.webm"
+    audio_path.touch()
+    info = {"id": "DTOU3vchBE0", "title": "Test", "language": "en"}
+    with patch("ytt.fetch_captions_async", side_effect=late_captions), patch(
+        "ytt.get_video_info", return_value=info
+    ), patch("ytt.download_audio", return_value=audio_path), patch(
+        "ytt.iter_transcribed_chunks",
+        return_value=iter([SegmentStore.from_segments(TEST_SEGMENTS[:1])]),
+    ), patch(
+        "ytt.save_transcript_chunks", side_effect=slow_save
+    ):
+        result = CliRunner().invoke(
+            main,
+            [
+                "https://www.youtube.com/watch?v=DTOU3vchBE0",
+                "-o",
+                "test.txt",
+                "-d",
+                str(tmp_path),
+                "--hedge-after",
+                "0",
+            ],
+        )
+
+    assert result.exit_code == 0, result.output
+    assert "Hedged run won by: captions" in result.output
+    output = (tmp_path / "test.txt").read_text()
+    assert "from captions" in output
+    assert "Japan invades Manchuria" not in output
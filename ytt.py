@@ -1,16 +1,75 @@
+import asyncio
+import contextlib
 import os
+import shutil
 import tempfile
+import threading
 import warnings
 from pathlib import Path
-from typing import Optional
+from typing import Any, Callable, Optional
 
 import click
 from loguru import logger
-from youtube_transcript_api import YouTubeTranscriptApi
-from youtube_transcript_api._transcripts import TranscriptsDisabled
 
-from src.download import download_audio, get_video_title
-from src.format_transcript import format_transcript
+from src.align import align_words
+from src.audio import export_mp3, load_audio
+from src.batch import read_urls, run_batch
+from src.cache import get_info_cache, get_transcript_store, hash_file
+from src.captions import extract_transcript, fetch_captions_async
+from src.cascade import FAST_MODEL, CascadeThresholds
+from src.checkpoint import (
+    find_downloaded_audio,
+    find_job_language,
+    get_job_dir,
+    record_downloaded_audio,
+    record_job_language,
+)
+from src.chunk_audio import (
+    ChunksFailed,
+    TranscriptionCancelled,
+    iter_transcribed_chunks,
+)
+from src.download import (
+    AUDIO_FORMATS,
+    download_audio,
+    get_audio_stream,
+    get_video_id,
+    get_video_info,
+    get_video_title,
+)
+from src.format_transcript import (
+    FORMAT_SUFFIXES,
+    OUTPUT_FORMATS,
+    WORD_FORMATS,
+    load_transcript,
+    save_transcript,
+    save_transcript_chunks,
+)
+from src.hedge import has_captions, race_with_hedge
+from src.language import MIXED_LANGUAGE, resolve_language
+from src.segments import SegmentStore
+from src.sections import (
+    Section,
+    clip_transcript,
+    make_section,
+    merge_sections,
+    parse_section,
+    parse_timestamp,
+    shift_segments,
+)
+from src.server import (
+    DEFAULT_HOST,
+    DEFAULT_PORT,
+    DEFAULT_SERVER,
+    TranscriptionServer,
+    TranscriptionService,
+    get_job,
+    list_jobs,
+    make_job_runner,
+    submit_job,
+    wait_for_job,
+)
+from src.timing import StageTimer
 from src.transcribe import transcribe_audio
 
 
@@ -24,46 +83,34 @@ def get_downloads_dir():
         raise OSError(f"Unsupported operating system: {os.name}")
 
 
-def extract_transcript(url: str) -> Optional[dict]:
-    # Extract video_id from various YouTube URL formats
-    if "v=" in url:
-        video_id = url.split("v=")[1].split("&")[0]  # Handle URL parameters
-    elif "shorts/" in url:
-        video_id = url.split("shorts/")[1].split("?")[0]  # Handle shorts URLs
-    else:
-        logger.error(f"Could not extract video ID from URL: {url}")
+def _parse_option(parse: Callable[[str], Any], value: Optional[str]) -> Any:
+    """Run a parser from `src.sections` on an option value, as a click callback."""
+    if value is None:
         return None
-
     try:
-        transcript = YouTubeTranscriptApi.get_transcript(video_id)
-    except TranscriptsDisabled:
-        logger.info(
-            "Transcripts are disabled for this video. Reverting to download audio and whisper convert."
-        )
-        return None
-    except Exception as e:
-        logger.error(f"Failed to get transcript for video {video_id}: {e}")
-        return None
+        return parse(value)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
 
-    # Convert YouTube transcript format to match Whisper format
-    formatted_segments = []
-    full_text = []
-
-    for segment in transcript:
-        formatted_segments.append(
-            {
-                "start": segment["start"],
-                "end": segment["start"] + segment["duration"],
-                "text": segment["text"],
-            }
-        )
-        full_text.append(segment["text"])
 
-    return {
-        "segments": formatted_segments,
-        "text": " ".join(full_text),
-        "language": "en",  # YouTube transcripts are usually in the video's language
-    }
+class DefaultCommandGroup(click.Group):
+    """Group that runs `default_command` when the first argument is not a subcommand.
+
+    Keeps `ytt URL [OPTIONS]` working alongside subcommands like `ytt batch`.
+    """
+
+    def __init__(self, *args, default_command: str, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.default_command = default_command
+
+    def parse_args(self, ctx: click.Context, args: list[str]) -> list[str]:
+        if (
+            args
+            and args[0] not in self.commands
+            and args[0] not in ctx.help_option_names
+        ):
+            args = [self.default_command, *args]
+        return super().parse_args(ctx, args)
 
 
 @click.command()
@@ -73,7 +120,6 @@ def extract_transcript(url: str) -> Optional[dict]:
     "-o",
     help="Output file path for the transcript",
     default=None,
-    nargs="?",
 )
 @click.option(
     "--keep-audio/--no-keep-audio",
@@ -91,65 +137,853 @@ def extract_transcript(url: str) -> Optional[dict]:
     help="Save the transcript with timestamps",
     default=True,
 )
+@click.option(
+    "--format",
+    "output_format",
+    help="Transcript format (default: timestamps, or text with --no-timestamps)",
+    type=click.Choice(OUTPUT_FORMATS),
+    default=None,
+)
+@click.option(
+    "--workers",
+    "-w",
+    help="Number of worker processes for chunked transcription",
+    type=click.IntRange(min=1),
+    default=1,
+)
+@click.option(
+    "--chunk-duration",
+    help="Chunk length in seconds for chunked transcription (default 300 when --workers > 1)",
+    type=click.IntRange(min=1),
+    default=None,
+)
+@click.option(
+    "--batch-size",
+    help="Run 30 second windows through Whisper in batches of this size (implies chunked transcription)",
+    type=click.IntRange(min=1),
+    default=None,
+)
+@click.option(
+    "--overlap",
+    help="Seconds each chunk runs into the next, so words at chunk edges are not lost (implies chunked transcription)",
+    type=click.FloatRange(min=0),
+    default=None,
+)
+@click.option(
+    "--vad/--no-vad",
+    help="Detect speech first: cut chunks in pauses and skip silence and music (implies chunked transcription)",
+    default=False,
+)
+@click.option(
+    "--resume/--no-resume",
+    help="Continue an interrupted chunked transcription, only transcribing the chunks it did not finish (implies chunked transcription)",
+    default=False,
+)
+@click.option(
+    "--stream-decode/--no-stream-decode",
+    help="Decode audio chunk by chunk so memory use does not grow with video length",
+    default=False,
+)
+@click.option(
+    "--stream-download/--no-stream-download",
+    help="Transcribe while downloading: decode YouTube's audio stream straight into the chunked transcriber (implies --stream-decode)",
+    default=False,
+)
+@click.option(
+    "--audio-format",
+    help="Format to download audio in. 'native' keeps YouTube's opus/m4a stream without transcoding",
+    type=click.Choice(AUDIO_FORMATS),
+    default="native",
+)
+@click.option(
+    "--model",
+    "model_str",
+    help="Whisper model to transcribe with",
+    type=click.Choice(["base", "turbo"]),
+    default="turbo",
+)
+@click.option(
+    "--cascade/--no-cascade",
+    help="Transcribe with the base model first and re-transcribe only its low-confidence segments with --model",
+    default=False,
+)
+@click.option(
+    "--cascade-threshold",
+    help="With --cascade, re-transcribe segments whose average log probability is below this",
+    type=float,
+    default=CascadeThresholds().min_avg_logprob,
+    show_default=True,
+)
+@click.option(
+    "--language",
+    help=f"Language spoken in the video, e.g. de. Detected once per video by default; '{MIXED_LANGUAGE}' detects it in every chunk",
+    default=None,
+)
+@click.option(
+    "--cache/--no-cache",
+    "use_cache",
+    help="Reuse transcripts stored by earlier runs",
+    default=True,
+)
+@click.option(
+    "--start",
+    help="Only transcribe from this point in the video ([[HH:]MM:]SS)",
+    metavar="TIME",
+    callback=lambda ctx, param, value: _parse_option(parse_timestamp, value),
+    default=None,
+)
+@click.option(
+    "--end",
+    help="Only transcribe up to this point in the video ([[HH:]MM:]SS)",
+    metavar="TIME",
+    callback=lambda ctx, param, value: _parse_option(parse_timestamp, value),
+    default=None,
+)
+@click.option(
+    "--section",
+    "extra_sections",
+    help="A START-END range of the video to transcribe, e.g. 40:00-55:00. Repeat for several ranges",
+    callback=lambda ctx, param, value: [_parse_option(parse_section, v) for v in value],
+    metavar="START-END",
+    multiple=True,
+)
+@click.option(
+    "--hedge-after",
+    help="Start the audio download in parallel if captions have not arrived after this many seconds (implies chunked transcription, so a losing audio path stops between chunks)",
+    type=click.FloatRange(min=0),
+    default=None,
+)
 def main(
     url: str,
     output: Optional[str] = None,
     keep_audio: bool = False,
     output_dir: Path = get_downloads_dir(),
     with_timestamps: bool = True,
+    output_format: Optional[str] = None,
+    workers: int = 1,
+    chunk_duration: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    overlap: Optional[float] = None,
+    vad: bool = False,
+    resume: bool = False,
+    stream_decode: bool = False,
+    stream_download: bool = False,
+    audio_format: str = "native",
+    model_str: str = "turbo",
+    cascade: bool = False,
+    cascade_threshold: float = CascadeThresholds().min_avg_logprob,
+    language: Optional[str] = None,
+    use_cache: bool = True,
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    extra_sections: list[Section] = [],
+    hedge_after: Optional[float] = None,
 ) -> None:
     """Convert YouTube videos to text transcripts.
 
     URL: The YouTube video URL to transcribe
     """
+    timer = StageTimer()
+    # yt-dlp info for the video, extracted at most once and only if needed
+    video_info = None
+    video_id = get_video_id(url)
+    store = get_transcript_store() if use_cache else None
+
+    if stream_download:
+        if keep_audio:
+            raise click.UsageError(
+                "--keep-audio needs a downloaded file, not --stream-download"
+            )
+        stream_decode = True
+    chunked = (
+        workers > 1
+        or chunk_duration is not None
+        or stream_decode
+        or batch_size is not None
+        or overlap is not None
+        or vad
+        or resume
+        # A hedge that loses to captions is only stopped between chunks
+        or hedge_after is not None
+    )
+    if vad and stream_decode:
+        raise click.UsageError("--vad cannot be combined with --stream-decode")
+    if overlap is not None and overlap >= (chunk_duration or 300):
+        raise click.UsageError("--overlap must be shorter than --chunk-duration")
+    if output_format is None:
+        output_format = "timestamps" if with_timestamps else "text"
+    # Word timings cost an extra alignment pass, so only compute them when the
+    # output is written from them or overlapping chunks are merged on them
+    word_timestamps = output_format in WORD_FORMATS or bool(overlap)
+
+    # Options that change Whisper's output, and so identify a stored transcript
+    whisper_options = {"chunk_duration": (chunk_duration or 300) if chunked else None}
+    if batch_size is not None:
+        whisper_options["batched"] = True
+    if vad:
+        whisper_options["vad"] = True
+    if overlap:
+        whisper_options["overlap"] = overlap
+    if word_timestamps:
+        whisper_options["words"] = True
+    # Thresholds for escalating segments from the base model to --model
+    thresholds = None
+    if cascade:
+        if model_str == "base":
+            raise click.UsageError("--cascade needs a larger --model than base")
+        thresholds = CascadeThresholds(min_avg_logprob=cascade_threshold)
+        whisper_options["cascade"] = list(thresholds)
+    if language is not None:
+        whisper_options["language"] = language
+
+    if start is not None or end is not None:
+        try:
+            extra_sections = [*extra_sections, make_section(start, end)]
+        except ValueError as e:
+            raise click.BadParameter(str(e), param_hint="--start/--end")
+    # Parts of the video to download and transcribe, or None for all of it
+    sections = merge_sections(extra_sections) or None
+    if sections is not None:
+        whisper_options["sections"] = sections
+        if stream_download:
+            raise click.UsageError(
+                "--start, --end and --section cannot be combined with --stream-download"
+            )
+
+    # Set once the transcript has been streamed to its file chunk by chunk
+    output_fpath = None
+
+    def get_output_fpath() -> Path:
+        """Where the transcript goes, named after the video unless --output is given."""
+        nonlocal output, video_info
+        if output is None:
+            if video_info is None:
+                video_info = get_video_info(url)
+            output = get_video_title(url, info=video_info)
+            output += FORMAT_SUFFIXES[output_format]
+        return Path(output_dir) / output
+
+    transcript = None
+    if store is not None and video_id is not None:
+        transcript = store.get(video_id, "captions") or store.get(
+            video_id, "whisper", model_str, whisper_options
+        )
+        if transcript is not None:
+            click.echo(f"Using stored transcript for: {video_id}")
+
+    def audio_transcript(cancel: Optional[threading.Event] = None) -> dict:
+        """Download the audio and transcribe it with Whisper."""
+        nonlocal video_info, output_fpath
+        if chunked:
+            # Chunked runs keep their audio and finished chunks in a job
+            # directory until the transcript is stored, so they can be resumed
+            job_dir = get_job_dir(video_id or url, model_str, whisper_options)
+            if not resume:
+                shutil.rmtree(job_dir, ignore_errors=True)
+            work_dir = contextlib.nullcontext(job_dir)
+        else:
+            work_dir = tempfile.TemporaryDirectory()
+
+        def discard_cancelled_job() -> bool:
+            """Remove a cancelled chunked run's job directory, partial downloads included.
+
+            A run is only cancelled when the hedged captions won, so there is
+            nothing left to resume. Returns whether the run was cancelled.
+            """
+            if cancel is None or not cancel.is_set():
+                return False
+            if chunked:
+                shutil.rmtree(job_dir, ignore_errors=True)
+            return True
+
+        with work_dir as temp_dir:
+            # ENSURE that this is all done INSIDE the temp_dir context. cleanup is automatic after the with block
+            # (offset, file) for each downloaded section, or the whole video at offset 0
+            downloads = find_downloaded_audio(job_dir) if resume else None
+            # Headers for reading the audio straight from YouTube with --stream-download
+            http_headers = None
+            if stream_download:
+                click.echo(f"Streaming audio from: {url}")
+                video_info = get_video_info(url)
+                media_url, http_headers = get_audio_stream(url, info=video_info)
+                downloads = [(0.0, media_url)]
+            elif downloads is not None:
+                click.echo(f"Resuming with audio downloaded earlier to: {job_dir}")
+                # Cached on disk by the first run
+                video_info = get_video_info(url)
+            else:
+                click.echo(f"Downloading video from: {url}")
+                try:
+                    with timer.stage("download"):
+                        video_info = get_video_info(url)
+                        downloads = [
+                            (
+                                section[0] if section else 0.0,
+                                download_audio(
+                                    url,
+                                    output_path=(
+                                        job_dir / "audio" if chunked else temp_dir
+                                    ),
+                                    audio_format=audio_format,
+                                    info=video_info,
+                                    cancel=cancel,
+                                    section=section,
+                                ),
+                            )
+                            for section in sections or [None]
+                        ]
+                except BaseException:
+                    discard_cancelled_job()
+                    raise
+                if chunked:
+                    record_downloaded_audio(job_dir, downloads)
+
+                for _, audio_path in downloads:
+                    assert audio_path.exists(), "Audio file not found"
+                    click.echo(f"Downloaded audio to: {audio_path}")
+
+            # Audio without a video id is identified by its contents
+            source_id = video_id or (
+                url if stream_download else hash_file(downloads[0][1])
+            )
+            transcript = None
+            if store is not None and video_id is None:
+                transcript = store.get(source_id, "whisper", model_str, whisper_options)
+
+            if transcript is None:
+                if discard_cancelled_job():
+                    raise TranscriptionCancelled("Transcription cancelled")
+                if language is not None:
+                    video_language = None if language == MIXED_LANGUAGE else language
+                elif chunked or len(downloads) > 1:
+                    # One language for every chunk and section, rather than each
+                    # detecting its own from its first 30 seconds. A resumed run
+                    # reuses the first run's, which its finished chunks are in
+                    video_language = find_job_language(job_dir) if chunked else None
+                    if video_language is None:
+                        with timer.stage("language"):
+                            video_language = resolve_language(
+                                downloads[0][1],
+                                video_info,
+                                # Worker processes hold --model; keep this process light
+                                model_str if workers == 1 else FAST_MODEL,
+                                http_headers,
+                            )
+                        if chunked:
+                            record_job_language(job_dir, video_language)
+                else:
+                    # Whisper detects the language of a single file once itself
+                    video_language = None
+
+                click.echo("Transcribing audio...")
+                with timer.stage("transcribe"), warnings.catch_warnings():
+                    warnings.filterwarnings("ignore", category=FutureWarning)
+                    if chunked:
+                        try:
+                            stores = []
+
+                            def chunks():
+                                for index, (offset, audio_path) in enumerate(downloads):
+                                    for chunk in iter_transcribed_chunks(
+                                        audio_path,
+                                        chunk_duration=chunk_duration or 300,
+                                        max_workers=workers,
+                                        model_str=model_str,
+                                        stream=stream_decode,
+                                        cancel=cancel,
+                                        batch_size=batch_size,
+                                        checkpoint_dir=job_dir / "chunks" / str(index),
+                                        resume=resume,
+                                        vad=vad,
+                                        overlap=overlap or 0.0,
+                                        http_headers=http_headers,
+                                        # A stream has no file to hash
+                                        source_id=(
+                                            source_id if stream_download else None
+                                        ),
+                                        cascade=thresholds,
+                                        word_timestamps=word_timestamps,
+                                        language=video_language,
+                                        # Never store a transcript with gaps
+                                        skip_failed=False,
+                                    ):
+                                        # Sections are timed from the start of the video
+                                        chunk = chunk.shift(offset) if offset else chunk
+                                        stores.append(chunk)
+                                        yield chunk
+
+                            # Write each chunk out as soon as every earlier chunk is done
+                            output_fpath = save_transcript_chunks(
+                                chunks(), get_output_fpath(), output_format
+                            )
+                            segments = SegmentStore.concat(stores).to_segments()
+                        except BaseException as e:
+                            if not discard_cancelled_job():
+                                click.echo(
+                                    "Transcription interrupted; run the same command with --resume to continue",
+                                    err=True,
+                                )
+                            if isinstance(e, ChunksFailed):
+                                raise click.ClickException(str(e)) from e
+                            raise
+                        transcript = {
+                            "segments": segments,
+                            "text": "".join(segment["text"] for segment in segments),
+                            "language": video_language,
+                        }
+                    elif sections is None:
+                        transcript = transcribe_audio(
+                            downloads[0][1],
+                            model_str=model_str,
+                            kwargs={
+                                "word_timestamps": word_timestamps,
+                                "language": video_language,
+                            },
+                            cascade=thresholds,
+                        )
+                    else:
+                        results = [
+                            transcribe_audio(
+                                audio_path,
+                                model_str=model_str,
+                                kwargs={
+                                    "word_timestamps": word_timestamps,
+                                    "language": video_language,
+                                },
+                                cascade=thresholds,
+                            )
+                            for _, audio_path in downloads
+                        ]
+                        segments = [
+                            segment
+                            for (offset, _), result in zip(downloads, results)
+                            for segment in shift_segments(result["segments"], offset)
+                        ]
+                        transcript = {
+                            "segments": segments,
+                            "text": "".join(segment["text"] for segment in segments),
+                            "language": results[0]["language"],
+                        }
+
+                if store is not None:
+                    store.put(
+                        transcript, source_id, "whisper", model_str, whisper_options
+                    )
+
+            # Optionally save the audio file, as MP3 since that is what people can play
+            if keep_audio:
+                downloads_dir = Path.home() / "Downloads"
+                for _, audio_path in downloads:
+                    final_audio = downloads_dir / f"{audio_path.stem}.mp3"
+                    if audio_path.suffix == ".mp3":
+                        os.replace(audio_path, final_audio)
+                    else:
+                        with timer.stage("export_mp3"):
+                            export_mp3(audio_path, final_audio)
+                    click.echo(f"Audio saved to: {final_audio}")
+
+            if chunked:
+                shutil.rmtree(job_dir, ignore_errors=True)
+
+        return transcript
+
+    async def caption_transcript() -> Optional[dict]:
+        result = await fetch_captions_async(video_id)
+        return result.transcript
+
+    if transcript is None and "v=" in url and hedge_after is not None:
+        # Race captions against the audio path, starting the audio path
+        # straight away when the video is already known to have no captions
+        cached_info = get_info_cache().get(video_id)
+        delay = 0 if cached_info and has_captions(cached_info) is False else hedge_after
+        with timer.stage("hedged"):
+            transcript, winner = asyncio.run(
+                race_with_hedge(caption_transcript(), audio_transcript, delay)
+            )
+        click.echo(
+            f"Hedged run won by: {'captions' if winner == 'primary' else 'audio'}"
+        )
+        if winner == "primary":
+            # A losing hedge may have finished writing its own transcript
+            output_fpath = None
+            if store is not None:
+                store.put(transcript, video_id, "captions")
+
     # First try to extract existing transcript
-    if "v=" in url:
-        transcript = extract_transcript(url)
-    else:
-        transcript = None
+    if transcript is None and "v=" in url:
+        with timer.stage("captions"):
+            transcript = extract_transcript(url)
+        if transcript is not None and store is not None:
+            store.put(transcript, video_id, "captions")
 
     if transcript is None:
         # Fall back to audio download and whisper conversion
-        with tempfile.TemporaryDirectory() as temp_dir:
-            # ENSURE that this is all done INSIDE the temp_dir context. cleanup is automatic after the with block
-            click.echo(f"Downloading video from: {url}")
-            audio_path = download_audio(url, output_path=temp_dir)
+        transcript = audio_transcript()
 
-            assert audio_path.exists(), "Audio file not found"
-            click.echo(f"Downloaded audio to: {audio_path}")
+    if sections is not None and output_fpath is None:
+        # Captions (and stored transcripts) cover the whole video
+        transcript = clip_transcript(transcript, sections)
 
-            click.echo("Transcribing audio...")
-            with warnings.catch_warnings():
-                warnings.filterwarnings("ignore", category=FutureWarning)
-                transcript = transcribe_audio(audio_path)
+    if output_fpath is None:
+        with timer.stage("write"):
+            # Stream the segments straight to the file
+            output_fpath = save_transcript(
+                transcript["segments"], get_output_fpath(), output_format
+            )
 
-    # Format the transcript with timestamps if requested
-    if with_timestamps:
-        transcript_text = format_transcript(transcript["segments"])
-    else:
-        transcript_text = transcript["text"]
+    logger.info(f"Stage timings: {timer.summary()}")
+    click.echo(f"Transcript saved to: {output_fpath}")
 
-    # get title if output is None
-    if output is None:
-        # get the title from audio_path
-        output = get_video_title(url)
-        output += ".txt"
 
-    # Save transcript to file
-    output_fpath = Path(output_dir) / output
+@click.command()
+@click.argument("source")
+@click.option(
+    "--output-dir",
+    "-d",
+    help="Output directory for the transcripts",
+    default=get_downloads_dir(),
+)
+@click.option(
+    "--with-timestamps/--no-timestamps",
+    help="Save the transcripts with timestamps",
+    default=True,
+)
+@click.option(
+    "--format",
+    "output_format",
+    help="Transcript format (default: timestamps, or text with --no-timestamps)",
+    type=click.Choice(OUTPUT_FORMATS),
+    default=None,
+)
+@click.option(
+    "--workers",
+    "-w",
+    help="Number of transcription worker processes (default: one per CPU core)",
+    type=click.IntRange(min=1),
+    default=None,
+)
+@click.option(
+    "--downloads",
+    help="Number of concurrent audio downloads",
+    type=click.IntRange(min=1),
+    default=4,
+)
+@click.option(
+    "--fetchers",
+    help="Number of concurrent metadata/caption fetches",
+    type=click.IntRange(min=1),
+    default=8,
+)
+@click.option(
+    "--chunk-duration",
+    help="Chunk length in seconds for transcription",
+    type=click.IntRange(min=1),
+    default=300,
+)
+@click.option(
+    "--audio-format",
+    help="Format to download audio in",
+    type=click.Choice(AUDIO_FORMATS),
+    default="native",
+)
+@click.option(
+    "--model",
+    "model_str",
+    help="Whisper model to transcribe with",
+    type=click.Choice(["base", "turbo"]),
+    default="turbo",
+)
+@click.option(
+    "--cache/--no-cache",
+    "use_cache",
+    help="Reuse transcripts stored by earlier runs",
+    default=True,
+)
+def batch(
+    source: str,
+    output_dir: Path = get_downloads_dir(),
+    with_timestamps: bool = True,
+    output_format: Optional[str] = None,
+    workers: Optional[int] = None,
+    downloads: int = 4,
+    fetchers: int = 8,
+    chunk_duration: int = 300,
+    audio_format: str = "native",
+    model_str: str = "turbo",
+    use_cache: bool = True,
+) -> None:
+    """Transcribe many YouTube videos in one pipelined run.
 
-    with open(output_fpath, "w") as f:
-        f.write(transcript_text)
+    SOURCE: A file with one URL per line, "-" to read URLs from stdin, or a playlist URL
+    """
+    urls = read_urls(source)
+    click.echo(f"Transcribing {len(urls)} videos...")
 
-    # Optionally save the audio file
-    if keep_audio:
-        downloads_dir = Path.home() / "Downloads"
-        final_audio = downloads_dir / audio_path.name
-        os.replace(audio_path, final_audio)
-        click.echo(f"Audio saved to: {final_audio}")
+    items = run_batch(
+        urls,
+        output_dir=Path(output_dir),
+        with_timestamps=with_timestamps,
+        output_format=output_format,
+        model_str=model_str,
+        audio_format=audio_format,
+        chunk_duration=chunk_duration,
+        fetch_workers=fetchers,
+        download_workers=downloads,
+        transcribe_workers=workers,
+        store=get_transcript_store() if use_cache else None,
+    )
 
-    click.echo(f"Transcript saved to: {output_fpath}")
+    failed = [item for item in items if item.error is not None]
+    for item in failed:
+        click.echo(f"Failed: {item.url} ({item.error})", err=True)
+    click.echo(
+        f"Transcribed {len(items) - len(failed)}/{len(items)} videos to: {output_dir}"
+    )
+    if failed:
+        raise SystemExit(1)
+
+
+@click.command()
+@click.option("--host", help="Address to listen on", default=DEFAULT_HOST)
+@click.option("--port", help="Port to listen on", type=int, default=DEFAULT_PORT)
+@click.option(
+    "--output-dir",
+    "-d",
+    help="Output directory for the transcripts",
+    default=get_downloads_dir(),
+)
+@click.option(
+    "--concurrency",
+    help="Number of jobs to run at once",
+    type=click.IntRange(min=1),
+    default=2,
+)
+@click.option(
+    "--workers",
+    "-w",
+    help="Number of transcription worker processes shared by all jobs",
+    type=click.IntRange(min=1),
+    default=1,
+)
+@click.option(
+    "--chunk-duration",
+    help="Chunk length in seconds for transcription",
+    type=click.IntRange(min=1),
+    default=300,
+)
+@click.option(
+    "--audio-format",
+    help="Format to download audio in",
+    type=click.Choice(AUDIO_FORMATS),
+    default="native",
+)
+@click.option(
+    "--model",
+    "model_str",
+    help="Default Whisper model, loaded at startup",
+    type=click.Choice(["base", "turbo"]),
+    default="turbo",
+)
+@click.option(
+    "--cache/--no-cache",
+    "use_cache",
+    help="Reuse transcripts stored by earlier runs",
+    default=True,
+)
+def serve(
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    output_dir: Path = get_downloads_dir(),
+    concurrency: int = 2,
+    workers: int = 1,
+    chunk_duration: int = 300,
+    audio_format: str = "native",
+    model_str: str = "turbo",
+    use_cache: bool = True,
+) -> None:
+    """Run a local transcription server that keeps models loaded between jobs.
+
+    Submit jobs with `ytt submit URL`, or POST {"url": ...} to /jobs.
+    """
+    runner, close_runner = make_job_runner(
+        Path(output_dir),
+        model_str=model_str,
+        audio_format=audio_format,
+        chunk_duration=chunk_duration,
+        transcribe_workers=workers,
+        store=get_transcript_store() if use_cache else None,
+    )
+    service = TranscriptionService(runner, concurrency=concurrency).start()
+    server = TranscriptionServer(service, host, port)
+    click.echo(f"Serving on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.stop()
+        close_runner()
+
+
+def _job_line(job: dict) -> str:
+    stage = f" {job['stage']}" if job["status"] == "running" else ""
+    return f"{job['id']} {job['status']}{stage} {job['progress']:.0%} {job['url']}"
+
+
+@click.command()
+@click.argument("url")
+@click.option("--server", help="Address of the ytt server", default=DEFAULT_SERVER)
+@click.option(
+    "--priority",
+    help="Jobs with a higher priority run first",
+    type=int,
+    default=0,
+)
+@click.option(
+    "--format",
+    "output_format",
+    help="Transcript format (default: timestamps)",
+    type=click.Choice(OUTPUT_FORMATS),
+    default=None,
+)
+@click.option(
+    "--model",
+    "model_str",
+    help="Whisper model to transcribe with (default: the server's)",
+    type=click.Choice(["base", "turbo"]),
+    default=None,
+)
+@click.option(
+    "--wait/--no-wait",
+    help="Wait for the job to finish, showing its progress",
+    default=False,
+)
+def submit(
+    url: str,
+    server: str = DEFAULT_SERVER,
+    priority: int = 0,
+    output_format: Optional[str] = None,
+    model_str: Optional[str] = None,
+    wait: bool = False,
+) -> None:
+    """Queue a video on a running `ytt serve`.
+
+    URL: The YouTube video URL to transcribe
+    """
+    options = {"output_format": output_format, "model_str": model_str}
+    try:
+        job = submit_job(
+            url,
+            server,
+            priority,
+            {name: value for name, value in options.items() if value is not None},
+        )
+        click.echo(f"Queued job {job['id']}")
+        if not wait:
+            return
+
+        last_line = None
+
+        def show(job: dict) -> None:
+            nonlocal last_line
+            if _job_line(job) != last_line:
+                last_line = _job_line(job)
+                click.echo(last_line, err=True)
+
+        job = wait_for_job(job["id"], server, on_update=show)
+    except RuntimeError as e:
+        raise click.ClickException(str(e))
+
+    if job["status"] != "done":
+        raise click.ClickException(f"Job {job['status']}: {job['error']}")
+    click.echo(f"Transcript saved to: {job['output']}")
+
+
+@click.command()
+@click.argument("job_id", required=False)
+@click.option("--server", help="Address of the ytt server", default=DEFAULT_SERVER)
+def status(job_id: Optional[str] = None, server: str = DEFAULT_SERVER) -> None:
+    """Show the jobs on a running `ytt serve`, or one job in detail.
+
+    JOB_ID: The job to show (default: all jobs)
+    """
+    try:
+        if job_id is None:
+            for job in list_jobs(server):
+                click.echo(_job_line(job))
+        else:
+            for name, value in get_job(job_id, server).items():
+                click.echo(f"{name}: {value}")
+    except RuntimeError as e:
+        raise click.ClickException(str(e))
+
+
+@click.command()
+@click.argument("transcript", type=click.Path(exists=True, dir_okay=False))
+@click.argument("audio", type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    "--output",
+    "-o",
+    help="Output file path (default: next to TRANSCRIPT)",
+    default=None,
+)
+@click.option(
+    "--format",
+    "output_format",
+    help="Format to write the aligned transcript in",
+    type=click.Choice(["word-srt", "jsonl"]),
+    default="word-srt",
+)
+@click.option(
+    "--model",
+    "model_str",
+    help="Whisper model to align with",
+    type=click.Choice(["base", "turbo"]),
+    default="turbo",
+)
+@click.option(
+    "--language",
+    help="Language of the transcript, e.g. en (default: let Whisper's tokenizer decide)",
+    default=None,
+)
+def align(
+    transcript: str,
+    audio: str,
+    output: Optional[str] = None,
+    output_format: str = "word-srt",
+    model_str: str = "turbo",
+    language: Optional[str] = None,
+) -> None:
+    """Add word timings to a saved transcript without transcribing again.
+
+    TRANSCRIPT: A transcript file ([HH:MM:SS -> HH:MM:SS] lines, SRT or WebVTT)
+
+    AUDIO: The audio file it was transcribed from
+    """
+    if output is None:
+        output = Path(transcript).with_suffix(FORMAT_SUFFIXES[output_format])
+    segments = load_transcript(transcript).to_segments()
+    click.echo(f"Aligning {len(segments)} segments...")
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", category=FutureWarning)
+        segments = align_words(load_audio(audio), segments, model_str, language)
+    click.echo(
+        f"Aligned transcript saved to: {save_transcript(segments, output, output_format)}"
+    )
+
+
+cli = DefaultCommandGroup(
+    default_command="transcribe",
+    help="Convert YouTube videos to text transcripts.",
+)
+cli.add_command(main, name="transcribe")
+cli.add_command(batch)
+cli.add_command(serve)
+cli.add_command(submit)
+cli.add_command(status)
+cli.add_command(align)
 
 
 if __name__ == "__main__":
-    main()
+    cli()